@@ -1,34 +1,41 @@
 """
-Tiny synchronous API‑like wrapper used by the Gradio app.
+Tiny API‑like wrapper used by the Gradio app.
 
 This keeps orchestration logic (audio transcription, simple image summary,
 fusion, confidence) in one place without requiring a web server.
+``submit_record`` is synchronous; ``submit_record_async`` is the asyncio
+counterpart for callers running on an event loop.
 """
 
 from __future__ import annotations
 
+import asyncio
 import os
-from typing import Any, Dict, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
 
-from brain_of_the_doctor import get_multimodal_assessment
-from voice_of_the_patient import transcribe_with_groq
+from brain_of_the_doctor import get_multimodal_assessment, get_multimodal_assessment_async
+from voice_of_the_patient import transcribe_with_groq, transcribe_with_groq_async
+from app.services.cache_service import content_key, get_cache, hash_file
+from app.services.config import env_int, env_number
+from app.services.history_service import get_history_summary, get_history_summary_async
+from app.services.image_service import IMAGE_MAX_BYTES, IMAGE_MAX_EDGE, prepare_image
 
 
-def _simple_image_summary(image_path: Optional[str]) -> Dict[str, Any]:
-    """
-    Get image summary using Groq vision API if available, otherwise use simple placeholder.
-    """
-    if not image_path:
-        return {"summary": "No image was provided.", "confidence": 0.4}
+# Per-stage timeouts (seconds) used by the concurrent submit mode.
+STT_TIMEOUT = env_number("SUBMIT_STT_TIMEOUT", 60.0)
+VISION_TIMEOUT = env_number("SUBMIT_VISION_TIMEOUT", 90.0)
+HISTORY_TIMEOUT = env_number("SUBMIT_HISTORY_TIMEOUT", 5.0)
 
-    # Try to use Groq vision API for accurate analysis
-    try:
-        from brain_of_the_doctor import encode_image, analyze_image_with_query
-        
-        api_key = os.environ.get("GROQ_API_KEY")
-        if api_key and api_key != "your_groq_api_key_here":
-            encoded_img = encode_image(image_path)
-            query = """You are a medical imaging specialist with expertise across ALL medical domains. Analyze this medical image comprehensively and provide a SPECIFIC diagnostic assessment.
+# Used in place of the history summary when the lookup times out. A string,
+# not ``None``, so the assessment does not run the slow lookup again.
+HISTORY_UNAVAILABLE = "Prior history is unavailable for this consultation (lookup timed out)."
+
+VISION_MODEL = "meta-llama/llama-4-maverick-17b-128e-instruct"  # Maverick for superior medical accuracy
+STT_MODEL = "whisper-large-v3"
+
+VISION_PROMPT = """You are a medical imaging specialist with expertise across ALL medical domains. Analyze this medical image comprehensively and provide a SPECIFIC diagnostic assessment.
 
 CRITICAL: Look carefully at what is ACTUALLY visible and provide a specific diagnosis or differential diagnosis, not generic descriptions.
 
@@ -72,22 +79,53 @@ Provide a detailed, structured description covering:
 7. CLINICAL SIGNIFICANCE: Any concerning features requiring attention (signs of infection, structural abnormalities, acute vs. chronic appearance, etc.)
 
 Be precise, use appropriate medical terminology, and provide a SPECIFIC diagnosis that matches what you actually see in the image."""
-            
-            vision_result = analyze_image_with_query(
-                query=query,
-                model="meta-llama/llama-4-maverick-17b-128e-instruct",  # Maverick for superior medical accuracy
-                encoded_image=encoded_img
-            )
-            
-            return {
-                "summary": vision_result,
-                "confidence": 0.85,  # Higher confidence for actual vision API
-            }
-    except Exception as e:
-        print(f"Groq vision API failed: {e}. Using fallback...")
-        # Fall through to deterministic fallback
 
-    # Deterministic fallback based on filename
+
+# Repeat submissions of the same photo (retries, double clicks, re-analysis)
+# skip the vision round trip entirely.
+_VISION_CACHE = get_cache(
+    "vision",
+    ttl_seconds=env_number("VISION_CACHE_TTL", 7 * 24 * 3600),
+    max_memory_items=env_int("VISION_CACHE_MEMORY_ITEMS", 128),
+    max_disk_bytes=env_int("VISION_CACHE_MAX_BYTES", 32 * 1024 * 1024),
+)
+
+
+def _vision_cache_key(image_path: str) -> str:
+    return content_key(
+        hash_file(image_path), VISION_MODEL, VISION_PROMPT, f"{IMAGE_MAX_EDGE}:{IMAGE_MAX_BYTES}"
+    )
+
+
+def get_vision_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters of the vision result cache."""
+    return _VISION_CACHE.stats()
+
+
+def _groq_api_key() -> Optional[str]:
+    """Return the configured Groq API key, or ``None`` for placeholders."""
+    api_key = os.environ.get("GROQ_API_KEY")
+    if not api_key or api_key == "your_groq_api_key_here":
+        return None
+    return api_key
+
+
+_STAGE_EXECUTOR: Optional[ThreadPoolExecutor] = None
+
+
+def _get_stage_executor() -> ThreadPoolExecutor:
+    """Shared worker pool for the independent submit stages."""
+    global _STAGE_EXECUTOR
+    if _STAGE_EXECUTOR is None:
+        _STAGE_EXECUTOR = ThreadPoolExecutor(
+            max_workers=env_int("SUBMIT_STAGE_WORKERS", 12, minimum=3),
+            thread_name_prefix="submit-stage",
+        )
+    return _STAGE_EXECUTOR
+
+
+def _fallback_image_summary(image_path: str) -> Dict[str, Any]:
+    """Deterministic fallback based on filename."""
     name = os.path.basename(image_path).lower()
     if "acne" in name or "pimple" in name:
         return {
@@ -100,15 +138,137 @@ Be precise, use appropriate medical terminology, and provide a SPECIFIC diagnosi
     }
 
 
+def _transcribe(audio_filepath: Optional[str]) -> Tuple[str, float]:
+    """Transcribe audio if present, returning ``(transcript, confidence)``."""
+    if not audio_filepath:
+        return "No audio was provided.", 0.4
+    try:
+        api_key = _groq_api_key()
+        if not api_key:
+            raise ValueError("API key not configured")
+        transcript = transcribe_with_groq(
+            GROQ_API_KEY=api_key,
+            audio_filepath=audio_filepath,
+            stt_model=STT_MODEL,
+        )
+        return transcript, 0.75  # simple fixed confidence for now
+    except Exception as e:
+        # Fallback when transcription fails (API key missing or other error)
+        return _transcription_unavailable(str(e)), 0.3
+
+
+def _transcription_unavailable(reason: str) -> str:
+    return f"[Audio transcription unavailable: {reason}. Please configure GROQ_API_KEY in .env file or set it as environment variable.]"
+
+
+def _simple_image_summary(image_path: Optional[str]) -> Dict[str, Any]:
+    """
+    Get image summary using Groq vision API if available, otherwise use simple placeholder.
+    """
+    if not image_path:
+        return {"summary": "No image was provided.", "confidence": 0.4}
+
+    # Try to use Groq vision API for accurate analysis
+    try:
+        from brain_of_the_doctor import OFFLINE_VISION_MESSAGE, analyze_image_with_query
+        
+        if _groq_api_key():
+            cache_key = _vision_cache_key(image_path)
+            vision_result = _VISION_CACHE.get(cache_key)
+            if vision_result is None:
+                prepared = prepare_image(image_path)
+
+                vision_result = analyze_image_with_query(
+                    query=VISION_PROMPT,
+                    model=VISION_MODEL,
+                    encoded_image=prepared["base64"],
+                    mime_type=prepared["mime_type"],
+                )
+                if vision_result != OFFLINE_VISION_MESSAGE:
+                    _VISION_CACHE.set(cache_key, vision_result)
+            
+            return {
+                "summary": vision_result,
+                "confidence": 0.85,  # Higher confidence for actual vision API
+            }
+    except Exception as e:
+        print(f"Groq vision API failed: {e}. Using fallback...")
+        # Fall through to deterministic fallback
+
+    return _fallback_image_summary(image_path)
+
+
+def _await_stage(
+    future: Any, started: float, timeout: float, stage: str, on_timeout: Callable[[], Any]
+) -> Any:
+    """
+    Wait for a stage result, substituting a fallback when it overruns.
+
+    ``timeout`` counts from ``started`` (the submit time), not from when this
+    wait begins, so time spent waiting on earlier stages is not added to it.
+    """
+    remaining = max(0.0, started + timeout - time.monotonic()) if timeout else None
+    try:
+        return future.result(timeout=remaining)
+    except FutureTimeoutError:
+        print(f"Warning: {stage} stage exceeded {timeout:.1f}s. Using fallback...")
+        future.cancel()
+        return on_timeout()
+
+
+def _run_stages_concurrently(
+    audio_filepath: Optional[str],
+    image_filepath: Optional[str],
+    patient_id: Optional[str],
+) -> Tuple[Tuple[str, float], Dict[str, Any], str]:
+    """
+    Run transcription, image analysis and history lookup in parallel.
+
+    The three stages are independent, so the wall time is bounded by the
+    slowest one (or its timeout) instead of their sum.
+    """
+    executor = _get_stage_executor()
+    started = time.monotonic()
+    stt_future = executor.submit(_transcribe, audio_filepath)
+    img_future = executor.submit(_simple_image_summary, image_filepath)
+    history_future = executor.submit(get_history_summary, patient_id)
+
+    transcription = _await_stage(
+        stt_future,
+        started,
+        STT_TIMEOUT,
+        "transcription",
+        lambda: (_transcription_unavailable("transcription timed out"), 0.3),
+    )
+    img = _await_stage(
+        img_future,
+        started,
+        VISION_TIMEOUT,
+        "image analysis",
+        lambda: _fallback_image_summary(image_filepath),
+    )
+    history_summary = _await_stage(
+        history_future, started, HISTORY_TIMEOUT, "history", lambda: HISTORY_UNAVAILABLE
+    )
+    return transcription, img, history_summary
+
+
 def submit_record(
     audio_filepath: Optional[str],
     image_filepath: Optional[str],
     patient_id: Optional[str] = None,
     llm_client: Optional[Any] = None,
+    concurrent: bool = True,
 ) -> Dict[str, Any]:
     """
     End‑to‑end helper used on initial submit from the UI.
 
+    With ``concurrent=True`` (the default) transcription, image analysis and
+    the history lookup run in parallel with per‑stage timeouts
+    (``SUBMIT_STT_TIMEOUT``, ``SUBMIT_VISION_TIMEOUT``,
+    ``SUBMIT_HISTORY_TIMEOUT``); ``concurrent=False`` keeps the original
+    sequential behaviour. The returned dict is identical in both modes.
+
     Returns:
         {
           "transcript": str,
@@ -118,28 +278,16 @@ def submit_record(
           "session_state": {...},
         }
     """
-    # 1) Transcribe audio if present.
-    if audio_filepath:
-        try:
-            api_key = os.environ.get("GROQ_API_KEY")
-            if not api_key or api_key == "your_groq_api_key_here":
-                raise ValueError("API key not configured")
-            transcript = transcribe_with_groq(
-                GROQ_API_KEY=api_key,
-                audio_filepath=audio_filepath,
-                stt_model="whisper-large-v3",
-            )
-            transcript_conf = 0.75  # simple fixed confidence for now
-        except Exception as e:
-            # Fallback when transcription fails (API key missing or other error)
-            transcript = f"[Audio transcription unavailable: {str(e)}. Please configure GROQ_API_KEY in .env file or set it as environment variable.]"
-            transcript_conf = 0.3
+    # 1) + 2) Transcribe audio and summarise the image (plus history lookup
+    # in concurrent mode, since none of these depend on each other).
+    history_summary: Optional[str] = None
+    if concurrent:
+        (transcript, transcript_conf), img, history_summary = _run_stages_concurrently(
+            audio_filepath, image_filepath, patient_id
+        )
     else:
-        transcript = "No audio was provided."
-        transcript_conf = 0.4
-
-    # 2) Get a simple image summary.
-    img = _simple_image_summary(image_filepath)
+        transcript, transcript_conf = _transcribe(audio_filepath)
+        img = _simple_image_summary(image_filepath)
 
     # 3) Run multimodal assessment (this also persists history).
     assessment = get_multimodal_assessment(
@@ -149,8 +297,19 @@ def submit_record(
         transcript_conf=transcript_conf,
         patient_id=patient_id,
         llm_client=llm_client,
+        history_summary=history_summary,
     )
 
+    return _build_response(transcript, transcript_conf, img, patient_id, assessment)
+
+
+def _build_response(
+    transcript: str,
+    transcript_conf: float,
+    img: Dict[str, Any],
+    patient_id: Optional[str],
+    assessment: Dict[str, Any],
+) -> Dict[str, Any]:
     session_state = {
         "image_summary": img["summary"],
         "image_conf": img["confidence"],
@@ -169,3 +328,107 @@ def submit_record(
     }
 
 
+# --- Async pipeline ------------------------------------------------------------
+
+
+async def _transcribe_async(audio_filepath: Optional[str]) -> Tuple[str, float]:
+    if not audio_filepath:
+        return "No audio was provided.", 0.4
+    try:
+        api_key = _groq_api_key()
+        if not api_key:
+            raise ValueError("API key not configured")
+        transcript = await transcribe_with_groq_async(
+            GROQ_API_KEY=api_key,
+            audio_filepath=audio_filepath,
+            stt_model=STT_MODEL,
+        )
+        return transcript, 0.75
+    except Exception as e:
+        return _transcription_unavailable(str(e)), 0.3
+
+
+async def _simple_image_summary_async(image_path: Optional[str]) -> Dict[str, Any]:
+    if not image_path:
+        return {"summary": "No image was provided.", "confidence": 0.4}
+
+    try:
+        from brain_of_the_doctor import OFFLINE_VISION_MESSAGE, analyze_image_with_query_async
+
+        if _groq_api_key():
+            cache_key = await asyncio.to_thread(_vision_cache_key, image_path)
+            vision_result = await asyncio.to_thread(_VISION_CACHE.get, cache_key)
+            if vision_result is None:
+                prepared = await asyncio.to_thread(prepare_image, image_path)
+                vision_result = await analyze_image_with_query_async(
+                    query=VISION_PROMPT,
+                    model=VISION_MODEL,
+                    encoded_image=prepared["base64"],
+                    mime_type=prepared["mime_type"],
+                )
+                if vision_result != OFFLINE_VISION_MESSAGE:
+                    await asyncio.to_thread(_VISION_CACHE.set, cache_key, vision_result)
+            return {"summary": vision_result, "confidence": 0.85}
+    except Exception as e:
+        print(f"Groq vision API failed: {e}. Using fallback...")
+
+    return _fallback_image_summary(image_path)
+
+
+async def _await_stage_async(
+    coro: Awaitable[Any], timeout: float, stage: str, on_timeout: Callable[[], Any]
+) -> Any:
+    try:
+        return await asyncio.wait_for(coro, timeout=timeout or None)
+    except asyncio.TimeoutError:
+        print(f"Warning: {stage} stage exceeded {timeout:.1f}s. Using fallback...")
+        return on_timeout()
+
+
+async def submit_record_async(
+    audio_filepath: Optional[str],
+    image_filepath: Optional[str],
+    patient_id: Optional[str] = None,
+    llm_client: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """
+    Native asyncio counterpart of :func:`submit_record`.
+
+    Transcription, image analysis and history lookup are awaited together
+    (with the same per‑stage timeouts), network calls use the async Groq
+    clients and SQLite work runs off the event loop, so many consultations
+    can be in flight on a single loop. Returns the same dict as
+    :func:`submit_record`.
+    """
+    (transcript, transcript_conf), img, history_summary = await asyncio.gather(
+        _await_stage_async(
+            _transcribe_async(audio_filepath),
+            STT_TIMEOUT,
+            "transcription",
+            lambda: (_transcription_unavailable("transcription timed out"), 0.3),
+        ),
+        _await_stage_async(
+            _simple_image_summary_async(image_filepath),
+            VISION_TIMEOUT,
+            "image analysis",
+            lambda: _fallback_image_summary(image_filepath),
+        ),
+        _await_stage_async(
+            get_history_summary_async(patient_id),
+            HISTORY_TIMEOUT,
+            "history",
+            lambda: HISTORY_UNAVAILABLE,
+        ),
+    )
+
+    assessment = await get_multimodal_assessment_async(
+        image_summary=img["summary"],
+        image_conf=img["confidence"],
+        transcript=transcript,
+        transcript_conf=transcript_conf,
+        patient_id=patient_id,
+        llm_client=llm_client,
+        history_summary=history_summary,
+    )
+
+    return _build_response(transcript, transcript_conf, img, patient_id, assessment)
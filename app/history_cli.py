@@ -0,0 +1,129 @@
+"""
+Maintenance commands for the patient history database.
+
+Usage:
+
+    python -m app.history_cli compact [--vacuum]
+    python -m app.history_cli archive --older-than-days 90 [--vacuum]
+    python -m app.history_cli export visits.jsonl.gz [--after-id N]
+    python -m app.history_cli import visits.parquet [--start-row N] [--keep-ids]
+    python -m app.history_cli rescore [--after-id N] [--processes 8] [--dry-run]
+
+Each command prints a JSON report: rows touched and space reclaimed for
+maintenance, rows / rows‑per‑second and the resume cursor for transfers
+and re‑scoring (progress goes to stderr). For ``compact`` / ``archive``,
+``payload_bytes_reclaimed`` is net of the bytes moved into the archive
+table (``archive_bytes``), and the file itself only shrinks with
+``--vacuum``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from app.services import history_service, history_transfer, rescore_service
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.history_cli",
+        description="Patient history maintenance.",
+    )
+    parser.add_argument(
+        "--db", help="Path to the history DB (defaults to PATIENT_HISTORY_DB)."
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    compact = sub.add_parser(
+        "compact", help="Compress legacy plain-JSON fusion results."
+    )
+    compact.add_argument("--vacuum", action="store_true", help="Shrink the file afterwards.")
+    compact.add_argument("--batch-size", type=int, default=500)
+
+    archive = sub.add_parser(
+        "archive", help="Move raw LLM output of old visits to the archive table."
+    )
+    archive.add_argument("--older-than-days", type=float, required=True)
+    archive.add_argument("--vacuum", action="store_true", help="Shrink the file afterwards.")
+    archive.add_argument("--batch-size", type=int, default=500)
+
+    export = sub.add_parser("export", help="Stream visits to JSONL(.gz) or Parquet.")
+    export.add_argument("path")
+    export.add_argument("--format", choices=("jsonl", "parquet"))
+    export.add_argument("--after-id", type=int, default=0, help="Resume after this visit id.")
+    export.add_argument("--patient-id")
+    export.add_argument("--batch-size", type=int, default=1000)
+
+    importer = sub.add_parser("import", help="Stream visits from JSONL(.gz) or Parquet.")
+    importer.add_argument("path")
+    importer.add_argument("--format", choices=("jsonl", "parquet"))
+    importer.add_argument("--start-row", type=int, default=0, help="Skip rows already imported.")
+    importer.add_argument("--keep-ids", action="store_true", help="Preserve source visit ids.")
+    importer.add_argument("--batch-size", type=int, default=1000)
+
+    rescore = sub.add_parser(
+        "rescore", help="Re-apply current fallback rules and triage thresholds."
+    )
+    rescore.add_argument("--after-id", type=int, default=0, help="Resume after this visit id.")
+    rescore.add_argument("--batch-size", type=int, default=5000)
+    rescore.add_argument("--processes", type=int, help="Keyword workers (default: CPU count).")
+    rescore.add_argument("--dry-run", action="store_true", help="Count changes without writing.")
+    return parser
+
+
+def _print_progress(report: dict) -> None:
+    print(
+        f"{report['rows']} rows, {report['rows_per_second']} rows/s",
+        file=sys.stderr,
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _build_parser().parse_args(argv)
+    if args.db:
+        history_service.DB_PATH = Path(args.db)
+
+    if args.command == "compact":
+        report = history_service.compact_visits(
+            vacuum=args.vacuum, batch_size=args.batch_size
+        )
+    elif args.command == "archive":
+        report = history_service.archive_raw_outputs(
+            args.older_than_days, vacuum=args.vacuum, batch_size=args.batch_size
+        )
+    elif args.command == "export":
+        report = history_transfer.export_visits(
+            args.path,
+            fmt=args.format,
+            after_id=args.after_id,
+            batch_size=args.batch_size,
+            patient_id=args.patient_id,
+            progress=_print_progress,
+        )
+    elif args.command == "rescore":
+        report = rescore_service.rescore_visits(
+            after_id=args.after_id,
+            batch_size=args.batch_size,
+            processes=args.processes,
+            dry_run=args.dry_run,
+            progress=_print_progress,
+        )
+    else:
+        report = history_transfer.import_visits(
+            args.path,
+            fmt=args.format,
+            start_row=args.start_row,
+            batch_size=args.batch_size,
+            keep_ids=args.keep_ids,
+            progress=_print_progress,
+        )
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""
+Prompt pieces for the follow‑up chat with the doctor.
+
+The chat prompt is assembled by ``app.services.chat_context`` from a static
+preamble (the initial assessment, rendered once per consultation), a
+rolling summary of older exchanges, the most recent exchanges verbatim and
+the patient's current question.
+"""
+
+from textwrap import dedent
+from typing import Any, Dict
+
+
+CHAT_PREAMBLE_TEMPLATE = dedent(
+    """
+    You are a professional, experienced medical doctor providing real-time assistance to a patient in a consultation.
+
+    INITIAL ASSESSMENT CONTEXT:
+    - Diagnosis: {diagnosis}
+    - Treatment Plan: {treatment}
+    - Medicine Constituents: {medicine}
+    - Safety Notes: {safety}
+    - Clinical Reasoning: {reasoning}
+    - Image Findings: {image_summary}
+    - Patient's Initial Description: {transcript}
+    """
+).strip()
+
+
+CHAT_INSTRUCTIONS = dedent(
+    """
+    INSTRUCTIONS:
+    1. Answer the patient's question based on the initial assessment context and conversation history above
+    2. Provide clear, professional medical guidance that is specific to their condition
+    3. Be empathetic, warm, and reassuring - speak as a caring doctor would
+    4. Reference the initial diagnosis and treatment plan when relevant
+    5. If asked about medications, explain how to use them properly, dosages, and what to expect
+    6. If asked about symptoms, relate them to the initial assessment and explain what they mean
+    7. If the question requires urgent medical attention, clearly state that and recommend immediate care
+    8. Keep responses concise but comprehensive (typically 2-5 sentences)
+    9. Use natural, conversational language - avoid overly technical jargon unless necessary
+    10. If you don't have enough information, ask clarifying questions or recommend in-person evaluation
+    11. Maintain continuity with previous conversation if relevant
+
+    Respond naturally as a doctor would in a real consultation, addressing the patient's concern directly:
+    """
+).strip()
+
+
+def build_chat_preamble(assessment: Dict[str, Any]) -> str:
+    """
+    Render the static part of the chat prompt from the initial assessment.
+
+    ``assessment`` is the ``initial_assessment`` dict kept in the session
+    state (diagnosis, treatment, medicine, safety, reasoning,
+    image_summary, transcript).
+    """
+    medicine = assessment.get("medicine") or []
+    if isinstance(medicine, (list, tuple)):
+        medicine = ", ".join(str(m) for m in medicine)
+
+    return CHAT_PREAMBLE_TEMPLATE.format(
+        diagnosis=assessment.get("diagnosis") or "Not specified",
+        treatment=assessment.get("treatment") or "Not specified",
+        medicine=medicine or "Not specified",
+        safety=assessment.get("safety") or "Not specified",
+        reasoning=assessment.get("reasoning") or "Not specified",
+        image_summary=assessment.get("image_summary") or "No image provided",
+        transcript=assessment.get("transcript") or "No description provided",
+    )
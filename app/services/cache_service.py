@@ -0,0 +1,309 @@
+"""
+Content‑addressed response cache.
+
+Two tiers per namespace:
+
+- an in‑memory LRU (``OrderedDict``) for the hot set of this process, and
+- a persistent SQLite tier shared across restarts, with TTL expiry and
+  size‑/count‑based LRU eviction.
+
+Values must be JSON‑serialisable. Keys are normally built with
+:func:`content_key` from the exact inputs that determine a response
+(content hash, prompt, model, ...), so a changed input can never return a
+stale value.
+
+Configuration (environment):
+
+- ``RESPONSE_CACHE_DB`` – SQLite path (default ``response_cache.db``);
+  set to an empty string to disable the disk tier.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+
+CACHE_DB_PATH = os.getenv("RESPONSE_CACHE_DB", "response_cache.db")
+
+_MISSING = object()
+
+
+def content_key(*parts: Union[str, bytes, None]) -> str:
+    """SHA‑256 over length‑prefixed parts (so ``("ab", "c") != ("a", "bc")``)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if part is None:
+            data = b""
+        elif isinstance(part, bytes):
+            data = part
+        else:
+            data = str(part).encode("utf-8")
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def hash_file(path: Union[str, Path], chunk_size: int = 1 << 20) -> str:
+    """SHA‑256 of a file's bytes, read in bounded chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """
+    Two‑tier (memory LRU + SQLite) cache for one namespace.
+
+    Parameters
+    ----------
+    namespace:
+        Logical cache name, e.g. ``"vision"``; namespaces share one DB file.
+    ttl_seconds:
+        Maximum age of an entry in either tier; ``0`` disables expiry.
+    max_memory_items:
+        Size of the in‑process LRU.
+    max_disk_entries / max_disk_bytes:
+        Limits for this namespace in the SQLite tier; least recently used
+        entries are evicted first. ``0`` means unbounded.
+    db_path:
+        Override for ``RESPONSE_CACHE_DB``; empty string disables disk.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl_seconds: float = 7 * 24 * 3600,
+        max_memory_items: int = 256,
+        max_disk_entries: int = 10_000,
+        max_disk_bytes: int = 64 * 1024 * 1024,
+        db_path: Optional[str] = None,
+    ) -> None:
+        self.namespace = namespace
+        self.ttl_seconds = max(0.0, float(ttl_seconds))
+        self.max_memory_items = max(0, int(max_memory_items))
+        self.max_disk_entries = max(0, int(max_disk_entries))
+        self.max_disk_bytes = max(0, int(max_disk_bytes))
+        self.db_path = CACHE_DB_PATH if db_path is None else db_path
+
+        self._memory: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._schema_ready = False
+        self._counters: Dict[str, int] = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "evictions": 0,
+        }
+
+    # -- SQLite tier ----------------------------------------------------------
+
+    def _conn(self) -> Optional[sqlite3.Connection]:
+        if not self.db_path:
+            return None
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        if not self._schema_ready:
+            with conn:
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS cache_entries (
+                        namespace TEXT NOT NULL,
+                        key TEXT NOT NULL,
+                        value TEXT NOT NULL,
+                        size INTEGER NOT NULL,
+                        created_at REAL NOT NULL,
+                        last_access REAL NOT NULL,
+                        PRIMARY KEY (namespace, key)
+                    )
+                    """
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_cache_lru "
+                    "ON cache_entries (namespace, last_access)"
+                )
+            self._schema_ready = True
+        return conn
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return bool(self.ttl_seconds) and now - created_at > self.ttl_seconds
+
+    def _disk_get(self, key: str, now: float) -> Tuple[Any, float]:
+        conn = self._conn()
+        if conn is None:
+            return _MISSING, 0.0
+        row = conn.execute(
+            "SELECT value, created_at FROM cache_entries WHERE namespace = ? AND key = ?",
+            (self.namespace, key),
+        ).fetchone()
+        if row is None:
+            return _MISSING, 0.0
+        value_json, created_at = row
+        with conn:
+            if self._expired(created_at, now):
+                conn.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                    (self.namespace, key),
+                )
+                return _MISSING, 0.0
+            conn.execute(
+                "UPDATE cache_entries SET last_access = ? WHERE namespace = ? AND key = ?",
+                (now, self.namespace, key),
+            )
+        return json.loads(value_json), created_at
+
+    def _disk_set(self, key: str, value: Any, now: float) -> None:
+        conn = self._conn()
+        if conn is None:
+            return
+        value_json = json.dumps(value)
+        with conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO cache_entries
+                    (namespace, key, value, size, created_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (self.namespace, key, value_json, len(value_json), now, now),
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        evicted = 0
+        if self.ttl_seconds:
+            evicted += conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND created_at < ?",
+                (self.namespace, now - self.ttl_seconds),
+            ).rowcount
+        count, total = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?",
+            (self.namespace,),
+        ).fetchone()
+        over_count = self.max_disk_entries and count > self.max_disk_entries
+        over_bytes = self.max_disk_bytes and total > self.max_disk_bytes
+        if over_count or over_bytes:
+            rows = conn.execute(
+                "SELECT key, size FROM cache_entries WHERE namespace = ? ORDER BY last_access ASC",
+                (self.namespace,),
+            )
+            victims = []
+            for key, size in rows:
+                if (not self.max_disk_entries or count <= self.max_disk_entries) and (
+                    not self.max_disk_bytes or total <= self.max_disk_bytes
+                ):
+                    break
+                victims.append((self.namespace, key))
+                count -= 1
+                total -= size
+            conn.executemany(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key = ?", victims
+            )
+            evicted += len(victims)
+        if evicted:
+            with self._lock:
+                self._counters["evictions"] += evicted
+
+    # -- Public API -----------------------------------------------------------
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the cached value for ``key`` or ``default`` on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if self._expired(created_at, now):
+                    del self._memory[key]
+                else:
+                    self._memory.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return value
+
+        try:
+            value, created_at = self._disk_get(key, now)
+        except sqlite3.Error as e:
+            print(f"Warning: response cache read failed: {e}")
+            value = _MISSING
+
+        with self._lock:
+            if value is _MISSING:
+                self._counters["misses"] += 1
+                return default
+            self._counters["disk_hits"] += 1
+            self._remember(key, value, created_at)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store ``value`` in both tiers."""
+        now = time.time()
+        with self._lock:
+            self._counters["sets"] += 1
+            self._remember(key, value, now)
+        try:
+            self._disk_set(key, value, now)
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            print(f"Warning: response cache write failed: {e}")
+
+    def _remember(self, key: str, value: Any, created_at: float) -> None:
+        if not self.max_memory_items:
+            return
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every entry of this namespace from both tiers."""
+        with self._lock:
+            self._memory.clear()
+        conn = self._conn()
+        if conn is not None:
+            with conn:
+                conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters plus the current memory tier size."""
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._counters)
+            stats["memory_items"] = len(self._memory)
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_ratio"] = round(hits / lookups, 3) if lookups else 0.0
+        return stats
+
+
+_CACHES: Dict[str, ResponseCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_cache(namespace: str, **options: Any) -> ResponseCache:
+    """Return the process‑wide cache for ``namespace`` (created on first use)."""
+    with _CACHES_LOCK:
+        cache = _CACHES.get(namespace)
+        if cache is None:
+            cache = ResponseCache(namespace, **options)
+            _CACHES[namespace] = cache
+        return cache
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Counters for every cache namespace created in this process."""
+    with _CACHES_LOCK:
+        caches = list(_CACHES.values())
+    return {cache.namespace: cache.stats() for cache in caches}
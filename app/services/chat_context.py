@@ -0,0 +1,215 @@
+"""
+Bounded, incremental prompt context for the follow‑up doctor chat.
+
+Re‑rendering the whole conversation every turn makes prompt building and
+LLM input grow linearly per turn (quadratically over a session) and long
+sessions eventually overflow the model context. :class:`ChatContext`
+keeps the prompt within a token budget instead:
+
+- the assessment preamble is rendered once and cached; the treatment plan
+  and safety notes are kept verbatim, line breaks included, the other
+  fields are capped;
+- the last ``recent_turns`` exchanges are kept verbatim;
+- older exchanges are folded, one at a time as they age out, into a
+  rolling summary of short extractive lines, itself capped in size;
+- if the turn window still exceeds its budget, more recent exchanges are
+  folded, but never the last one.
+
+The preamble and instructions are budgeted apart from the turn window, so
+a long assessment cannot squeeze the conversation out of the prompt.
+
+Each turn therefore only renders the new exchange, and prompt size stays
+flat however long the consultation runs. Settings come from environment
+variables:
+
+- ``CHAT_CONTEXT_TOKEN_BUDGET`` (default 2000, turn window: summary,
+  recent exchanges and the current question)
+- ``CHAT_CONTEXT_RECENT_TURNS`` (default 6)
+- ``CHAT_CONTEXT_SUMMARY_TOKENS`` (default 500)
+- ``CHAT_CONTEXT_FIELD_TOKENS`` (default 400, cap per other preamble field / message)
+
+Token counts are estimated at four characters per token, which is close
+enough for budgeting without a tokenizer dependency.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Optional, Sequence, Tuple
+
+from app.prompts.doctor_chat_prompt import CHAT_INSTRUCTIONS, build_chat_preamble
+from app.services.config import env_int
+
+CHARS_PER_TOKEN = 4
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+# Assessment fields passed to the preamble unclipped: cutting or reflowing
+# a treatment step or safety warning could change its meaning.
+VERBATIM_FIELDS = frozenset({"treatment", "safety"})
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of ``text`` (ceil of characters / 4)."""
+    return -(-len(text or "") // CHARS_PER_TOKEN)
+
+
+def _clip(text: str, max_tokens: int) -> str:
+    text = " ".join((text or "").split())
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[: max(0, max_chars - 1)].rstrip() + "…"
+
+
+def _first_sentence(text: str, max_tokens: int) -> str:
+    text = " ".join((text or "").split())
+    return _clip(_SENTENCE_END.split(text, 1)[0], max_tokens)
+
+
+class ChatContext:
+    """
+    Prompt builder for one consultation.
+
+    Call :meth:`build_prompt` with the patient's question, then
+    :meth:`add_turn` once the doctor's reply is complete.
+    """
+
+    def __init__(
+        self,
+        assessment: Dict[str, Any],
+        token_budget: Optional[int] = None,
+        recent_turns: Optional[int] = None,
+        summary_tokens: Optional[int] = None,
+        field_tokens: Optional[int] = None,
+    ) -> None:
+        self.token_budget = (
+            token_budget if token_budget is not None
+            else env_int("CHAT_CONTEXT_TOKEN_BUDGET", 2000)
+        )
+        self.recent_turns = (
+            recent_turns if recent_turns is not None
+            else env_int("CHAT_CONTEXT_RECENT_TURNS", 6)
+        )
+        self.summary_tokens = (
+            summary_tokens if summary_tokens is not None
+            else env_int("CHAT_CONTEXT_SUMMARY_TOKENS", 500)
+        )
+        self.field_tokens = (
+            field_tokens if field_tokens is not None
+            else env_int("CHAT_CONTEXT_FIELD_TOKENS", 400)
+        )
+
+        clipped = {
+            key: (
+                _clip(value, self.field_tokens)
+                if isinstance(value, str) and key not in VERBATIM_FIELDS
+                else value
+            )
+            for key, value in (assessment or {}).items()
+        }
+        self.preamble = build_chat_preamble(clipped)
+
+        # (rendered exchange, tokens), oldest first.
+        self._recent: Deque[Tuple[str, int]] = deque()
+        self._recent_tokens = 0
+        self._summary: Deque[Tuple[str, int]] = deque()
+        self._summary_line_tokens = 0
+        self._summary_text: Optional[str] = ""
+        self.turns = 0
+        self.folded = 0
+        self.dropped = 0
+
+    @classmethod
+    def from_history(
+        cls, assessment: Dict[str, Any], chat_history: Iterable[Sequence[str]], **kwargs: Any
+    ) -> "ChatContext":
+        """Rebuild a context from ``[patient, doctor]`` chatbot rows (greeting skipped)."""
+        context = cls(assessment, **kwargs)
+        for row in chat_history:
+            patient, doctor = (list(row) + ["", ""])[:2]
+            if patient:
+                context.add_turn(patient, doctor or "")
+        return context
+
+    # -- conversation -------------------------------------------------------
+
+    def add_turn(self, patient: str, doctor: str) -> None:
+        """Record a completed exchange; ages older ones into the summary."""
+        rendered = (
+            f"Patient: {_clip(patient, self.field_tokens)}\n"
+            f"Doctor: {_clip(doctor, self.field_tokens)}"
+        )
+        tokens = estimate_tokens(rendered) + 1
+        self._recent.append((rendered, tokens))
+        self._recent_tokens += tokens
+        self.turns += 1
+        while len(self._recent) > self.recent_turns:
+            self._fold_oldest()
+
+    def _fold_oldest(self) -> None:
+        rendered, tokens = self._recent.popleft()
+        self._recent_tokens -= tokens
+
+        patient, _, doctor = rendered.partition("\nDoctor: ")
+        line = (
+            f"- Patient asked: {_first_sentence(patient[len('Patient: '):], 30)} "
+            f"Doctor: {_first_sentence(doctor, 30)}"
+        )
+        line_tokens = estimate_tokens(line) + 1
+        self._summary.append((line, line_tokens))
+        self._summary_line_tokens += line_tokens
+        while self._summary and self._summary_line_tokens > self.summary_tokens:
+            _, dropped_tokens = self._summary.popleft()
+            self._summary_line_tokens -= dropped_tokens
+            self.dropped += 1
+        self.folded += 1
+        self._summary_text = None
+
+    def summary(self) -> str:
+        """Rolling summary of folded exchanges (cached until the next fold)."""
+        if self._summary_text is None:
+            lines = [line for line, _ in self._summary]
+            if self.dropped:
+                lines.insert(0, f"- ({self.dropped} earlier exchanges omitted)")
+            self._summary_text = "\n".join(lines)
+        return self._summary_text
+
+    # -- prompt ---------------------------------------------------------------
+
+    def build_prompt(self, question: str) -> str:
+        """
+        Full chat prompt for ``question``; the turn window (summary, recent
+        exchanges, question) is kept within the token budget.
+        """
+        question = _clip(question, self.field_tokens)
+        question_tokens = estimate_tokens(question)
+        # Fold verbatim exchanges into the summary until the window fits,
+        # always keeping the last exchange.
+        while len(self._recent) > 1 and (
+            question_tokens + self._recent_tokens + estimate_tokens(self.summary())
+        ) > self.token_budget:
+            self._fold_oldest()
+
+        parts = [self.preamble]
+        summary = self.summary()
+        if summary:
+            parts.append(f"EARLIER IN THIS CONVERSATION (summary):\n{summary}")
+        if self._recent:
+            recent = "\n\n".join(rendered for rendered, _ in self._recent)
+            parts.append(f"PREVIOUS CONVERSATION:\n{recent}")
+        parts.append(f"PATIENT'S CURRENT QUESTION:\n{question}")
+        parts.append(CHAT_INSTRUCTIONS)
+        return "\n\n".join(parts)
+
+    def stats(self) -> Dict[str, int]:
+        """Sizes of the prompt pieces, for logging and benchmarks."""
+        return {
+            "turns": self.turns,
+            "recent_turns": len(self._recent),
+            "folded_turns": self.folded,
+            "dropped_turns": self.dropped,
+            "preamble_tokens": estimate_tokens(self.preamble),
+            "summary_tokens": estimate_tokens(self.summary()),
+            "recent_tokens": self._recent_tokens,
+        }
@@ -0,0 +1,250 @@
+"""
+Process‑wide registry of pooled Groq clients.
+
+Creating ``Groq(api_key=...)`` per call builds a fresh ``httpx`` client and
+so pays TCP/TLS setup on every request. This module hands out one shared,
+thread‑safe client per API key (and per event loop for the async variant)
+backed by a keep‑alive connection pool.
+
+Pool limits come from environment variables and can be changed at runtime
+with :func:`configure_pool`:
+
+- ``GROQ_POOL_MAX_CONNECTIONS`` (default 20)
+- ``GROQ_POOL_MAX_KEEPALIVE`` (default 10)
+- ``GROQ_POOL_KEEPALIVE_EXPIRY`` seconds (default 60)
+
+:func:`get_pool_stats` reports how many requests reused a pooled connection
+versus opened a new one.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import weakref
+from typing import Any, Dict, Optional, Set
+
+from app.services.config import env_number
+
+try:
+    # Optional – the app can run without Groq installed.
+    import httpx  # type: ignore
+    from groq import AsyncGroq, Groq  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    httpx = None
+    AsyncGroq = None
+    Groq = None
+
+
+_NEW_CONNECTION_EVENTS = ("connect_tcp.started", "connect_unix_socket.started")
+
+
+_POOL_SETTINGS: Dict[str, float] = {
+    "max_connections": env_number("GROQ_POOL_MAX_CONNECTIONS", 20),
+    "max_keepalive_connections": env_number("GROQ_POOL_MAX_KEEPALIVE", 10),
+    "keepalive_expiry": env_number("GROQ_POOL_KEEPALIVE_EXPIRY", 60.0),
+}
+
+_LOCK = threading.Lock()
+_SYNC_CLIENTS: Dict[str, Any] = {}
+# Async httpx clients are bound to the loop they were first used on.
+_ASYNC_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Any]]" = (
+    weakref.WeakKeyDictionary()
+)
+# Close tasks scheduled on a running loop, kept referenced until they finish.
+_CLOSING: "Set[asyncio.Task]" = set()
+_STATS: Dict[str, int] = {"requests": 0, "new_connections": 0, "reused_connections": 0}
+
+
+def _record_request(opened_connection: bool) -> None:
+    with _LOCK:
+        _STATS["requests"] += 1
+        if opened_connection:
+            _STATS["new_connections"] += 1
+        else:
+            _STATS["reused_connections"] += 1
+
+
+def _limits() -> Any:
+    return httpx.Limits(
+        max_connections=int(_POOL_SETTINGS["max_connections"]) or None,
+        max_keepalive_connections=int(_POOL_SETTINGS["max_keepalive_connections"]),
+        keepalive_expiry=_POOL_SETTINGS["keepalive_expiry"],
+    )
+
+
+if httpx is not None:
+
+    class _CountingTransport(httpx.HTTPTransport):
+        """HTTP transport that records whether each request opened a connection."""
+
+        def handle_request(self, request: Any) -> Any:
+            opened = []
+            previous = request.extensions.get("trace")
+
+            def _trace(event_name: str, info: Dict[str, Any]) -> None:
+                if event_name.endswith(_NEW_CONNECTION_EVENTS):
+                    opened.append(True)
+                if previous is not None:
+                    previous(event_name, info)
+
+            request.extensions["trace"] = _trace
+            try:
+                return super().handle_request(request)
+            finally:
+                _record_request(bool(opened))
+
+    class _AsyncCountingTransport(httpx.AsyncHTTPTransport):
+        """Async twin of ``_CountingTransport``."""
+
+        async def handle_async_request(self, request: Any) -> Any:
+            opened = []
+            previous = request.extensions.get("trace")
+
+            async def _trace(event_name: str, info: Dict[str, Any]) -> None:
+                if event_name.endswith(_NEW_CONNECTION_EVENTS):
+                    opened.append(True)
+                if previous is not None:
+                    await previous(event_name, info)
+
+            request.extensions["trace"] = _trace
+            try:
+                return await super().handle_async_request(request)
+            finally:
+                _record_request(bool(opened))
+
+
+def _require_groq(api_key: Optional[str]) -> str:
+    if Groq is None or httpx is None:
+        raise ValueError("Groq library is not installed")
+    api_key = api_key or os.environ.get("GROQ_API_KEY")
+    if not api_key:
+        raise ValueError("GROQ_API_KEY must be set")
+    return api_key
+
+
+def get_groq_client(api_key: Optional[str] = None) -> Any:
+    """Return the shared, pooled ``Groq`` client for ``api_key``."""
+    api_key = _require_groq(api_key)
+    with _LOCK:
+        client = _SYNC_CLIENTS.get(api_key)
+        if client is None:
+            limits = _limits()
+            http_client = httpx.Client(
+                transport=_CountingTransport(limits=limits), limits=limits
+            )
+            client = Groq(api_key=api_key, http_client=http_client)
+            _SYNC_CLIENTS[api_key] = client
+    return client
+
+
+def get_async_groq_client(api_key: Optional[str] = None) -> Any:
+    """
+    Return the shared, pooled ``AsyncGroq`` client for ``api_key``.
+
+    Must be called from a running event loop; each loop gets its own pool.
+    """
+    api_key = _require_groq(api_key)
+    loop = asyncio.get_running_loop()
+    with _LOCK:
+        clients = _ASYNC_CLIENTS.setdefault(loop, {})
+        client = clients.get(api_key)
+        if client is None:
+            limits = _limits()
+            http_client = httpx.AsyncClient(
+                transport=_AsyncCountingTransport(limits=limits), limits=limits
+            )
+            client = AsyncGroq(api_key=api_key, http_client=http_client)
+            clients[api_key] = client
+    return client
+
+
+def configure_pool(
+    max_connections: Optional[int] = None,
+    max_keepalive_connections: Optional[int] = None,
+    keepalive_expiry: Optional[float] = None,
+) -> Dict[str, float]:
+    """
+    Update pool limits. Existing clients are closed so the next call picks
+    up the new limits; returns the effective settings.
+    """
+    with _LOCK:
+        if max_connections is not None:
+            _POOL_SETTINGS["max_connections"] = max(0, max_connections)
+        if max_keepalive_connections is not None:
+            _POOL_SETTINGS["max_keepalive_connections"] = max(0, max_keepalive_connections)
+        if keepalive_expiry is not None:
+            _POOL_SETTINGS["keepalive_expiry"] = max(0.0, keepalive_expiry)
+    close_clients()
+    return dict(_POOL_SETTINGS)
+
+
+def _close_async_client(loop: asyncio.AbstractEventLoop, client: Any) -> None:
+    """Close an ``AsyncGroq`` client on the loop it belongs to."""
+    if loop.is_closed():
+        return
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if loop is running:
+        task = loop.create_task(client.close())
+        _CLOSING.add(task)
+        task.add_done_callback(_CLOSING.discard)
+    elif loop.is_running():
+        asyncio.run_coroutine_threadsafe(client.close(), loop)
+    elif running is None:
+        loop.run_until_complete(client.close())
+    else:
+        # An idle loop cannot be driven from inside another running loop.
+        threading.Thread(
+            target=loop.run_until_complete, args=(client.close(),), daemon=True
+        ).start()
+
+
+def close_clients() -> None:
+    """
+    Close and forget every pooled client. Async clients are closed on their
+    own loop: scheduled if it is running, run to completion if it is idle.
+    """
+    with _LOCK:
+        clients = list(_SYNC_CLIENTS.values())
+        _SYNC_CLIENTS.clear()
+        async_clients = [
+            (loop, client)
+            for loop, by_key in _ASYNC_CLIENTS.items()
+            for client in by_key.values()
+        ]
+        _ASYNC_CLIENTS.clear()
+    for client in clients:
+        try:
+            client.close()
+        except Exception:
+            pass
+    for loop, client in async_clients:
+        try:
+            _close_async_client(loop, client)
+        except Exception:
+            pass
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """
+    Connection reuse metrics across all pooled clients.
+
+    Returns:
+        {
+          "requests": int,
+          "new_connections": int,
+          "reused_connections": int,
+          "reuse_ratio": float,   # reused / requests
+          "pool": {...},          # effective limits
+        }
+    """
+    with _LOCK:
+        stats: Dict[str, Any] = dict(_STATS)
+        stats["pool"] = dict(_POOL_SETTINGS)
+    requests = stats["requests"]
+    stats["reuse_ratio"] = round(stats["reused_connections"] / requests, 3) if requests else 0.0
+    return stats
@@ -3,20 +3,184 @@ Confidence and triage decision service.
 
 This keeps the policy very simple and data‑driven with environment
 variables for thresholds, while remaining fully deterministic.
+
+The thresholds are read once into an immutable :class:`TriagePolicy`;
+call :func:`reload_triage_policy` after changing ``FUSION_CONFIDENCE_LOW`` /
+``FUSION_CONFIDENCE_HIGH`` (or pass an explicit policy) to swap it at
+runtime. ``TriagePolicy.decide_arrays`` / ``compute_action_batch`` apply the
+same policy to whole NumPy columns for analytics and offline re‑scoring.
 """
 
 from __future__ import annotations
 
-import os
-from typing import Any, Dict, Optional
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from app.services.config import env_number
+
+try:
+    # Optional – only the batch API uses NumPy; it falls back to a loop.
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+
 
+ACTION_ROUTINE = "self_care_and_routine_followup"
+ACTION_MONITOR = "monitor_closely_and_seek_care_if_worse"
+ACTION_REVIEW = "recommend_in_person_review"
 
-def _get_threshold(name: str, default: float) -> float:
+
+def float_array(values: Sequence[Any]) -> Any:
+    """
+    Column of numbers as a float64 array; ``None`` and non‑numeric entries
+    become NaN. Requires NumPy.
+    """
     try:
-        value = float(os.getenv(name, default))
+        return np.asarray(values, dtype=float)
     except (TypeError, ValueError):
-        value = default
-    return max(0.0, min(1.0, value))
+        out = np.full(len(values), np.nan)
+        for i, value in enumerate(values):
+            try:
+                out[i] = float(value)
+            except (TypeError, ValueError):
+                pass
+        return out
+
+
+def round_array(values: Any, ndigits: int = 2) -> Any:
+    """
+    ``np.round`` that agrees element‑wise with Python's ``round``.
+
+    ``np.round`` rounds ``values * 10**ndigits`` and so disagrees with the
+    correctly rounded ``round`` where that product lands within float error
+    of a half (e.g. ``0.385`` -> 0.39 vs. ``round`` -> 0.38). Only those
+    near‑tie elements are re‑rounded in Python. Requires NumPy.
+    """
+    values = np.asarray(values, dtype=float)
+    out = np.round(values, ndigits)
+    scaled = values * 10.0 ** ndigits
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for i in np.flatnonzero(near_tie):
+        out.flat[i] = round(float(values.flat[i]), ndigits)
+    return out
+
+
+@dataclass(frozen=True)
+class TriagePolicy:
+    """
+    Thresholds mapping the averaged confidence to a triage action.
+
+    ``final >= high`` (and no conflict) -> routine follow‑up,
+    ``final >= low`` -> monitor closely, otherwise in‑person review.
+    """
+
+    low: float = 0.55
+    high: float = 0.8
+
+    @classmethod
+    def from_env(cls) -> "TriagePolicy":
+        return cls(
+            low=env_number("FUSION_CONFIDENCE_LOW", cls.low, 0.0, 1.0),
+            high=env_number("FUSION_CONFIDENCE_HIGH", cls.high, 0.0, 1.0),
+        )
+
+    @staticmethod
+    def _norm(conf: Optional[float], default: float) -> float:
+        # Normalise sub‑confidences if they look like percentages.
+        if conf is None:
+            return default
+        try:
+            value = float(conf)
+        except (TypeError, ValueError):
+            return default
+        if value > 1.0:
+            value = value / 100.0
+        return max(0.0, min(1.0, value))
+
+    def action_for(self, final_conf: float, conflict_flag: bool = False) -> str:
+        if final_conf >= self.high and not conflict_flag:
+            return ACTION_ROUTINE
+        if final_conf >= self.low:
+            return ACTION_MONITOR
+        return ACTION_REVIEW
+
+    def decide(
+        self,
+        fusion_conf: float,
+        image_conf: Optional[float],
+        transcript_conf: Optional[float],
+        conflict_flag: bool = False,
+    ) -> Dict[str, Any]:
+        """Scalar decision; see :func:`compute_action`."""
+        img_c = self._norm(image_conf, fusion_conf)
+        txt_c = self._norm(transcript_conf, fusion_conf)
+
+        # Simple aggregation: average all available signals.
+        final_conf = (fusion_conf + img_c + txt_c) / 3.0
+        return {
+            "final_confidence": round(final_conf, 2),
+            "triage_action": self.action_for(final_conf, conflict_flag),
+        }
+
+    def decide_arrays(
+        self,
+        fusion_confs: Any,
+        image_confs: Any,
+        transcript_confs: Any,
+        conflict_flags: Optional[Any] = None,
+    ) -> Tuple[Any, Any]:
+        """
+        Vectorised :meth:`decide` over float arrays (NaN = missing
+        sub‑confidence). Returns ``(final_confidence, triage_action)`` arrays.
+
+        The final confidence is rounded with :func:`round_array`, so it
+        matches :meth:`decide` even on ties such as 0.385 and a re‑score does
+        not rewrite stored confidences.
+        """
+        fusion = np.asarray(fusion_confs, dtype=float)
+
+        def _norm(values: Any) -> Any:
+            v = np.asarray(values, dtype=float)
+            v = np.clip(np.where(v > 1.0, v / 100.0, v), 0.0, 1.0)
+            # Missing sub‑confidences fall back to the fusion confidence.
+            return np.where(np.isnan(v), fusion, v)
+
+        final_conf = (fusion + _norm(image_confs) + _norm(transcript_confs)) / 3.0
+        conflict = (
+            np.zeros(fusion.shape, dtype=bool)
+            if conflict_flags is None
+            else np.asarray(conflict_flags, dtype=bool)
+        )
+        triage_action = np.select(
+            [(final_conf >= self.high) & ~conflict, final_conf >= self.low],
+            [ACTION_ROUTINE, ACTION_MONITOR],
+            default=ACTION_REVIEW,
+        )
+        return round_array(final_conf, 2), triage_action
+
+
+_POLICY_LOCK = threading.Lock()
+_POLICY: Optional[TriagePolicy] = None
+
+
+def get_triage_policy() -> TriagePolicy:
+    """The active policy, read from the environment on first use."""
+    policy = _POLICY
+    if policy is None:
+        policy = reload_triage_policy()
+    return policy
+
+
+def reload_triage_policy(policy: Optional[TriagePolicy] = None) -> TriagePolicy:
+    """
+    Install ``policy`` or, by default, re‑read the thresholds from the
+    environment. Calls in flight keep the policy they started with.
+    """
+    global _POLICY
+    with _POLICY_LOCK:
+        _POLICY = policy or TriagePolicy.from_env()
+        return _POLICY
 
 
 def compute_action(
@@ -35,38 +199,41 @@ def compute_action(
           "triage_action": str,
         }
     """
-    low_th = _get_threshold("FUSION_CONFIDENCE_LOW", 0.55)
-    high_th = _get_threshold("FUSION_CONFIDENCE_HIGH", 0.8)
+    return get_triage_policy().decide(fusion_conf, image_conf, transcript_conf, conflict_flag)
 
-    # Normalise sub‑confidences if they look like percentages.
-    def _norm(c: Optional[float]) -> float:
-        if c is None:
-            return fusion_conf
-        try:
-            v = float(c)
-        except (TypeError, ValueError):
-            return fusion_conf
-        if v > 1.0:
-            v = v / 100.0
-        return max(0.0, min(1.0, v))
-
-    img_c = _norm(image_conf)
-    txt_c = _norm(transcript_conf)
 
-    # Simple aggregation: average all available signals.
-    signals = [fusion_conf, img_c, txt_c]
-    final_conf = sum(signals) / len(signals)
-
-    if final_conf >= high_th and not conflict_flag:
-        triage_action = "self_care_and_routine_followup"
-    elif final_conf >= low_th:
-        triage_action = "monitor_closely_and_seek_care_if_worse"
-    else:
-        triage_action = "recommend_in_person_review"
-
-    return {
-        "final_confidence": round(final_conf, 2),
-        "triage_action": triage_action,
-    }
+def compute_action_batch(
+    fusion_confs: Sequence[float],
+    image_confs: Sequence[Optional[float]],
+    transcript_confs: Sequence[Optional[float]],
+    conflict_flags: Optional[Sequence[bool]] = None,
+) -> Dict[str, Any]:
+    """
+    Columnar :func:`compute_action` (same policy, applied to whole arrays).
 
+    Returns:
+        {
+          "final_confidence": array[float],  # rounded to 2 places
+          "triage_action": array[str],
+        }
+    (plain lists when NumPy is not installed).
+    """
+    policy = get_triage_policy()
+    if np is None:
+        flags = conflict_flags if conflict_flags is not None else [False] * len(fusion_confs)
+        results = [
+            policy.decide(f, i, t, bool(c))
+            for f, i, t, c in zip(fusion_confs, image_confs, transcript_confs, flags)
+        ]
+        return {
+            "final_confidence": [r["final_confidence"] for r in results],
+            "triage_action": [r["triage_action"] for r in results],
+        }
 
+    final_conf, triage_action = policy.decide_arrays(
+        float_array(fusion_confs),
+        float_array(image_confs),
+        float_array(transcript_confs),
+        conflict_flags,
+    )
+    return {"final_confidence": final_conf, "triage_action": triage_action}
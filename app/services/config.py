@@ -0,0 +1,49 @@
+"""
+Tolerant numeric settings from the environment.
+
+Most settings are read once at import time, so a typo in one variable must
+not stop a module (and with it the app) from importing. A missing or empty
+value gives the default; a malformed or non‑finite one gives the default
+with a warning. The result is clamped to ``[minimum, maximum]``.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+from typing import Optional
+
+
+def env_number(
+    name: str,
+    default: float,
+    minimum: Optional[float] = 0.0,
+    maximum: Optional[float] = None,
+) -> float:
+    """Float setting ``name``, clamped to ``[minimum, maximum]`` (``None`` = open)."""
+    value = float(default)
+    raw = os.getenv(name, "").strip()
+    if raw:
+        try:
+            parsed = float(raw)
+        except ValueError:
+            parsed = math.nan
+        if math.isfinite(parsed):
+            value = parsed
+        else:
+            print(f"Warning: ignoring invalid {name}={raw!r}; using {default}")
+    if minimum is not None:
+        value = max(minimum, value)
+    if maximum is not None:
+        value = min(maximum, value)
+    return value
+
+
+def env_int(
+    name: str,
+    default: int,
+    minimum: Optional[int] = 0,
+    maximum: Optional[int] = None,
+) -> int:
+    """Integer setting ``name`` ("2.0" is accepted), clamped like :func:`env_number`."""
+    return int(env_number(name, default, minimum, maximum))
@@ -0,0 +1,154 @@
+"""
+Knowledge base behind the offline fallback plan.
+
+Conditions, safety notes and reasoning notes live in
+``data/fallback_conditions.json`` (override with ``FALLBACK_KB_PATH``), so
+clinicians can add or reword a condition without touching Python. The file
+is parsed and validated once; every rule becomes an immutable object with
+its response text prebuilt, and rules are indexed by priority so selecting
+a plan is a handful of set comparisons.
+
+Rules reference the labels of ``finding_keywords.json`` (findings and
+cues). A rule applies when all labels of any of its ``when`` clauses were
+matched; an empty ``when`` always applies and serves as the default.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Tuple
+
+DEFAULT_KB_PATH = Path(__file__).parent / "data" / "fallback_conditions.json"
+
+
+@dataclass(frozen=True)
+class Rule:
+    """When a knowledge‑base entry applies, and how it ranks."""
+
+    name: str
+    priority: int
+    clauses: Tuple[FrozenSet[str], ...]
+
+    def applies(self, labels: FrozenSet[str]) -> bool:
+        return not self.clauses or any(clause <= labels for clause in self.clauses)
+
+
+@dataclass(frozen=True)
+class Condition:
+    """Prebuilt offline diagnosis / treatment for one condition."""
+
+    rule: Rule
+    preliminary_diagnosis: str
+    recommended_treatment: str
+    medicine_constituents: Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class Note:
+    """A safety or reasoning text guarded by a rule."""
+
+    rule: Rule
+    text: str
+
+
+def _text(value: Any) -> str:
+    """Texts may be a string or a list of lines."""
+    if isinstance(value, list):
+        return "\n".join(str(line) for line in value)
+    return str(value or "")
+
+
+def _rule(entry: Dict[str, Any], index: int, known_labels: Optional[FrozenSet[str]]) -> Rule:
+    name = str(entry.get("name") or f"rule_{index}")
+    clauses = tuple(frozenset(clause) for clause in entry.get("when") or [])
+    if known_labels is not None:
+        unknown = sorted(set().union(*clauses) - known_labels) if clauses else []
+        if unknown:
+            raise ValueError(f"Fallback rule {name!r} uses unknown labels: {unknown}")
+    return Rule(name=name, priority=int(entry.get("priority", index)), clauses=clauses)
+
+
+def _by_priority(items: Iterable[Any]) -> Tuple[Any, ...]:
+    # sorted() is stable, so equal priorities keep file order.
+    return tuple(sorted(items, key=lambda item: item.rule.priority))
+
+
+class FallbackKnowledgeBase:
+    """Validated, priority‑ordered conditions and notes."""
+
+    def __init__(
+        self, data: Dict[str, Any], known_labels: Optional[Iterable[str]] = None
+    ) -> None:
+        known = frozenset(known_labels) if known_labels is not None else None
+
+        self.conditions: Tuple[Condition, ...] = _by_priority(
+            Condition(
+                rule=_rule(entry, i, known),
+                preliminary_diagnosis=_text(entry.get("preliminary_diagnosis")),
+                recommended_treatment=_text(entry.get("recommended_treatment")),
+                medicine_constituents=tuple(entry.get("medicine_constituents") or ()),
+            )
+            for i, entry in enumerate(data.get("conditions") or [])
+        )
+        self.safety_notes: Tuple[Note, ...] = _by_priority(
+            Note(rule=_rule(entry, i, known), text=_text(entry.get("text")))
+            for i, entry in enumerate(data.get("safety_notes") or [])
+        )
+        self.reasoning_notes: Tuple[Note, ...] = _by_priority(
+            Note(rule=_rule(entry, i, known), text=_text(entry.get("text")))
+            for i, entry in enumerate(data.get("reasoning_notes") or [])
+        )
+        self.reasoning_default = _text(data.get("reasoning_default"))
+
+        for kind, entries in (("condition", self.conditions), ("safety note", self.safety_notes)):
+            if not any(not entry.rule.clauses for entry in entries):
+                raise ValueError(f"Fallback knowledge base needs a default {kind} (empty 'when')")
+
+    def condition_for(self, labels: FrozenSet[str]) -> Condition:
+        """Highest‑priority condition whose rule applies."""
+        for condition in self.conditions:
+            if condition.rule.applies(labels):
+                return condition
+        raise LookupError("no default condition")  # unreachable after validation
+
+    def safety_notes_for(self, labels: FrozenSet[str]) -> str:
+        for note in self.safety_notes:
+            if note.rule.applies(labels):
+                return note.text
+        raise LookupError("no default safety note")  # unreachable after validation
+
+    def reasoning_for(self, labels: FrozenSet[str]) -> str:
+        """All applicable reasoning notes, or the default sentence."""
+        bits = [note.text for note in self.reasoning_notes if note.rule.applies(labels)]
+        return " ".join(bits) if bits else self.reasoning_default
+
+
+_LOCK = threading.Lock()
+_KBS: Dict[str, FallbackKnowledgeBase] = {}
+
+
+def get_fallback_kb(
+    path: Optional[str] = None, known_labels: Optional[Iterable[str]] = None
+) -> FallbackKnowledgeBase:
+    """Load and validate the knowledge base once per path (thread‑safe)."""
+    path = str(path or os.getenv("FALLBACK_KB_PATH") or DEFAULT_KB_PATH)
+    kb = _KBS.get(path)
+    if kb is not None:
+        return kb
+    with _LOCK:
+        kb = _KBS.get(path)
+        if kb is None:
+            with open(path, "r", encoding="utf-8") as f:
+                kb = FallbackKnowledgeBase(json.load(f), known_labels)
+            _KBS[path] = kb
+    return kb
+
+
+def reload_fallback_kb() -> None:
+    """Forget loaded knowledge bases so the next call re‑reads the file."""
+    with _LOCK:
+        _KBS.clear()
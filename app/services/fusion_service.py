@@ -8,16 +8,51 @@ Light‑weight multimodal fusion for:
 - optional history summary
 
 LLM calls are entirely optional: pass an object with ``generate(prompt: str)``
-to enable them, otherwise this module falls back to deterministic heuristics
-so the app can run fully offline.
+(sync for ``fuse``, sync or async for ``fuse_async``) to enable them,
+otherwise this module falls back to deterministic heuristics so the app can
+run fully offline.
+
+``fuse_batch`` runs the offline path over whole columns for re‑scoring
+stored visits: keyword extraction is spread across worker processes and
+knowledge‑base lookups are shared between rows with the same findings.
+
+Successful LLM responses can optionally be cached (``FUSION_CACHE_ENABLED=1``
+or ``use_cache=True``), keyed by a fingerprint of the rendered prompt, model
+and temperature. Fallback or failed results are never cached.
 """
 
 from __future__ import annotations
 
+import asyncio
+import copy
+import inspect
 import json
-from typing import Any, Dict, Optional
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple
 
 from app.prompts.medical_agent_prompt import build_medical_agent_prompt
+from app.services.cache_service import content_key, get_cache
+from app.services.confidence_service import float_array, round_array
+from app.services.config import env_int, env_number
+from app.services.fallback_kb import get_fallback_kb
+from app.services.keyword_matcher import get_findings_matcher
+
+try:
+    # Optional – fuse_batch normalises confidences with NumPy when available.
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+
+
+FUSION_CACHE_ENABLED = os.getenv("FUSION_CACHE_ENABLED", "0").lower() in ("1", "true", "yes")
+
+_FUSION_CACHE = get_cache(
+    "fusion",
+    ttl_seconds=env_number("FUSION_CACHE_TTL", 24 * 3600),
+    max_memory_items=env_int("FUSION_CACHE_MEMORY_ITEMS", 256),
+    max_disk_entries=env_int("FUSION_CACHE_MAX_ENTRIES", 5000),
+)
 
 
 def _normalise_conf(conf: Optional[float]) -> float:
@@ -34,31 +69,65 @@ def _normalise_conf(conf: Optional[float]) -> float:
     return max(0.0, min(1.0, value / 100.0))
 
 
+def _normalise_conf_array(confs: Sequence[Optional[float]]) -> Any:
+    """
+    Vectorised :func:`_normalise_conf`. Cells that do not parse to a number
+    (NaN after conversion) are rare and go through the scalar function,
+    which tells ``None`` / junk (0.5) apart from a literal NaN.
+    """
+    values = float_array(confs)
+    out = np.clip(np.where(values <= 1.0, values, values / 100.0), 0.0, 1.0)
+    for i in np.flatnonzero(np.isnan(values)):
+        out[i] = _normalise_conf(confs[i])
+    return out
+
+
 def _extract_simple_findings(text: str) -> Dict[str, bool]:
     """
     Extremely simple keyword‑based "fact extraction".
 
     This is deterministic and intentionally conservative – it just helps
-    drive a reasonable offline heuristic when no LLM is configured.
+    drive a reasonable offline heuristic when no LLM is configured. Keywords
+    come from ``data/finding_keywords.json`` and are matched as whole words
+    in a single pass (see ``keyword_matcher``).
     """
-    text_lower = (text or "").lower()
-    findings = {
-        "acne": any(k in text_lower for k in ["acne", "pimple", "pimples", "zit"]),
-        "rash": "rash" in text_lower,
-        "redness": "red" in text_lower or "inflamed" in text_lower,
-        "itch": "itch" in text_lower or "itchy" in text_lower,
-        "pain": "pain" in text_lower or "tender" in text_lower,
-        "fever": "fever" in text_lower,
-        "trauma": any(k in text_lower for k in ["injury", "trauma", "hit", "fall"]),
-        "chronic": any(k in text_lower for k in ["months", "years", "chronic"]),
-        "blister": any(k in text_lower for k in ["blister", "fluid-filled", "friction"]),
-        "wart": any(k in text_lower for k in ["wart", "verruca", "plantar wart"]),
-        "callus": any(k in text_lower for k in ["callus", "thickened skin", "corn"]),
-        "foot": any(k in text_lower for k in ["foot", "plantar", "sole", "heel", "toe"]),
-    }
+    findings, _ = get_findings_matcher().match(text)
     return findings
 
 
+def _findings_and_labels(image_summary: str, transcript: str) -> Tuple[Dict[str, bool], FrozenSet[str]]:
+    """One keyword scan: ``simple_findings`` plus every matched label."""
+    combined_text = " ".join(filter(None, [image_summary, transcript]))
+    return get_findings_matcher().match(combined_text)
+
+
+def _fusion_confidence(img_conf: float, txt_conf: float) -> float:
+    return round((img_conf + txt_conf) / 2.0, 2)
+
+
+def _fallback_field(key: str, labels: FrozenSet[str], history_summary: Optional[str]) -> Any:
+    """Build a single text field of the fallback plan from the knowledge base."""
+    kb = get_fallback_kb(known_labels=get_findings_matcher().labels)
+    if key == "reasoning":
+        history_summary = history_summary or "No significant prior history recorded."
+        return f"{kb.reasoning_for(labels)} Previous history: {history_summary}"
+    if key == "safety_notes":
+        return kb.safety_notes_for(labels)
+    condition = kb.condition_for(labels)
+    if key == "medicine_constituents":
+        return list(condition.medicine_constituents)
+    return getattr(condition, key)
+
+
+_FALLBACK_TEXT_FIELDS = (
+    "preliminary_diagnosis",
+    "reasoning",
+    "recommended_treatment",
+    "medicine_constituents",
+    "safety_notes",
+)
+
+
 def _fallback_plan(
     image_summary: str,
     transcript: str,
@@ -66,202 +135,108 @@ def _fallback_plan(
     img_conf: float,
     txt_conf: float,
 ) -> Dict[str, Any]:
-    """Deterministic, very conservative offline diagnosis + plan."""
-    combined_text = " ".join(filter(None, [image_summary, transcript]))
-    findings = _extract_simple_findings(combined_text)
+    """
+    Deterministic, very conservative offline diagnosis + plan.
 
-    # Check for foot lesions (blisters, warts, calluses)
-    if findings["blister"] or (findings["foot"] and ("blister" in combined_text.lower() or "fluid" in combined_text.lower())):
-        preliminary_diagnosis = (
-            "Friction blister on the plantar aspect of the foot (intact or torn)."
-        )
-        recommended_treatment = (
-            "LIKELY CONDITION:\n"
-            "Friction blister on plantar surface\n\n"
-            "CARE INSTRUCTIONS:\n"
-            "1. Avoid popping the blister unless it is very large or painful. Intact blisters heal faster and protect underlying skin.\n"
-            "2. If draining is necessary (large, painful blister), use sterile technique: clean area, sterilize needle with alcohol, make small puncture at edge, gently press fluid out, apply petroleum jelly and sterile bandage.\n"
-            "3. Apply Petroleum Jelly (Vaseline) as an occlusive barrier to promote healing. Evidence shows Vaseline heals blisters better than antibiotics in most cases with no allergy risk.\n"
-            "4. If blister is open/drained, optionally apply Bacitracin (500 units/g) ointment to prevent infection, then cover with sterile non-stick bandage.\n"
-            "5. Consider hydrocolloid blister plaster/dressing (contains Carboxymethylcellulose) to protect and speed healing.\n"
-            "6. Use donut-shaped moleskin or padding around (not on) the blister to reduce pressure.\n"
-            "7. Wear well-cushioned, properly fitting shoes to avoid recurrence.\n"
-            "8. For pain, take Ibuprofen (400mg) or Paracetamol (500-1000mg) as needed (optional)."
-        )
-        medicine_constituents = [
-            "Petroleum Jelly - Occlusive barrier for healing",
-            "Bacitracin (500 units/g) - Ointment (optional if blister is drained)",
-            "Hydrocolloid Dressing Components (Carboxymethylcellulose) - Blister protection",
-            "Ibuprofen (400mg) - Pain relief (optional)"
-        ]
-    elif findings["wart"] or (findings["foot"] and ("wart" in combined_text.lower() or "verruca" in combined_text.lower() or "black dots" in combined_text.lower())):
-        preliminary_diagnosis = (
-            "Plantar wart (verruca) on the foot, characterized by rough surface and possible black dots (thrombosed capillaries)."
-        )
-        recommended_treatment = (
-            "LIKELY CONDITION:\n"
-            "Plantar wart (verruca)\n\n"
-            "CARE INSTRUCTIONS:\n"
-            "1. Apply Salicylic Acid (15-40%) topical solution/gel daily to the wart, covering surrounding healthy skin with petroleum jelly.\n"
-            "2. Soak foot in warm water for 10-15 minutes before application to soften the wart.\n"
-            "3. Gently file away dead skin with pumice stone or emery board after soaking.\n"
-            "4. Consider duct tape occlusion therapy as adjunct: cover wart with duct tape, remove weekly, soak and file, repeat.\n"
-            "5. Avoid picking or cutting the wart to prevent spread.\n"
-            "6. Wear clean socks and avoid walking barefoot in public areas.\n"
-            "7. Treatment typically takes 4-12 weeks. If no improvement, consider cryotherapy or professional removal."
-        )
-        medicine_constituents = [
-            "Salicylic Acid (15-40%) - Topical solution/gel",
-            "Petroleum Jelly - Protective barrier",
-            "Duct tape - Occlusion therapy (adjunct)"
-        ]
-    elif findings["callus"] or (findings["foot"] and ("callus" in combined_text.lower() or "thickened" in combined_text.lower())):
-        preliminary_diagnosis = (
-            "Callus or corn on the foot, characterized by thickened, hardened skin."
-        )
-        recommended_treatment = (
-            "LIKELY CONDITION:\n"
-            "Callus or corn on plantar surface\n\n"
-            "CARE INSTRUCTIONS:\n"
-            "1. Soak foot in warm water for 10-15 minutes to soften thickened skin.\n"
-            "2. Gently file away dead skin with pumice stone or emery board after soaking.\n"
-            "3. Apply Urea (20-40%) cream daily to soften and moisturize.\n"
-            "4. Use Salicylic Acid (10-20%) topical solution if needed for persistent calluses.\n"
-            "5. Apply petroleum jelly and wear clean socks to keep area moisturized.\n"
-            "6. Use donut padding or moleskin to reduce pressure on the affected area.\n"
-            "7. Wear properly fitting, well-cushioned shoes to prevent recurrence."
-        )
-        medicine_constituents = [
-            "Urea (20-40%) - Cream (for softening)",
-            "Salicylic Acid (10-20%) - Topical solution",
-            "Petroleum Jelly - Moisturizing barrier"
-        ]
-    elif findings["acne"] or "acne" in (image_summary or "").lower():
-        preliminary_diagnosis = (
-            "Acne‑like inflammatory spots on the skin, likely mild to moderate acne vulgaris."
-        )
-        recommended_treatment = (
-            "Step 1: Cleanse twice daily with a gentle non‑comedogenic cleanser containing salicylic acid (2%). "
-            "Step 2: Apply benzoyl peroxide (2.5-5%) gel or cream once daily in the evening, starting with lower concentration. "
-            "Step 3: Alternatively or in combination, apply adapalene (0.1%) cream at night. "
-            "Step 4: Use a non‑comedogenic moisturizer and broad‑spectrum sunscreen (SPF 30+) during the day. "
-            "Step 5: Avoid picking, squeezing, or excessive scrubbing. Treatment typically shows improvement in 4-8 weeks. "
-            "If no improvement after 8-12 weeks, consider adding topical clindamycin or consulting a dermatologist."
-        )
-        medicine_constituents = [
-            "Benzoyl Peroxide (2.5-5%) - Gel/Cream",
-            "Adapalene (0.1%) - Cream/Gel",
-            "Salicylic Acid (2%) - Cleanser/Toner",
-            "Clindamycin (1%) - Topical Solution (if needed)",
-            "Niacinamide (4-5%) - Serum (supportive)",
-            "Azelaic Acid (15-20%) - Cream (alternative)"
-        ]
-    elif findings["rash"]:
-        preliminary_diagnosis = (
-            "A localized skin rash that may represent irritant dermatitis, allergic contact dermatitis, or atopic dermatitis."
-        )
-        recommended_treatment = (
-            "Step 1: Identify and avoid the suspected irritant or allergen immediately. "
-            "Step 2: Gently cleanse the area with lukewarm water and a mild, fragrance-free cleanser. "
-            "Step 3: Apply a thin layer of hydrocortisone (1%) cream or ointment twice daily for 5-7 days maximum. "
-            "Step 4: Use fragrance-free emollients/moisturizers (containing ceramides or colloidal oatmeal) 2-3 times daily. "
-            "Step 5: Apply cool compresses if itching is severe. Take oral antihistamines (cetirizine or loratadine) if needed for itching. "
-            "Step 6: Monitor for signs of infection (increasing redness, pus, warmth). If rash worsens or persists beyond 2 weeks, seek medical evaluation."
-        )
-        medicine_constituents = [
-            "Hydrocortisone (1%) - Cream/Ointment",
-            "Cetirizine (10mg) - Tablet (for itching)",
-            "Loratadine (10mg) - Tablet (alternative antihistamine)",
-            "Ceramides - Moisturizer",
-            "Colloidal Oatmeal - Soothing cream",
-            "Dimethicone - Barrier cream"
-        ]
-    else:
-        preliminary_diagnosis = (
-            "A minor‑appearing skin change that is likely benign but requires careful monitoring and evaluation."
-        )
-        recommended_treatment = (
-            "Step 1: Maintain gentle skincare routine with mild, fragrance-free products. "
-            "Step 2: Apply a basic emollient moisturizer twice daily to keep skin hydrated. "
-            "Step 3: Avoid harsh soaps, exfoliants, or new skincare products. "
-            "Step 4: Protect the area from sun exposure with SPF 30+ sunscreen. "
-            "Step 5: Monitor closely for changes in: size, shape, color, texture, pain, itching, or bleeding. "
-            "Step 6: Document with photos weekly. Seek in‑person dermatological evaluation if: lesion grows rapidly, changes color significantly, becomes painful, bleeds, or if you have concerns. "
-            "If unchanged after 4-6 weeks, consider professional evaluation for definitive diagnosis."
-        )
-        medicine_constituents = [
-            "Ceramides - Moisturizer",
-            "Glycerin - Hydrating cream",
-            "Dimethicone - Barrier protection",
-            "Zinc Oxide (SPF 30+) - Sunscreen",
-            "Gentle cleansers (pH balanced, fragrance-free)"
-        ]
+    The condition, safety notes and reasoning come from the fallback
+    knowledge base (``data/fallback_conditions.json``, see ``fallback_kb``).
+    """
+    findings, labels = _findings_and_labels(image_summary, transcript)
+    result: Dict[str, Any] = {
+        key: _fallback_field(key, labels, history_summary) for key in _FALLBACK_TEXT_FIELDS
+    }
+    result["fusion_confidence"] = _fusion_confidence(img_conf, txt_conf)
+    result["llm_raw_output"] = None
+    result["simple_findings"] = findings
+    result["fusion_source"] = "fallback"
+    return result
 
-    # Set safety notes based on condition type
-    if findings["blister"] or (findings["foot"] and "blister" in combined_text.lower()):
-        safety_notes = (
-            "WARNING SIGNS — SEEK CARE IF:\n"
-            "- Redness spreads beyond the lesion\n"
-            "- Pus develops\n"
-            "- Severe pain increases\n"
-            "- Fever occurs\n"
-            "- You have diabetes and wound healing is slow\n\n"
-            "SPECIAL PRECAUTIONS:\n"
-            "- Avoid Neomycin if you have allergies (use Petroleum Jelly instead)\n"
-            "- If diabetic, monitor closely for slow healing or signs of infection\n"
-            "- Keep area clean and dry, change bandages daily"
-        )
-    elif findings["wart"] or (findings["foot"] and "wart" in combined_text.lower()):
-        safety_notes = (
-            "WARNING SIGNS — SEEK CARE IF:\n"
-            "- Wart spreads or multiplies rapidly\n"
-            "- Severe pain or bleeding occurs\n"
-            "- Signs of infection (redness, pus, warmth)\n"
-            "- Wart does not improve after 12 weeks of treatment\n\n"
-            "SPECIAL PRECAUTIONS:\n"
-            "- Avoid picking or cutting wart to prevent spread\n"
-            "- Do not share towels or footwear\n"
-            "- If diabetic or immunocompromised, seek professional care"
-        )
-    else:
-        safety_notes = (
-            "WARNING SIGNS — SEEK CARE IF:\n"
-            "- Rapidly spreading redness\n"
-            "- Severe pain\n"
-            "- High fever\n"
-            "- Signs of systemic infection\n"
-            "- Difficulty breathing or facial swelling\n\n"
-            "SPECIAL PRECAUTIONS:\n"
-            "- Monitor for changes in size, color, or symptoms\n"
-            "- Seek in-person evaluation if condition worsens or persists"
+
+def _fallback_with_raw(
+    raw_output: Any,
+    image_summary: str,
+    transcript: str,
+    history_summary: Optional[str],
+    img_conf: float,
+    txt_conf: float,
+) -> Dict[str, Any]:
+    result = _fallback_plan(
+        image_summary=image_summary,
+        transcript=transcript,
+        history_summary=history_summary,
+        img_conf=img_conf,
+        txt_conf=txt_conf,
+    )
+    result["llm_raw_output"] = raw_output
+    return result
+
+
+def _prompt_fingerprint(prompt: str, llm_client: Any) -> str:
+    """Fingerprint of everything that determines the LLM response."""
+    model = getattr(llm_client, "model", None) or type(llm_client).__name__
+    temperature = getattr(llm_client, "temperature", None)
+    return content_key(prompt, str(model), repr(temperature))
+
+
+def get_fusion_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters of the fusion response cache."""
+    return _FUSION_CACHE.stats()
+
+
+def _parse_llm_output(raw_output: Any) -> Optional[Dict[str, Any]]:
+    """Parse raw LLM output into a JSON object, or ``None`` if it is unusable."""
+    try:
+        if isinstance(raw_output, dict):
+            parsed = raw_output
+        else:
+            # Try to parse JSON
+            parsed = json.loads(str(raw_output))
+        if not isinstance(parsed, dict):
+            raise json.JSONDecodeError("expected a JSON object", str(raw_output), 0)
+    except json.JSONDecodeError as e:
+        # JSON parsing failed - log and fall back
+        print(f"Warning: LLM response was not valid JSON. Error: {e}")
+        print(f"Raw output preview: {str(raw_output)[:200]}...")
+        return None
+    except Exception as e:
+        print(f"Warning: LLM generation failed: {e}")
+        return None
+    return parsed
+
+
+def _merge_llm_result(
+    parsed: Dict[str, Any],
+    raw_output: Any,
+    image_summary: str,
+    transcript: str,
+    history_summary: Optional[str],
+    img_conf: float,
+    txt_conf: float,
+) -> Dict[str, Any]:
+    """
+    Fill any keys the LLM left empty from the fallback plan.
+
+    Fallback fields are built lazily, only for keys that are actually
+    missing; ``simple_findings`` and ``fusion_confidence`` take the cheap
+    path (one keyword scan, one average) rather than a full fallback plan.
+    """
+    findings, labels = _findings_and_labels(image_summary, transcript)
+
+    result: Dict[str, Any] = {}
+    for key in _FALLBACK_TEXT_FIELDS:
+        value = parsed.get(key)
+        result[key] = (
+            value if value not in (None, "") else _fallback_field(key, labels, history_summary)
         )
+    result["fusion_confidence"] = _fusion_confidence(img_conf, txt_conf)
+    result["llm_raw_output"] = raw_output
+    result["simple_findings"] = findings
+    result["fusion_source"] = "llm"
+    return result
 
-    reasoning_bits = []
-    if findings["acne"]:
-        reasoning_bits.append("The description suggests acne‑type spots.")
-    if findings["rash"]:
-        reasoning_bits.append("There is mention of a rash.")
-    if findings["redness"]:
-        reasoning_bits.append("Redness or inflammation is described.")
-    if not reasoning_bits:
-        reasoning_bits.append("Findings sound mild and localized without strong red‑flag keywords.")
-
-    reasoning = " ".join(reasoning_bits)
-    history_summary = history_summary or "No significant prior history recorded."
-    reasoning += f" Previous history: {history_summary}"
-
-    fusion_confidence = round((img_conf + txt_conf) / 2.0, 2)
-
-    return {
-        "preliminary_diagnosis": preliminary_diagnosis,
-        "reasoning": reasoning,
-        "recommended_treatment": recommended_treatment,
-        "medicine_constituents": medicine_constituents,
-        "safety_notes": safety_notes,
-        "fusion_confidence": fusion_confidence,
-        "llm_raw_output": None,
-        "simple_findings": findings,
-    }
+
+def _cache_enabled(use_cache: Optional[bool]) -> bool:
+    return FUSION_CACHE_ENABLED if use_cache is None else use_cache
 
 
 def fuse(
@@ -271,10 +246,13 @@ def fuse(
     transcript_conf: Optional[float],
     history_summary: Optional[str] = None,
     llm_client: Optional[Any] = None,
+    use_cache: Optional[bool] = None,
 ) -> Dict[str, Any]:
     """
     Fuse image + transcript (+ history) into a structured assessment.
 
+    ``use_cache`` overrides ``FUSION_CACHE_ENABLED`` for this call.
+
     Returns a dict with at least these keys:
     - preliminary_diagnosis
     - reasoning
@@ -283,6 +261,7 @@ def fuse(
     - safety_notes
     - fusion_confidence
     - llm_raw_output
+    - fusion_source ("llm" or "fallback")
     """
     img_conf_n = _normalise_conf(image_conf)
     txt_conf_n = _normalise_conf(transcript_conf)
@@ -303,65 +282,199 @@ def fuse(
         history_summary=history_summary,
     )
 
-    raw_output: Optional[str] = None
-    parsed: Dict[str, Any]
+    cache_key = _prompt_fingerprint(prompt, llm_client) if _cache_enabled(use_cache) else None
+    cached = _FUSION_CACHE.get(cache_key) if cache_key else None
+    if cached is not None:
+        # Copy so callers mutating the result cannot corrupt the memory tier.
+        cached = copy.deepcopy(cached)
+        return _merge_llm_result(
+            cached["parsed"], cached["raw"],
+            image_summary, transcript, history_summary, img_conf_n, txt_conf_n,
+        )
 
     try:
         raw_output = llm_client.generate(prompt)
-        if isinstance(raw_output, dict):
-            parsed = raw_output
-        else:
-            # Try to parse JSON
-            parsed = json.loads(str(raw_output))
-    except json.JSONDecodeError as e:
-        # JSON parsing failed - log and fall back
-        print(f"Warning: LLM response was not valid JSON. Error: {e}")
-        print(f"Raw output preview: {str(raw_output)[:200]}...")
-        result = _fallback_plan(
-            image_summary=image_summary,
-            transcript=transcript,
-            history_summary=history_summary,
-            img_conf=img_conf_n,
-            txt_conf=txt_conf_n,
-        )
-        result["llm_raw_output"] = raw_output
-        return result
     except Exception as e:
-        # Any other problem with the LLM should gracefully fall back.
+        # Any problem with the LLM should gracefully fall back.
         print(f"Warning: LLM generation failed: {e}")
-        result = _fallback_plan(
+        return _fallback_with_raw(
+            None, image_summary, transcript, history_summary, img_conf_n, txt_conf_n
+        )
+
+    parsed = _parse_llm_output(raw_output)
+    if parsed is None:
+        return _fallback_with_raw(
+            raw_output, image_summary, transcript, history_summary, img_conf_n, txt_conf_n
+        )
+    if cache_key:
+        _FUSION_CACHE.set(cache_key, {"parsed": parsed, "raw": raw_output})
+
+    return _merge_llm_result(
+        parsed, raw_output, image_summary, transcript, history_summary, img_conf_n, txt_conf_n
+    )
+
+
+async def fuse_async(
+    image_summary: str,
+    image_conf: Optional[float],
+    transcript: str,
+    transcript_conf: Optional[float],
+    history_summary: Optional[str] = None,
+    llm_client: Optional[Any] = None,
+    use_cache: Optional[bool] = None,
+) -> Dict[str, Any]:
+    """
+    Async counterpart of :func:`fuse` with an identical result shape.
+
+    ``llm_client.generate`` may be a coroutine function (e.g.
+    ``AsyncGroqLLMClient``); a blocking client is run in a worker thread so
+    the event loop is never stalled.
+    """
+    img_conf_n = _normalise_conf(image_conf)
+    txt_conf_n = _normalise_conf(transcript_conf)
+
+    if llm_client is None:
+        return _fallback_plan(
             image_summary=image_summary,
             transcript=transcript,
             history_summary=history_summary,
             img_conf=img_conf_n,
             txt_conf=txt_conf_n,
         )
-        result["llm_raw_output"] = raw_output if 'raw_output' in locals() else None
-        return result
 
-    # Basic validation and fallback defaults for missing keys.
-    fallback = _fallback_plan(
+    prompt = build_medical_agent_prompt(
         image_summary=image_summary,
         transcript=transcript,
         history_summary=history_summary,
-        img_conf=img_conf_n,
-        txt_conf=txt_conf_n,
     )
 
-    def _get(key: str, default_key: str) -> Any:
-        value = parsed.get(key)
-        return value if value not in (None, "") else fallback[default_key]
+    cache_key = _prompt_fingerprint(prompt, llm_client) if _cache_enabled(use_cache) else None
+    cached = await asyncio.to_thread(_FUSION_CACHE.get, cache_key) if cache_key else None
+    if cached is not None:
+        # Copy so callers mutating the result cannot corrupt the memory tier.
+        cached = copy.deepcopy(cached)
+        return _merge_llm_result(
+            cached["parsed"], cached["raw"],
+            image_summary, transcript, history_summary, img_conf_n, txt_conf_n,
+        )
 
-    result: Dict[str, Any] = {
-        "preliminary_diagnosis": _get("preliminary_diagnosis", "preliminary_diagnosis"),
-        "reasoning": _get("reasoning", "reasoning"),
-        "recommended_treatment": _get("recommended_treatment", "recommended_treatment"),
-        "medicine_constituents": _get("medicine_constituents", "medicine_constituents"),
-        "safety_notes": _get("safety_notes", "safety_notes"),
-        "fusion_confidence": fallback["fusion_confidence"],
-        "llm_raw_output": raw_output,
-        "simple_findings": fallback["simple_findings"],
-    }
-    return result
+    try:
+        if inspect.iscoroutinefunction(llm_client.generate):
+            raw_output = await llm_client.generate(prompt)
+        else:
+            raw_output = await asyncio.to_thread(llm_client.generate, prompt)
+    except Exception as e:
+        print(f"Warning: LLM generation failed: {e}")
+        return _fallback_with_raw(
+            None, image_summary, transcript, history_summary, img_conf_n, txt_conf_n
+        )
 
+    parsed = _parse_llm_output(raw_output)
+    if parsed is None:
+        return _fallback_with_raw(
+            raw_output, image_summary, transcript, history_summary, img_conf_n, txt_conf_n
+        )
+    if cache_key:
+        await asyncio.to_thread(_FUSION_CACHE.set, cache_key, {"parsed": parsed, "raw": raw_output})
 
+    return _merge_llm_result(
+        parsed, raw_output, image_summary, transcript, history_summary, img_conf_n, txt_conf_n
+    )
+
+
+# --- Batch (offline) fusion ----------------------------------------------------
+
+# Below this many rows a process pool costs more than it saves.
+BATCH_PARALLEL_MIN_ROWS = env_int("FUSION_BATCH_PARALLEL_MIN_ROWS", 2000)
+
+
+def _scan_labels(texts: List[str]) -> List[Tuple[str, ...]]:
+    """Keyword labels per text; module level so worker processes can run it."""
+    matcher = get_findings_matcher().matcher
+    return [tuple(matcher.labels_in(text)) for text in texts]
+
+
+def _scan_all(
+    texts: List[str], executor: Optional[Executor], processes: int, chunk_size: int
+) -> List[FrozenSet[str]]:
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    if executor is None and (processes <= 1 or len(texts) < BATCH_PARALLEL_MIN_ROWS):
+        scanned = [_scan_labels(chunk) for chunk in chunks]
+    elif executor is not None:
+        scanned = list(executor.map(_scan_labels, chunks))
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            scanned = list(pool.map(_scan_labels, chunks))
+    return [frozenset(labels) for chunk in scanned for labels in chunk]
+
+
+def fuse_batch(
+    image_summaries: Sequence[str],
+    image_confs: Sequence[Optional[float]],
+    transcripts: Sequence[str],
+    transcript_confs: Sequence[Optional[float]],
+    history_summaries: Optional[Sequence[Optional[str]]] = None,
+    executor: Optional[Executor] = None,
+    processes: Optional[int] = None,
+    chunk_size: int = 1000,
+) -> List[Dict[str, Any]]:
+    """
+    Offline :func:`fuse` over columns of inputs; element ``i`` of the
+    result equals ``fuse(image_summaries[i], ...)`` without an LLM.
+
+    Keyword extraction runs in ``executor`` (e.g. a shared
+    ``ProcessPoolExecutor``) or, for large batches, a temporary pool of
+    ``processes`` workers (default: CPU count). Confidences are normalised
+    and rounded as whole NumPy columns (:func:`round_array` keeps ties equal
+    to :func:`fuse`; a scalar loop is used without NumPy); knowledge‑base
+    lookups are shared between rows with the same findings.
+    """
+    n = len(image_summaries)
+    if not (len(image_confs) == len(transcripts) == len(transcript_confs) == n):
+        raise ValueError("fuse_batch columns must all have the same length")
+    histories = history_summaries if history_summaries is not None else [None] * n
+    processes = (os.cpu_count() or 1) if processes is None else processes
+
+    if np is None:
+        fusion_confs = [
+            _fusion_confidence(_normalise_conf(i), _normalise_conf(t))
+            for i, t in zip(image_confs, transcript_confs)
+        ]
+    else:
+        mean = (_normalise_conf_array(image_confs) + _normalise_conf_array(transcript_confs)) / 2.0
+        fusion_confs = round_array(mean, 2).tolist()
+
+    texts = [" ".join(filter(None, pair)) for pair in zip(image_summaries, transcripts)]
+    all_labels = _scan_all(texts, executor, processes, max(1, chunk_size))
+
+    matcher = get_findings_matcher()
+    kb = get_fallback_kb(known_labels=matcher.labels)
+    templates: Dict[FrozenSet[str], Tuple[Any, str, str, Dict[str, bool]]] = {}
+    results = []
+    for labels, history, fusion_conf in zip(all_labels, histories, fusion_confs):
+        template = templates.get(labels)
+        if template is None:
+            findings = {label: label in labels for label in matcher.finding_labels}
+            template = (
+                kb.condition_for(labels),
+                kb.safety_notes_for(labels),
+                kb.reasoning_for(labels),
+                findings,
+            )
+            templates[labels] = template
+        condition, safety_notes, reasoning, findings = template
+        history = history or "No significant prior history recorded."
+        results.append(
+            {
+                "preliminary_diagnosis": condition.preliminary_diagnosis,
+                "reasoning": f"{reasoning} Previous history: {history}",
+                "recommended_treatment": condition.recommended_treatment,
+                "medicine_constituents": list(condition.medicine_constituents),
+                "safety_notes": safety_notes,
+                "fusion_confidence": fusion_conf,
+                "llm_raw_output": None,
+                "simple_findings": dict(findings),
+                "fusion_source": "fallback",
+            }
+        )
+    return results
@@ -1,26 +1,86 @@
 """
-SQLite history helper for patient visits.
+SQLite persistence layer for patient visits.
 
-This module is intentionally tiny and synchronous. It stores the raw fusion
-result (including any raw LLM output) for basic auditing and can return a
-one‑line summary of prior visits for prompt conditioning.
+Every visit is stored with its fusion result (including any raw LLM output)
+for auditing, plus diagnosis, triage and confidence columns so summaries
+and batch jobs never decode the payload. On top of that store the module
+provides a one‑line history summary for prompt conditioning, keyset
+pagination over a patient's visits (``list_visits``), full‑text search
+(``search_visits``, SQLite FTS5), an optional background write‑behind
+writer, payload compaction and a cold archive table, bulk read / update
+and export / import batches, and async wrappers for event‑loop callers.
+
+Each thread keeps one long‑lived connection (WAL journal, busy timeout,
+tuned pragmas) and the schema is migrated once per process, so concurrent
+Gradio workers neither reopen the DB nor serialise on file locks. Schema
+changes are versioned migrations (see ``_MIGRATIONS``).
+
+The fusion result is stored zlib‑compressed; ``compact_visits`` and
+``archive_raw_outputs`` shrink older rows (see ``app/history_cli.py``).
+Batch jobs such as re‑scoring read and rewrite visits with
+``read_visit_batch`` / ``update_visits``; bulk export / import moves whole
+visits with ``read_export_batch`` / ``import_visit_batch``.
+
+Visits can optionally be persisted write‑behind with group commit (see
+``enable_write_behind``).
+
+``save_visit_async`` / ``get_history_summary_async`` run the same queries in
+a worker thread so async callers never block the event loop on SQLite.
 """
 
 from __future__ import annotations
 
+import asyncio
+import atexit
 import json
 import os
+import queue
+import re
 import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.services.config import env_int, env_number
 
 
 DB_PATH = Path(os.getenv("PATIENT_HISTORY_DB", "patient_history.db"))
 
+# How long a writer waits for a competing lock before raising "database is
+# locked". WAL lets readers proceed while a write is in progress.
+BUSY_TIMEOUT_MS = env_int("PATIENT_HISTORY_BUSY_TIMEOUT_MS", 5000)
 
-def _get_conn() -> sqlite3.Connection:
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
+# zlib level (0-9) for the fusion result / archived raw LLM output payloads.
+COMPRESSION_LEVEL = env_int("PATIENT_HISTORY_COMPRESSION_LEVEL", 6, maximum=9)
+
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}",
+    "PRAGMA synchronous=NORMAL",  # durable with WAL, far fewer fsyncs
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",  # ~8 MB page cache per connection
+)
+
+_local = threading.local()
+_schema_lock = threading.Lock()
+_initialised_paths: set = set()
+_open_connections: List[sqlite3.Connection] = []
+# Bumped by close_connections() so other threads drop their closed handles.
+_generation = 0
+
+
+# --- Schema migrations -----------------------------------------------------
+#
+# The schema version lives in ``PRAGMA user_version``. Each migration runs
+# once, in order, inside its own transaction; existing databases (including
+# the checked-in ``patient_history.db``, which is at version 0) are upgraded
+# in place on first connection. Append new migrations, never edit old ones.
+
+
+def _migration_1_create_visits(conn: sqlite3.Connection) -> None:
     conn.execute(
         """
         CREATE TABLE IF NOT EXISTS visits (
@@ -33,33 +93,583 @@ def _get_conn() -> sqlite3.Connection:
         )
         """
     )
+
+
+def _migration_2_patient_index(conn: sqlite3.Connection) -> None:
+    # Serves ``WHERE patient_id = ? ORDER BY id DESC LIMIT n`` straight from
+    # the index instead of scanning the table.
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_visits_patient_id ON visits (patient_id, id)"
+    )
+
+
+def _migration_3_visited_at(conn: sqlite3.Connection) -> None:
+    # ``timestamp`` is free-form TEXT; ``visited_at`` is UTC epoch seconds so
+    # time-range filters compare integers and can use an index.
+    conn.execute("ALTER TABLE visits ADD COLUMN visited_at INTEGER")
+    conn.execute(
+        "UPDATE visits SET visited_at = CAST(strftime('%s', timestamp) AS INTEGER)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_visits_patient_time "
+        "ON visits (patient_id, visited_at)"
+    )
+
+
+def _migration_4_summary_columns(conn: sqlite3.Connection) -> None:
+    # Narrow columns so summaries / listings never decode the JSON blob.
+    for column, sql_type in (
+        ("diagnosis", "TEXT"),
+        ("triage_action", "TEXT"),
+        ("final_confidence", "REAL"),
+        ("fusion_confidence", "REAL"),
+    ):
+        conn.execute(f"ALTER TABLE visits ADD COLUMN {column} {sql_type}")
+
+    # Backfill in batches; triage / final confidence were never stored for
+    # old visits and stay NULL.
+    cur = conn.execute("SELECT id, fusion_result_json FROM visits")
+    while True:
+        rows = cur.fetchmany(1000)
+        if not rows:
+            break
+        updates = []
+        for visit_id, fusion_json in rows:
+            try:
+                data = json.loads(fusion_json or "{}")
+            except json.JSONDecodeError:
+                data = {}
+            if not isinstance(data, dict):
+                data = {}
+            updates.append(
+                (data.get("preliminary_diagnosis"), data.get("fusion_confidence"), visit_id)
+            )
+        conn.executemany(
+            "UPDATE visits SET diagnosis = ?, fusion_confidence = ? WHERE id = ?", updates
+        )
+
+
+def _migration_5_compressed_payload(conn: sqlite3.Connection) -> None:
+    # New rows store the fusion result zlib-compressed in fusion_result_z
+    # (fusion_result_json stays NULL); legacy rows keep plain JSON until
+    # compact_visits() rewrites them. Raw LLM output of old visits can be
+    # moved to the cold visits_archive table by archive_raw_outputs().
+    conn.execute("ALTER TABLE visits ADD COLUMN fusion_result_z BLOB")
+    conn.execute("ALTER TABLE visits ADD COLUMN raw_archived INTEGER NOT NULL DEFAULT 0")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS visits_archive (
+            visit_id INTEGER PRIMARY KEY,
+            archived_at INTEGER NOT NULL,
+            llm_raw_output_z BLOB
+        )
+        """
+    )
+
+
+_SEARCH_INDEX_TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS visits_fts_ai AFTER INSERT ON visits BEGIN
+        INSERT INTO visits_fts (rowid, transcript, image_summary, diagnosis)
+        VALUES (new.id, new.transcript, new.image_summary, new.diagnosis);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS visits_fts_ad AFTER DELETE ON visits BEGIN
+        INSERT INTO visits_fts (visits_fts, rowid, transcript, image_summary, diagnosis)
+        VALUES ('delete', old.id, old.transcript, old.image_summary, old.diagnosis);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS visits_fts_au
+    AFTER UPDATE OF transcript, image_summary, diagnosis ON visits BEGIN
+        INSERT INTO visits_fts (visits_fts, rowid, transcript, image_summary, diagnosis)
+        VALUES ('delete', old.id, old.transcript, old.image_summary, old.diagnosis);
+        INSERT INTO visits_fts (rowid, transcript, image_summary, diagnosis)
+        VALUES (new.id, new.transcript, new.image_summary, new.diagnosis);
+    END
+    """,
+)
+
+
+def _migration_6_search_index(conn: sqlite3.Connection) -> None:
+    # External-content FTS5 index over the searchable text, kept in sync by
+    # triggers so save_visit / imports update it incrementally. Builds
+    # without FTS5 skip this; search_visits() then falls back to LIKE.
+    try:
+        conn.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS visits_fts USING fts5(
+                transcript, image_summary, diagnosis,
+                content='visits', content_rowid='id',
+                tokenize='porter unicode61'
+            )
+            """
+        )
+    except sqlite3.OperationalError as e:
+        print(f"Warning: SQLite FTS5 unavailable ({e}); visit search will use LIKE.")
+        return
+    # One execute() per statement: executescript() would COMMIT the
+    # migration transaction and break its atomicity with user_version.
+    for trigger in _SEARCH_INDEX_TRIGGERS:
+        conn.execute(trigger)
+    conn.execute("INSERT INTO visits_fts (visits_fts) VALUES ('rebuild')")
+
+
+def _fusion_source_of(raw_output: Any) -> str:
+    # A stored raw output that parses as a JSON object was used as the LLM
+    # answer; anything else (no output, unparsable output) hit the fallback.
+    if raw_output is None:
+        return "fallback"
+    if isinstance(raw_output, dict):
+        return "llm"
+    try:
+        return "llm" if isinstance(json.loads(str(raw_output)), dict) else "fallback"
+    except json.JSONDecodeError:
+        return "fallback"
+
+
+def _migration_7_rescore_columns(conn: sqlite3.Connection) -> None:
+    # Inputs needed to re-run fusion / triage offline (NULL for old visits,
+    # which were never stored with sub-confidences) and whether the stored
+    # diagnosis came from the LLM or the deterministic fallback.
+    for column, sql_type in (
+        ("image_conf", "REAL"),
+        ("transcript_conf", "REAL"),
+        ("fusion_source", "TEXT"),
+    ):
+        conn.execute(f"ALTER TABLE visits ADD COLUMN {column} {sql_type}")
+
+    cur = conn.execute(
+        """
+        SELECT v.id, v.fusion_result_json, v.fusion_result_z, a.llm_raw_output_z
+        FROM visits v LEFT JOIN visits_archive a ON a.visit_id = v.id
+        """
+    )
+    while True:
+        rows = cur.fetchmany(1000)
+        if not rows:
+            break
+        updates = []
+        for visit_id, fusion_json, fusion_z, archived_z in rows:
+            raw_output = _decode_fusion_result(fusion_json, fusion_z).get("llm_raw_output")
+            if raw_output is None and archived_z is not None:
+                raw_output = json.loads(zlib.decompress(archived_z).decode("utf-8"))
+            updates.append((_fusion_source_of(raw_output), visit_id))
+        conn.executemany("UPDATE visits SET fusion_source = ? WHERE id = ?", updates)
+
+
+_MIGRATIONS = (
+    (1, _migration_1_create_visits),
+    (2, _migration_2_patient_index),
+    (3, _migration_3_visited_at),
+    (4, _migration_4_summary_columns),
+    (5, _migration_5_compressed_payload),
+    (6, _migration_6_search_index),
+    (7, _migration_7_rescore_columns),
+)
+
+SCHEMA_VERSION = _MIGRATIONS[-1][0]
+
+
+def _migrate(conn: sqlite3.Connection) -> int:
+    """Apply pending migrations and return the resulting schema version."""
+    current = conn.execute("PRAGMA user_version").fetchone()[0]
+    for version, migration in _MIGRATIONS:
+        if version <= current:
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-check under the write lock: another process may have migrated.
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= version:
+                conn.rollback()
+                continue
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        current = version
+    return current
+
+
+def get_schema_version() -> int:
+    """Current schema version of ``DB_PATH`` (migrating it if needed)."""
+    return _get_conn().execute("PRAGMA user_version").fetchone()[0]
+
+
+def _get_conn() -> sqlite3.Connection:
+    """
+    Return this thread's connection to ``DB_PATH``.
+
+    Connections are opened once per thread (and per DB path) and reused;
+    the schema is migrated once per process.
+    """
+    path = str(DB_PATH)
+    if getattr(_local, "generation", None) != _generation:
+        _local.conns = {}
+        _local.generation = _generation
+    conns: Dict[str, sqlite3.Connection] = _local.conns
+    conn = conns.get(path)
+    if conn is not None:
+        return conn
+
+    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    # check_same_thread=False only so close_connections() can close it at
+    # shutdown; each connection is otherwise used by its owning thread.
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000.0, check_same_thread=False)
+    for pragma in _PRAGMAS:
+        conn.execute(pragma)
+
+    with _schema_lock:
+        if path not in _initialised_paths:
+            _migrate(conn)
+            _initialised_paths.add(path)
+        _open_connections.append(conn)
+
+    conns[path] = conn
     return conn
 
 
+def close_connections() -> None:
+    """Close every pooled connection (called automatically at exit)."""
+    global _generation
+    with _schema_lock:
+        conns = list(_open_connections)
+        _open_connections.clear()
+        _initialised_paths.clear()
+        _generation += 1
+    for conn in conns:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+
+atexit.register(close_connections)
+
+
+_INSERT_VISIT_SQL = """
+    INSERT INTO visits (
+        patient_id, timestamp, visited_at, transcript, image_summary,
+        fusion_result_z, diagnosis, triage_action, final_confidence,
+        fusion_confidence, image_conf, transcript_conf, fusion_source
+    )
+    VALUES (
+        :patient_id, :timestamp, CAST(strftime('%s', :timestamp) AS INTEGER),
+        :transcript, :image_summary, :fusion_result_z, :diagnosis,
+        :triage_action, :final_confidence, :fusion_confidence,
+        :image_conf, :transcript_conf, :fusion_source
+    )
+"""
+
+
+def _compress_json(value: Any) -> bytes:
+    return zlib.compress(json.dumps(value).encode("utf-8"), COMPRESSION_LEVEL)
+
+
+def _decode_fusion_result(fusion_json: Optional[str], fusion_z: Optional[bytes]) -> Dict[str, Any]:
+    """Read a fusion result from either the compressed or the legacy column."""
+    try:
+        if fusion_z is not None:
+            data = json.loads(zlib.decompress(fusion_z).decode("utf-8"))
+        else:
+            data = json.loads(fusion_json or "{}")
+    except (zlib.error, UnicodeDecodeError, json.JSONDecodeError):
+        data = {}
+    return data if isinstance(data, dict) else {}
+
+
+def _decode_archived_raw(raw_z: Optional[bytes]) -> Optional[Any]:
+    """Decode a compressed ``visits_archive.llm_raw_output_z`` value."""
+    if raw_z is None:
+        return None
+    return json.loads(zlib.decompress(raw_z).decode("utf-8"))
+
+
+def _visit_row(
+    patient_id: Optional[str],
+    transcript: str,
+    image_summary: str,
+    fusion_result: Optional[Dict[str, Any]],
+    timestamp: str,
+    action_result: Optional[Dict[str, Any]],
+    image_conf: Optional[float] = None,
+    transcript_conf: Optional[float] = None,
+) -> Dict[str, Any]:
+    fusion_result = fusion_result or {}
+    action_result = action_result or {}
+    return {
+        "patient_id": patient_id or "anonymous",
+        "timestamp": timestamp,
+        "transcript": transcript or "",
+        "image_summary": image_summary or "",
+        "fusion_result_z": _compress_json(fusion_result),
+        "diagnosis": fusion_result.get("preliminary_diagnosis"),
+        "triage_action": action_result.get("triage_action"),
+        "final_confidence": action_result.get("final_confidence"),
+        "fusion_confidence": fusion_result.get("fusion_confidence"),
+        "image_conf": _as_float(image_conf),
+        "transcript_conf": _as_float(transcript_conf),
+        "fusion_source": fusion_result.get("fusion_source"),
+    }
+
+
+def _as_float(value: Any) -> Optional[float]:
+    try:
+        return None if value is None else float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+# --- Write-behind persistence -----------------------------------------------
+#
+# With HISTORY_WRITE_BEHIND=1 (or enable_write_behind()) save_visit only
+# enqueues the row; a background thread commits queued visits in batched
+# transactions (one fsync per batch instead of per visit). The queue is
+# bounded, so a stalled disk applies back-pressure instead of growing
+# memory. Rows that are queued but not yet committed are merged into
+# get_history_summary for the same patient (read-your-writes), and the
+# queue is flushed on interpreter exit. The writer's lock only guards the
+# in-memory queue bookkeeping, so producers and readers never wait for a
+# batch's COMMIT/fsync.
+
+WRITE_BEHIND = os.getenv("HISTORY_WRITE_BEHIND", "0").lower() in ("1", "true", "yes")
+WRITE_QUEUE_SIZE = env_int("HISTORY_WRITE_QUEUE_SIZE", 1000, minimum=1)
+WRITE_BATCH_SIZE = env_int("HISTORY_WRITE_BATCH_SIZE", 100, minimum=1)
+WRITE_BATCH_WAIT = env_number("HISTORY_WRITE_BATCH_WAIT", 0.05)
+
+_STOP = object()
+# Key under which the writer tags a queued row with its visits.id once it is
+# inserted (the tag survives un-pending, so a reader holding the row can
+# still recognise its committed copy).
+_VISIT_ID = "_visit_id"
+
+
+class _VisitWriter:
+    """Background group-commit writer for visit rows."""
+
+    def __init__(self, maxsize: int, batch_size: int, batch_wait: float) -> None:
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, maxsize))
+        self._batch_size = max(1, batch_size)
+        self._batch_wait = max(0.0, batch_wait)
+        # Guards _pending, the rows' _VISIT_ID tags and stats; never held
+        # across disk I/O.
+        self._lock = threading.Lock()
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+        self.stats: Dict[str, int] = {"queued": 0, "committed": 0, "batches": 0, "failed": 0}
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, row: Dict[str, Any]) -> None:
+        with self._lock:
+            self._pending.setdefault(row["patient_id"], []).append(row)
+            self.stats["queued"] += 1
+        self._queue.put(row)  # blocks when full (back-pressure)
+
+    def pending_for(self, patient_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._pending.get(patient_id, ()))
+
+    def visit_ids(self, rows: List[Dict[str, Any]]) -> List[Optional[int]]:
+        """Row ids assigned to pending ``rows`` so far (``None`` if not inserted)."""
+        with self._lock:
+            return [row.get(_VISIT_ID) for row in rows]
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+            batch = [item]
+            deadline = time.monotonic() + self._batch_wait
+            stop = False
+            while len(batch) < self._batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    nxt = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is _STOP:
+                    stop = True
+                    break
+                batch.append(nxt)
+            self._commit(batch)
+            for _ in range(len(batch) + int(stop)):
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _commit(self, batch: List[Dict[str, Any]]) -> None:
+        # Ordering matters for readers (see _recent_diagnoses): rows are
+        # tagged with their visits.id *before* COMMIT and un-pended after it,
+        # so a reader that sees a committed row can always match it to its
+        # pending copy. The lock is only held for those bookkeeping steps,
+        # never for the INSERTs or the COMMIT/fsync.
+        for attempt in range(3):
+            conn = None
+            try:
+                conn = _get_conn()
+                ids = [conn.execute(_INSERT_VISIT_SQL, row).lastrowid for row in batch]
+                with self._lock:
+                    for row, visit_id in zip(batch, ids):
+                        row[_VISIT_ID] = visit_id
+                conn.commit()
+                with self._lock:
+                    self._unpend(batch)
+                    self.stats["committed"] += len(batch)
+                    self.stats["batches"] += 1
+                return
+            except sqlite3.Error as e:
+                self._abort(conn, batch)
+                print(f"Warning: history write-behind commit failed (attempt {attempt + 1}): {e}")
+                time.sleep(0.1 * (attempt + 1))
+            except Exception as e:
+                # Not a database hiccup (e.g. a malformed row): retrying cannot
+                # help, and letting it escape would kill the writer thread and
+                # hang flush() forever.
+                self._abort(conn, batch)
+                print(f"Error: history write-behind commit failed: {e!r}")
+                break
+        print(f"Error: dropping {len(batch)} visit(s) after commit failures.")
+        with self._lock:
+            self._unpend(batch)
+            self.stats["failed"] += len(batch)
+
+    def _abort(self, conn: Optional[sqlite3.Connection], batch: List[Dict[str, Any]]) -> None:
+        if conn is not None:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                pass
+        with self._lock:
+            for row in batch:
+                row.pop(_VISIT_ID, None)
+
+    def _unpend(self, batch: List[Dict[str, Any]]) -> None:
+        for row in batch:
+            rows = self._pending.get(row["patient_id"])
+            if rows:
+                rows.remove(row)
+                if not rows:
+                    del self._pending[row["patient_id"]]
+
+    def flush(self) -> None:
+        """Block until every queued visit is committed."""
+        self._queue.join()
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+
+_writer: Optional[_VisitWriter] = None
+_writer_lock = threading.Lock()
+
+
+def enable_write_behind(
+    maxsize: int = WRITE_QUEUE_SIZE,
+    batch_size: int = WRITE_BATCH_SIZE,
+    batch_wait: float = WRITE_BATCH_WAIT,
+) -> None:
+    """Route save_visit through the background batching writer."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = _VisitWriter(maxsize, batch_size, batch_wait)
+            atexit.register(disable_write_behind)
+
+
+def flush_visits() -> None:
+    """Wait until all queued visits are committed (no-op when disabled)."""
+    writer = _writer
+    if writer is not None:
+        writer.flush()
+
+
+def disable_write_behind() -> None:
+    """Flush outstanding visits, stop the writer and go back to direct writes."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.flush()
+        writer.close()
+
+
+def get_write_behind_stats() -> Dict[str, Any]:
+    """Queue / commit counters of the background writer."""
+    writer = _writer
+    if writer is None:
+        return {"enabled": False}
+    with writer._lock:
+        stats: Dict[str, Any] = dict(writer.stats)
+    stats["enabled"] = True
+    stats["queue_depth"] = writer._queue.qsize()
+    return stats
+
+
 def save_visit(
     patient_id: Optional[str],
     transcript: str,
     image_summary: str,
     fusion_result: Dict[str, Any],
     timestamp: str,
+    action_result: Optional[Dict[str, Any]] = None,
+    image_conf: Optional[float] = None,
+    transcript_conf: Optional[float] = None,
 ) -> None:
-    """Persist a single visit including the raw fusion / LLM output."""
+    """
+    Persist a single visit including the raw fusion / LLM output.
+
+    Diagnosis, triage action and confidences (including the image and
+    transcript confidences, so the visit can be re‑scored offline) are also
+    stored in their own columns so summaries can skip the JSON blob. When
+    write-behind is enabled this only enqueues the visit.
+    """
+    row = _visit_row(
+        patient_id, transcript, image_summary, fusion_result, timestamp, action_result,
+        image_conf=image_conf, transcript_conf=transcript_conf,
+    )
+    if WRITE_BEHIND and _writer is None:
+        enable_write_behind()
+    writer = _writer
+    if writer is not None:
+        writer.submit(row)
+        return
+
     conn = _get_conn()
     with conn:
-        conn.execute(
-            """
-            INSERT INTO visits (patient_id, timestamp, transcript, image_summary, fusion_result_json)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (
-                patient_id or "anonymous",
-                timestamp,
-                transcript or "",
-                image_summary or "",
-                json.dumps(fusion_result or {}),
-            ),
-        )
-    conn.close()
+        conn.execute(_INSERT_VISIT_SQL, row)
+
+
+def _recent_diagnoses(patient_id: str, limit: int) -> List[tuple]:
+    conn = _get_conn()
+    query = """
+        SELECT id, diagnosis, timestamp
+        FROM visits
+        WHERE patient_id = ?
+        ORDER BY id DESC
+        LIMIT ?
+    """
+    writer = _writer
+    # Snapshot the queue before querying: a queued row is then either still
+    # pending or already visible to the query, never missed.
+    pending = writer.pending_for(patient_id) if writer is not None else []
+    rows = conn.execute(query, (patient_id, limit)).fetchall()
+    if pending:
+        # A row committed while we were querying shows up twice; the writer
+        # tags rows with their id before COMMIT, so drop the queued copy.
+        seen = {row[0] for row in rows}
+        pending = [
+            row for row, visit_id in zip(pending, writer.visit_ids(pending))
+            if visit_id not in seen
+        ]
+    queued = [(row["diagnosis"], row["timestamp"]) for row in reversed(pending)]
+    return (queued + [(diagnosis, ts) for _, diagnosis, ts in rows])[:limit]
 
 
 def get_history_summary(patient_id: Optional[str]) -> str:
@@ -69,35 +679,644 @@ def get_history_summary(patient_id: Optional[str]) -> str:
     This intentionally keeps formatting simple and bounded so it can be
     safely inserted into prompts.
     """
-    conn = _get_conn()
-    try:
-        cur = conn.execute(
-            """
-            SELECT fusion_result_json, timestamp
-            FROM visits
-            WHERE patient_id = ?
-            ORDER BY id DESC
-            LIMIT 3
-            """,
-            (patient_id or "anonymous",),
-        )
-        rows = cur.fetchall()
-    finally:
-        conn.close()
+    rows = _recent_diagnoses(patient_id or "anonymous", 3)
 
     if not rows:
         return "No significant prior history is recorded for this patient."
 
     diagnoses = []
-    for fusion_json, ts in rows:
-        try:
-            data = json.loads(fusion_json or "{}")
-        except json.JSONDecodeError:
-            data = {}
-        diag = data.get("preliminary_diagnosis") or "unspecified issue"
+    for diagnosis, ts in rows:
+        diag = diagnosis or "unspecified issue"
         diagnoses.append(f"{diag} ({ts})")
 
     summary = "; ".join(diagnoses)
     return f"Previous visits suggest: {summary}"
 
 
+# --- History browsing ------------------------------------------------------
+
+# Columns a caller may request from list_visits(); "fusion_result" is the
+# decoded JSON payload and is only read when asked for.
+VISIT_COLUMNS = (
+    "id",
+    "patient_id",
+    "timestamp",
+    "visited_at",
+    "transcript",
+    "image_summary",
+    "diagnosis",
+    "triage_action",
+    "final_confidence",
+    "fusion_confidence",
+    "image_conf",
+    "transcript_conf",
+    "fusion_source",
+    "fusion_result",
+)
+DEFAULT_VISIT_COLUMNS = (
+    "id",
+    "timestamp",
+    "diagnosis",
+    "triage_action",
+    "final_confidence",
+)
+MAX_PAGE_SIZE = 500
+
+
+def _to_epoch(value: Any) -> int:
+    """Accept epoch seconds or an ISO‑8601 string (naive = UTC, like ``visited_at``)."""
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, datetime):
+        moment = value
+    else:
+        moment = datetime.fromisoformat(str(value))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+
+def list_visits(
+    patient_id: Optional[str],
+    cursor: Optional[int] = None,
+    limit: int = 50,
+    since: Any = None,
+    until: Any = None,
+    columns: Optional[List[str]] = None,
+    newest_first: bool = True,
+) -> Dict[str, Any]:
+    """
+    Page through a patient's visits with keyset pagination.
+
+    ``cursor`` is the ``next_cursor`` of the previous page (a visit id), so
+    every page is a single range scan of ``(patient_id, id)`` and page 1000
+    costs the same as page 1. ``since`` / ``until`` (epoch seconds or ISO
+    strings, inclusive / exclusive) filter on ``visited_at``. Only the
+    requested ``columns`` are read; see ``VISIT_COLUMNS``.
+
+    Visits still queued by the write‑behind writer appear once committed
+    (call :func:`flush_visits` first if that matters).
+
+    Returns:
+        {
+          "visits": [ {column: value, ...}, ... ],
+          "next_cursor": int | None,   # None on the last page
+        }
+    """
+    columns = list(columns or DEFAULT_VISIT_COLUMNS)
+    unknown = [c for c in columns if c not in VISIT_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown visit columns: {', '.join(unknown)}")
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+
+    select = ["id"]
+    for column in columns:
+        if column == "fusion_result":
+            select += ["fusion_result_json", "fusion_result_z"]
+        elif column != "id":
+            select.append(column)
+
+    where = ["patient_id = ?"]
+    params: List[Any] = [patient_id or "anonymous"]
+    if cursor is not None:
+        where.append("id < ?" if newest_first else "id > ?")
+        params.append(int(cursor))
+    if since is not None:
+        where.append("visited_at >= ?")
+        params.append(_to_epoch(since))
+    if until is not None:
+        where.append("visited_at < ?")
+        params.append(_to_epoch(until))
+    params.append(limit + 1)
+
+    query = (
+        f"SELECT {', '.join(select)} FROM visits "
+        f"WHERE {' AND '.join(where)} "
+        f"ORDER BY id {'DESC' if newest_first else 'ASC'} LIMIT ?"
+    )
+    rows = _get_conn().execute(query, params).fetchall()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    visits = []
+    for row in rows:
+        values = dict(zip(select, row))
+        if "fusion_result" in columns:
+            values["fusion_result"] = _decode_fusion_result(
+                values.pop("fusion_result_json"), values.pop("fusion_result_z")
+            )
+        visits.append({column: values[column] for column in columns})
+
+    return {
+        "visits": visits,
+        "next_cursor": rows[-1][0] if has_more else None,
+    }
+
+
+# --- Bulk reads / updates ---------------------------------------------------
+
+# Columns read_visit_batch() / update_visits() accept: the plain columns of
+# VISIT_COLUMNS (the fusion payload is an audit record and is not rewritten).
+_BULK_COLUMNS = tuple(c for c in VISIT_COLUMNS if c not in ("id", "fusion_result"))
+
+
+def _check_bulk_columns(columns: Sequence[str]) -> None:
+    unknown = [c for c in columns if c not in _BULK_COLUMNS]
+    if unknown or not columns:
+        raise ValueError(f"Unknown visit columns: {', '.join(unknown) or '(none)'}")
+
+
+def read_visit_batch(columns: Sequence[str], after_id: int = 0, limit: int = 500) -> List[tuple]:
+    """
+    Read the next ``limit`` visits of every patient with ``id > after_id``,
+    in id order, for batch jobs. Each row is ``(id, *columns)``; resume with
+    the id of the last row. Plain columns only (not ``fusion_result``).
+    """
+    _check_bulk_columns(columns)
+    return _get_conn().execute(
+        f"SELECT id, {', '.join(columns)} FROM visits WHERE id > ? ORDER BY id LIMIT ?",
+        (int(after_id), max(1, int(limit))),
+    ).fetchall()
+
+
+def update_visits(updates: Iterable[Tuple[Sequence[str], Iterable[Sequence[Any]]]]) -> int:
+    """
+    Apply ``(columns, rows)`` updates in one transaction; each row holds the
+    new values of ``columns`` followed by the visit id. Only pass rows that
+    changed: updating ``diagnosis``, ``transcript`` or ``image_summary``
+    also rewrites the search index. Returns the number of rows updated.
+    """
+    statements = []
+    for columns, rows in updates:
+        _check_bulk_columns(columns)
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        statements.append((f"UPDATE visits SET {assignments} WHERE id = ?", rows))
+    conn = _get_conn()
+    updated = 0
+    with conn:
+        for sql, rows in statements:
+            updated += conn.executemany(sql, rows).rowcount
+    return updated
+
+
+# --- Bulk export / import ----------------------------------------------------
+
+# Shape of the records read_export_batch() returns and import_visit_batch()
+# accepts. The last two are decoded JSON values, the rest plain columns.
+EXPORT_COLUMNS = (
+    "id",
+    "patient_id",
+    "timestamp",
+    "visited_at",
+    "transcript",
+    "image_summary",
+    "diagnosis",
+    "triage_action",
+    "final_confidence",
+    "fusion_confidence",
+    "image_conf",
+    "transcript_conf",
+    "fusion_source",
+    "raw_archived",
+    "archived_at",
+    "fusion_result",
+    "archived_raw_output",
+)
+_EXPORT_PLAIN_COLUMNS = EXPORT_COLUMNS[:-2]
+
+# Same as _INSERT_VISIT_SQL, but keeps the source id and skips ids that are
+# already present (idempotent re-imports).
+_INSERT_VISIT_WITH_ID_SQL = """
+    INSERT OR IGNORE INTO visits (
+        id, patient_id, timestamp, visited_at, transcript, image_summary,
+        fusion_result_z, diagnosis, triage_action, final_confidence,
+        fusion_confidence, image_conf, transcript_conf, fusion_source
+    )
+    VALUES (
+        :id, :patient_id, :timestamp, CAST(strftime('%s', :timestamp) AS INTEGER),
+        :transcript, :image_summary, :fusion_result_z, :diagnosis,
+        :triage_action, :final_confidence, :fusion_confidence,
+        :image_conf, :transcript_conf, :fusion_source
+    )
+"""
+
+
+def read_export_batch(
+    after_id: int = 0, limit: int = 1000, patient_id: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Read the next ``limit`` visits with ``id > after_id`` in id order as
+    :data:`EXPORT_COLUMNS` records, with the fusion result and any archived
+    raw LLM output decoded. Resume with the ``id`` of the last record.
+    """
+    where = "v.id > ?"
+    params: List[Any] = [int(after_id)]
+    if patient_id is not None:
+        where += " AND v.patient_id = ?"
+        params.append(patient_id)
+    rows = _get_conn().execute(
+        f"""
+        SELECT v.id, v.patient_id, v.timestamp, v.visited_at, v.transcript,
+               v.image_summary, v.diagnosis, v.triage_action, v.final_confidence,
+               v.fusion_confidence, v.image_conf, v.transcript_conf,
+               v.fusion_source, v.raw_archived, a.archived_at,
+               v.fusion_result_json, v.fusion_result_z, a.llm_raw_output_z
+        FROM visits v LEFT JOIN visits_archive a ON a.visit_id = v.id
+        WHERE {where}
+        ORDER BY v.id
+        LIMIT ?
+        """,
+        (*params, max(1, int(limit))),
+    ).fetchall()
+    records = []
+    for row in rows:
+        record = dict(zip(_EXPORT_PLAIN_COLUMNS, row[:-3]))
+        record["fusion_result"] = _decode_fusion_result(row[-3], row[-2])
+        record["archived_raw_output"] = _decode_archived_raw(row[-1])
+        records.append(record)
+    return records
+
+
+def _import_row(record: Dict[str, Any], keep_ids: bool) -> Dict[str, Any]:
+    fusion_result = record.get("fusion_result")
+    if not isinstance(fusion_result, dict):
+        fusion_result = {}
+    row = _visit_row(
+        record.get("patient_id"),
+        record.get("transcript") or "",
+        record.get("image_summary") or "",
+        fusion_result,
+        record.get("timestamp"),
+        {
+            "triage_action": record.get("triage_action"),
+            "final_confidence": record.get("final_confidence"),
+        },
+        image_conf=record.get("image_conf"),
+        transcript_conf=record.get("transcript_conf"),
+    )
+    for column in ("diagnosis", "fusion_confidence", "fusion_source"):
+        if record.get(column) is not None:
+            row[column] = record[column]
+    if keep_ids:
+        row["id"] = record.get("id")
+    return row
+
+
+def _restore_archive(conn: sqlite3.Connection, visit_id: int, record: Dict[str, Any]) -> None:
+    """Re‑create the ``visits_archive`` row and ``raw_archived`` flag of an imported visit."""
+    conn.execute("UPDATE visits SET raw_archived = 1 WHERE id = ?", (visit_id,))
+    raw = record.get("archived_raw_output")
+    if raw is not None:
+        conn.execute(
+            "INSERT OR REPLACE INTO visits_archive (visit_id, archived_at, llm_raw_output_z) "
+            "VALUES (?, ?, ?)",
+            (visit_id, int(record.get("archived_at") or time.time()), _compress_json(raw)),
+        )
+
+
+def _is_archived(record: Dict[str, Any]) -> bool:
+    return bool(record.get("raw_archived")) or record.get("archived_raw_output") is not None
+
+
+def import_visit_batch(records: Iterable[Dict[str, Any]], keep_ids: bool = False) -> int:
+    """
+    Insert :data:`EXPORT_COLUMNS` records in one transaction, restoring the
+    archived raw output and ``raw_archived`` flag of archived visits. With
+    ``keep_ids=True`` source ids are kept and ids already present are
+    skipped. Returns the number of visits inserted.
+
+    Plain rows go through ``executemany``; archived ones are inserted one
+    by one for their new id, keeping the source order.
+    """
+    sql = _INSERT_VISIT_WITH_ID_SQL if keep_ids else _INSERT_VISIT_SQL
+    conn = _get_conn()
+    inserted = 0
+    with conn:
+        pending: List[Dict[str, Any]] = []
+        for record in records:
+            row = _import_row(record, keep_ids)
+            if not _is_archived(record):
+                pending.append(row)
+                continue
+            if pending:
+                inserted += conn.executemany(sql, pending).rowcount
+                pending = []
+            cursor = conn.execute(sql, row)
+            if cursor.rowcount:  # 0 when keep_ids skipped an existing id
+                _restore_archive(conn, cursor.lastrowid, record)
+                inserted += 1
+        if pending:
+            inserted += conn.executemany(sql, pending).rowcount
+    return inserted
+
+
+# --- Full-text search --------------------------------------------------------
+
+# bm25 column weights for (transcript, image_summary, diagnosis): a hit in
+# the diagnosis counts most, the verbose vision summary least.
+_SEARCH_WEIGHTS = (1.0, 0.5, 2.0)
+_SEARCH_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+def _has_search_index(conn: sqlite3.Connection) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'visits_fts'"
+    ).fetchone()
+    return row is not None
+
+
+def _like_snippet(texts: List[Optional[str]], terms: List[str], marks: tuple, width: int = 60) -> str:
+    for text in texts:
+        if not text:
+            continue
+        lower = text.lower()
+        hits = [lower.find(t) for t in terms if t in lower]
+        if not hits:
+            continue
+        start = max(0, min(hits) - width // 2)
+        window = text[start:start + width * 2]
+        for term in terms:
+            window = re.sub(
+                re.escape(term),
+                lambda m: f"{marks[0]}{m.group(0)}{marks[1]}",
+                window,
+                flags=re.IGNORECASE,
+            )
+        return ("…" if start else "") + window + ("…" if start + width * 2 < len(text) else "")
+    return ""
+
+
+def search_visits(
+    query: str,
+    patient_id: Optional[str] = None,
+    limit: int = 20,
+    highlight: tuple = ("**", "**"),
+) -> List[Dict[str, Any]]:
+    """
+    Ranked full‑text search over visit transcripts, image summaries and
+    diagnoses (all terms must match; stemming, so "warts" finds "wart").
+
+    Uses the FTS5 index (bm25 ranking, ``snippet()`` highlighting with the
+    ``highlight`` markers); falls back to a LIKE scan when FTS5 is missing.
+
+    Returns a list of:
+        {"id", "patient_id", "timestamp", "diagnosis", "snippet", "score"}
+    where a lower ``score`` is a better match (``None`` for the fallback).
+    """
+    terms = [t.lower() for t in _SEARCH_TERM.findall(query or "")]
+    if not terms:
+        return []
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    conn = _get_conn()
+
+    if _has_search_index(conn):
+        match = " ".join(f'"{t}"' for t in terms)
+        sql = f"""
+            SELECT v.id, v.patient_id, v.timestamp, v.diagnosis,
+                   snippet(visits_fts, -1, ?, ?, '…', 12),
+                   bm25(visits_fts, {', '.join(str(w) for w in _SEARCH_WEIGHTS)}) AS score
+            FROM visits_fts
+            JOIN visits v ON v.id = visits_fts.rowid
+            WHERE visits_fts MATCH ?
+        """
+        params: List[Any] = [highlight[0], highlight[1], match]
+        if patient_id is not None:
+            sql += " AND v.patient_id = ?"
+            params.append(patient_id)
+        sql += " ORDER BY score LIMIT ?"
+        params.append(limit)
+        rows = conn.execute(sql, params).fetchall()
+        return [
+            {
+                "id": r[0],
+                "patient_id": r[1],
+                "timestamp": r[2],
+                "diagnosis": r[3],
+                "snippet": r[4],
+                "score": round(r[5], 4),
+            }
+            for r in rows
+        ]
+
+    where = []
+    params = []
+    for term in terms:
+        where.append("(transcript LIKE ? OR image_summary LIKE ? OR diagnosis LIKE ?)")
+        params += [f"%{term}%"] * 3
+    if patient_id is not None:
+        where.append("patient_id = ?")
+        params.append(patient_id)
+    params.append(limit)
+    rows = conn.execute(
+        f"""
+        SELECT id, patient_id, timestamp, diagnosis, transcript, image_summary
+        FROM visits
+        WHERE {' AND '.join(where)}
+        ORDER BY id DESC
+        LIMIT ?
+        """,
+        params,
+    ).fetchall()
+    return [
+        {
+            "id": r[0],
+            "patient_id": r[1],
+            "timestamp": r[2],
+            "diagnosis": r[3],
+            "snippet": _like_snippet([r[3], r[4], r[5]], terms, highlight),
+            "score": None,
+        }
+        for r in rows
+    ]
+
+
+# --- Compaction / archival ---------------------------------------------------
+
+
+def _database_bytes(conn: sqlite3.Connection) -> Dict[str, int]:
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return {
+        "file_bytes": page_size * page_count,
+        "free_bytes": page_size * free_pages,
+    }
+
+
+def _rewrite_payloads(
+    where: str,
+    params: tuple,
+    archive_before: Optional[int],
+    batch_size: int,
+) -> Dict[str, int]:
+    """
+    Walk matching visits in id order, compress legacy JSON payloads and,
+    when ``archive_before`` is set, move raw LLM output of visits older than
+    that epoch into ``visits_archive``.
+    """
+    conn = _get_conn()
+    report = {"rows_scanned": 0, "rows_rewritten": 0, "rows_archived": 0,
+              "payload_bytes_before": 0, "payload_bytes_after": 0, "archive_bytes": 0}
+    now = int(time.time())
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            f"""
+            SELECT id, fusion_result_json, fusion_result_z, visited_at
+            FROM visits
+            WHERE id > ? AND ({where})
+            ORDER BY id
+            LIMIT ?
+            """,
+            (last_id, *params, batch_size),
+        ).fetchall()
+        if not rows:
+            break
+        updates = []
+        archived = []
+        for visit_id, fusion_json, fusion_z, visited_at in rows:
+            last_id = visit_id
+            report["rows_scanned"] += 1
+            before = len(fusion_json or "") + len(fusion_z or b"")
+            data = _decode_fusion_result(fusion_json, fusion_z)
+            archive = (
+                archive_before is not None
+                and visited_at is not None
+                and visited_at < archive_before
+            )
+            if archive and data.get("llm_raw_output") is not None:
+                raw_z = _compress_json(data.pop("llm_raw_output"))
+                archived.append((visit_id, now, raw_z))
+                report["archive_bytes"] += len(raw_z)
+                data["llm_raw_output"] = None
+            if fusion_z is not None and not archive:
+                continue
+            payload = _compress_json(data)
+            report["payload_bytes_before"] += before
+            report["payload_bytes_after"] += len(payload)
+            updates.append((payload, int(archive), visit_id))
+        with conn:
+            if archived:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO visits_archive (visit_id, archived_at, llm_raw_output_z) "
+                    "VALUES (?, ?, ?)",
+                    archived,
+                )
+            conn.executemany(
+                "UPDATE visits SET fusion_result_z = ?, fusion_result_json = NULL, "
+                "raw_archived = MAX(raw_archived, ?) WHERE id = ?",
+                updates,
+            )
+        report["rows_rewritten"] += len(updates)
+        report["rows_archived"] += len(archived)
+    return report
+
+
+def _finish_report(
+    report: Dict[str, Any], before: Dict[str, int], vacuum: bool
+) -> Dict[str, Any]:
+    """
+    Add size figures. ``payload_bytes_reclaimed`` is net of ``archive_bytes``
+    (raw output moved to ``visits_archive`` is not freed). Without a vacuum
+    the file does not shrink – freed pages show up as
+    ``reusable_free_bytes`` and ``file_bytes_reclaimed`` may be negative
+    while the archive table grows.
+    """
+    conn = _get_conn()
+    if vacuum:
+        conn.execute("VACUUM")
+    after = _database_bytes(conn)
+    report["file_bytes_before"] = before["file_bytes"]
+    report["file_bytes_after"] = after["file_bytes"]
+    report["reusable_free_bytes"] = after["free_bytes"]
+    report["payload_bytes_reclaimed"] = (
+        report["payload_bytes_before"] - report["payload_bytes_after"] - report["archive_bytes"]
+    )
+    report["file_bytes_reclaimed"] = before["file_bytes"] - after["file_bytes"]
+    report["vacuumed"] = vacuum
+    if not vacuum:
+        report["note"] = (
+            "File bytes are only freed by a vacuum; freed pages are reused by "
+            "later writes (reusable_free_bytes). Re-run with --vacuum to shrink the file."
+        )
+    return report
+
+
+def compact_visits(vacuum: bool = False, batch_size: int = 500) -> Dict[str, Any]:
+    """
+    Compress legacy rows that still store ``fusion_result_json`` as text.
+
+    Freed pages are reused by later inserts; pass ``vacuum=True`` to also
+    shrink the file (rewrites the whole DB, run off-peak).
+    """
+    flush_visits()
+    before = _database_bytes(_get_conn())
+    report = _rewrite_payloads("fusion_result_json IS NOT NULL", (), None, batch_size)
+    return _finish_report(report, before, vacuum)
+
+
+def archive_raw_outputs(
+    older_than_days: float, vacuum: bool = False, batch_size: int = 500
+) -> Dict[str, Any]:
+    """
+    Move ``llm_raw_output`` of visits older than ``older_than_days`` into the
+    cold ``visits_archive`` table (compressed) and compact those rows.
+
+    The hot row keeps every other field; use :func:`get_archived_raw_output`
+    to retrieve an archived raw output for auditing.
+    """
+    flush_visits()
+    before = _database_bytes(_get_conn())
+    cutoff = int(time.time() - older_than_days * 86400)
+    report = _rewrite_payloads(
+        "raw_archived = 0 AND visited_at < ?", (cutoff,), cutoff, batch_size
+    )
+    report["archived_before_epoch"] = cutoff
+    return _finish_report(report, before, vacuum)
+
+
+def get_archived_raw_output(visit_id: int) -> Optional[Any]:
+    """Return the archived raw LLM output for ``visit_id``, if any."""
+    row = _get_conn().execute(
+        "SELECT llm_raw_output_z FROM visits_archive WHERE visit_id = ?", (visit_id,)
+    ).fetchone()
+    return _decode_archived_raw(row[0]) if row is not None else None
+
+
+async def save_visit_async(
+    patient_id: Optional[str],
+    transcript: str,
+    image_summary: str,
+    fusion_result: Dict[str, Any],
+    timestamp: str,
+    action_result: Optional[Dict[str, Any]] = None,
+    image_conf: Optional[float] = None,
+    transcript_conf: Optional[float] = None,
+) -> None:
+    """Non‑blocking variant of :func:`save_visit`."""
+    await asyncio.to_thread(
+        save_visit,
+        patient_id=patient_id,
+        transcript=transcript,
+        image_summary=image_summary,
+        fusion_result=fusion_result,
+        timestamp=timestamp,
+        action_result=action_result,
+        image_conf=image_conf,
+        transcript_conf=transcript_conf,
+    )
+
+
+async def get_history_summary_async(patient_id: Optional[str]) -> str:
+    """Non‑blocking variant of :func:`get_history_summary`."""
+    return await asyncio.to_thread(get_history_summary, patient_id)
+
+
+async def list_visits_async(patient_id: Optional[str], **kwargs: Any) -> Dict[str, Any]:
+    """Non‑blocking variant of :func:`list_visits`."""
+    return await asyncio.to_thread(list_visits, patient_id, **kwargs)
+
+
+async def search_visits_async(query: str, **kwargs: Any) -> List[Dict[str, Any]]:
+    """Non‑blocking variant of :func:`search_visits`."""
+    return await asyncio.to_thread(search_visits, query, **kwargs)
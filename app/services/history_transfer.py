@@ -0,0 +1,253 @@
+"""
+Streaming bulk export / import of the ``visits`` table.
+
+Visits are moved in bounded chunks (``batch_size`` rows at a time), so
+memory stays flat no matter how large the history is:
+
+- export walks the table with an id keyset (``WHERE id > ?``) and appends
+  each chunk to a JSONL (optionally ``.gz``) or Parquet file;
+- import reads the file chunk by chunk and inserts each chunk in its own
+  transaction.
+
+The database side goes through ``history_service.read_export_batch`` /
+``import_visit_batch``; this module only handles the file formats.
+
+Raw LLM outputs moved to ``visits_archive`` by ``archive_raw_outputs``
+travel with their visit (``archived_raw_output`` / ``archived_at``), and
+import restores both the archive row and the ``raw_archived`` flag.
+
+Both are resumable: the returned report carries ``last_id`` (pass as
+``after_id`` to continue an export) and ``rows_read`` (pass as
+``start_row`` to continue an import). Progress callbacks and reports include
+throughput in rows/s.
+
+Parquet needs ``pyarrow``; JSONL works with the standard library only.
+See ``python -m app.history_cli export|import``.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, IO, Iterator, List, Optional, Union
+
+from app.services import history_service
+
+try:
+    # Optional – only needed for the Parquet format.
+    import pyarrow as pa  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+
+EXPORT_COLUMNS = history_service.EXPORT_COLUMNS
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+
+def _detect_format(path: Union[str, Path], fmt: Optional[str]) -> str:
+    if fmt:
+        fmt = fmt.lower()
+    else:
+        suffixes = [s.lower() for s in Path(path).suffixes]
+        fmt = "parquet" if suffixes and suffixes[-1] in (".parquet", ".pq") else "jsonl"
+    if fmt not in ("jsonl", "parquet"):
+        raise ValueError(f"Unsupported format: {fmt}")
+    if fmt == "parquet" and pa is None:
+        raise ValueError("pyarrow is required for Parquet export/import")
+    return fmt
+
+
+def _open_text(path: Union[str, Path], mode: str) -> IO[str]:
+    if str(path).endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _parquet_schema() -> Any:
+    return pa.schema(
+        [
+            ("id", pa.int64()),
+            ("patient_id", pa.string()),
+            ("timestamp", pa.string()),
+            ("visited_at", pa.int64()),
+            ("transcript", pa.string()),
+            ("image_summary", pa.string()),
+            ("diagnosis", pa.string()),
+            ("triage_action", pa.string()),
+            ("final_confidence", pa.float64()),
+            ("fusion_confidence", pa.float64()),
+            ("image_conf", pa.float64()),
+            ("transcript_conf", pa.float64()),
+            ("fusion_source", pa.string()),
+            ("raw_archived", pa.int64()),
+            ("archived_at", pa.int64()),
+            # Nested and free-form, so kept as JSON string columns.
+            ("fusion_result", pa.string()),
+            ("archived_raw_output", pa.string()),
+        ]
+    )
+
+
+class _Meter:
+    """Counts rows and derives throughput for reports / progress callbacks."""
+
+    def __init__(self, progress: Optional[ProgressCallback]) -> None:
+        self.started = time.perf_counter()
+        self.progress = progress
+        self.report: Dict[str, Any] = {"rows": 0}
+
+    def tick(self, rows: int, **fields: Any) -> None:
+        self.report["rows"] += rows
+        self.report.update(fields)
+        elapsed = time.perf_counter() - self.started
+        self.report["seconds"] = round(elapsed, 3)
+        self.report["rows_per_second"] = round(self.report["rows"] / elapsed, 1) if elapsed else 0.0
+        if self.progress is not None:
+            self.progress(dict(self.report))
+
+
+# --- Export ------------------------------------------------------------------
+
+
+def iter_visit_batches(
+    after_id: int = 0,
+    batch_size: int = 1000,
+    patient_id: Optional[str] = None,
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Yield visits with ``id > after_id`` in id order, ``batch_size`` at a time,
+    including any raw LLM output archived for them.
+    """
+    last_id = after_id
+    while True:
+        batch = history_service.read_export_batch(last_id, batch_size, patient_id)
+        if not batch:
+            return
+        last_id = batch[-1]["id"]
+        yield batch
+
+
+def export_visits(
+    path: Union[str, Path],
+    fmt: Optional[str] = None,
+    after_id: int = 0,
+    batch_size: int = 1000,
+    patient_id: Optional[str] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> Dict[str, Any]:
+    """
+    Stream visits to ``path`` as JSONL (default; ``.gz`` compresses) or
+    Parquet (``.parquet`` or ``fmt="parquet"``).
+
+    JSONL is written and flushed one batch at a time before ``last_id``
+    advances, so every reported ``last_id`` is on disk. A resume
+    (``after_id`` > 0) appends to the file. It must start from the last
+    complete line: if the process died partway through a batch, drop any
+    lines after that one, including a truncated last line, and pass its
+    ``id``. Resuming a Parquet export needs a new part file; an existing
+    ``path`` raises ``ValueError``.
+
+    Returns:
+        {"rows": int, "last_id": int, "seconds": float, "rows_per_second": float}
+    """
+    fmt = _detect_format(path, fmt)
+    if fmt == "parquet" and after_id and Path(path).exists():
+        raise ValueError(
+            f"{path} already exists; write a resumed Parquet export to a new part file"
+        )
+    history_service.flush_visits()
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    meter = _Meter(progress)
+    meter.report["last_id"] = after_id
+
+    batches = iter_visit_batches(after_id, batch_size, patient_id)
+    if fmt == "jsonl":
+        with _open_text(path, "a" if after_id else "w") as out:
+            for batch in batches:
+                out.write("".join(json.dumps(record) + "\n" for record in batch))
+                out.flush()
+                meter.tick(len(batch), last_id=batch[-1]["id"])
+    else:
+        schema = _parquet_schema()
+        with pq.ParquetWriter(str(path), schema) as writer:
+            for batch in batches:
+                columns = {name: [record[name] for record in batch] for name in EXPORT_COLUMNS}
+                columns["fusion_result"] = [json.dumps(v) for v in columns["fusion_result"]]
+                columns["archived_raw_output"] = [
+                    None if v is None else json.dumps(v) for v in columns["archived_raw_output"]
+                ]
+                writer.write_table(pa.table(columns, schema=schema))
+                meter.tick(len(batch), last_id=batch[-1]["id"])
+
+    meter.tick(0)
+    return meter.report
+
+
+# --- Import ------------------------------------------------------------------
+
+
+def _read_records(path: Union[str, Path], fmt: str, batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    if fmt == "jsonl":
+        with _open_text(path, "r") as f:
+            batch: List[Dict[str, Any]] = []
+            for line in f:
+                if not line.strip():
+                    continue
+                batch.append(json.loads(line))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        return
+
+    for record_batch in pq.ParquetFile(str(path)).iter_batches(batch_size=batch_size):
+        records = record_batch.to_pylist()
+        for record in records:
+            for column in ("fusion_result", "archived_raw_output"):
+                if isinstance(record.get(column), str):
+                    record[column] = json.loads(record[column])
+        yield records
+
+
+def import_visits(
+    path: Union[str, Path],
+    fmt: Optional[str] = None,
+    start_row: int = 0,
+    batch_size: int = 1000,
+    keep_ids: bool = False,
+    progress: Optional[ProgressCallback] = None,
+) -> Dict[str, Any]:
+    """
+    Stream visits from a JSONL / Parquet export into the history DB.
+
+    Each chunk is inserted in one transaction, together with the archived
+    raw outputs and ``raw_archived`` flags of its visits. Resume an interrupted import
+    with ``start_row=<report["rows_read"]>``. With ``keep_ids=True`` source
+    ids are preserved and already present ids are skipped, which makes
+    re‑running an import idempotent; otherwise new ids are assigned.
+
+    Returns:
+        {"rows": int, "rows_read": int, "seconds": float, "rows_per_second": float}
+    """
+    fmt = _detect_format(path, fmt)
+    meter = _Meter(progress)
+    meter.report["rows_read"] = start_row
+
+    seen = 0
+    for batch in _read_records(path, fmt, batch_size):
+        if seen + len(batch) <= start_row:
+            seen += len(batch)
+            continue
+        skip = max(0, start_row - seen)
+        seen += len(batch)
+        inserted = history_service.import_visit_batch(batch[skip:], keep_ids=keep_ids)
+        meter.tick(inserted, rows_read=seen)
+
+    meter.tick(0)
+    return meter.report
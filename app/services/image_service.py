@@ -0,0 +1,207 @@
+"""
+Image pre‑processing before upload to the vision model.
+
+Phone photos are often 5–12 MB and base64 inflates them by a third, which
+dominates upload time. ``prepare_image``:
+
+1. sniffs the real format from magic bytes (instead of assuming JPEG),
+2. applies the EXIF orientation so the model sees the photo upright,
+3. downscales to a configurable longest edge, and
+4. re‑encodes to fit a byte budget, keeping JPEG quality high enough for
+   diagnostic detail.
+
+Images already within limits are sent as‑is to avoid generation loss.
+Pillow is optional: without it JPEG, PNG, WebP and GIF files are passed
+through with their sniffed MIME type, while formats the vision endpoint does
+not accept (HEIC, TIFF, BMP, ...) raise :class:`UnsupportedImageError`
+rather than being uploaded under a false label.
+
+Configuration (environment):
+
+- ``IMAGE_MAX_EDGE`` – longest edge in pixels (default 1568)
+- ``IMAGE_MAX_BYTES`` – target encoded size in bytes (default 1_500_000)
+"""
+
+from __future__ import annotations
+
+import base64
+import io
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from app.services.config import env_int
+
+try:
+    # Optional – without Pillow images are uploaded unchanged.
+    from PIL import Image, ImageOps  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    Image = None
+    ImageOps = None
+
+
+IMAGE_MAX_EDGE = env_int("IMAGE_MAX_EDGE", 1568)
+IMAGE_MAX_BYTES = env_int("IMAGE_MAX_BYTES", 1_500_000)
+
+# Formats the vision endpoint accepts directly.
+_PASSTHROUGH_TYPES = {"image/jpeg", "image/png", "image/webp", "image/gif"}
+# Never go below this JPEG quality; downscale further instead.
+_QUALITY_STEPS = (90, 85, 80, 75, 70)
+_EXIF_ORIENTATION = 0x0112
+
+_STATS_LOCK = threading.Lock()
+_STATS: Dict[str, int] = {
+    "images": 0,
+    "reencoded": 0,
+    "original_bytes": 0,
+    "encoded_bytes": 0,
+}
+
+
+class UnsupportedImageError(ValueError):
+    """The image cannot be converted to a format the vision endpoint accepts."""
+
+
+def sniff_mime_type(data: bytes) -> str:
+    """Best‑effort MIME type from the first bytes of an image."""
+    if data.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data.startswith(b"BM"):
+        return "image/bmp"
+    if data[:4] in (b"II*\x00", b"MM\x00*"):
+        return "image/tiff"
+    if data[4:12] in (b"ftypheic", b"ftypheix", b"ftypmif1", b"ftypmsf1"):
+        return "image/heic"
+    return "application/octet-stream"
+
+
+def _encode_jpeg(img: Any, max_bytes: int) -> bytes:
+    """Encode as JPEG at the highest quality step that fits ``max_bytes``."""
+    data = b""
+    for quality in _QUALITY_STEPS:
+        buf = io.BytesIO()
+        img.save(buf, format="JPEG", quality=quality, optimize=True)
+        data = buf.getvalue()
+        if not max_bytes or len(data) <= max_bytes:
+            break
+    return data
+
+
+def _to_rgb(img: Any) -> Any:
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        rgba = img.convert("RGBA")
+        background = Image.new("RGB", rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.split()[-1])
+        return background
+    return img.convert("RGB") if img.mode != "RGB" else img
+
+
+def _record(original: int, encoded: int, reencoded: bool) -> None:
+    with _STATS_LOCK:
+        _STATS["images"] += 1
+        _STATS["reencoded"] += int(reencoded)
+        _STATS["original_bytes"] += original
+        _STATS["encoded_bytes"] += encoded
+
+
+def prepare_image(
+    image_path: str,
+    max_edge: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Load, normalise and encode an image for the vision model.
+
+    Returns:
+        {
+          "base64": str,
+          "mime_type": str,
+          "original_bytes": int,
+          "encoded_bytes": int,
+          "bytes_saved": int,
+          "width": int | None,
+          "height": int | None,
+          "reencoded": bool,
+        }
+
+    Raises:
+        UnsupportedImageError: the file is not JPEG/PNG/WebP/GIF and could
+            not be re-encoded (Pillow missing or unable to decode it).
+    """
+    max_edge = IMAGE_MAX_EDGE if max_edge is None else max_edge
+    max_bytes = IMAGE_MAX_BYTES if max_bytes is None else max_bytes
+
+    original_size = os.path.getsize(image_path)
+    with open(image_path, "rb") as f:
+        mime_type = sniff_mime_type(f.read(32))
+
+    data: Optional[bytes] = None
+    width = height = None
+    reencoded = False
+    failure: Optional[Exception] = None
+
+    if Image is not None:
+        try:
+            with Image.open(image_path) as opened:
+                orientation = opened.getexif().get(_EXIF_ORIENTATION, 1)
+                rotated = orientation not in (None, 1)
+                img = ImageOps.exif_transpose(opened) if rotated else opened
+                width, height = img.size
+                too_large = bool(max_edge) and max(img.size) > max_edge
+                too_heavy = bool(max_bytes) and original_size > max_bytes
+                if rotated or too_large or too_heavy or mime_type not in _PASSTHROUGH_TYPES:
+                    img = _to_rgb(img)
+                    if too_large:
+                        img.thumbnail((max_edge, max_edge), Image.LANCZOS)
+                    data = _encode_jpeg(img, max_bytes)
+                    # Still over budget at the lowest quality: shrink further.
+                    while max_bytes and len(data) > max_bytes and min(img.size) > 256:
+                        img = img.resize(
+                            (int(img.width * 0.85), int(img.height * 0.85)), Image.LANCZOS
+                        )
+                        data = _encode_jpeg(img, max_bytes)
+                    width, height = img.size
+                    mime_type = "image/jpeg"
+                    reencoded = True
+        except Exception as e:
+            failure = e
+            data = None
+            reencoded = False
+
+    if data is None:
+        if mime_type not in _PASSTHROUGH_TYPES:
+            reason = f"pre-processing failed: {failure}" if failure else "Pillow is not installed"
+            raise UnsupportedImageError(
+                f"Cannot upload {mime_type} image ({reason}); "
+                f"supported formats are {', '.join(sorted(_PASSTHROUGH_TYPES))}"
+            ) from failure
+        if failure is not None:
+            print(f"Warning: image pre-processing failed: {failure}. Uploading original {mime_type}...")
+        with open(image_path, "rb") as f:
+            data = f.read()
+
+    _record(original_size, len(data), reencoded)
+    return {
+        "base64": base64.b64encode(data).decode("utf-8"),
+        "mime_type": mime_type,
+        "original_bytes": original_size,
+        "encoded_bytes": len(data),
+        "bytes_saved": original_size - len(data),
+        "width": width,
+        "height": height,
+        "reencoded": reencoded,
+    }
+
+
+def get_preprocessing_stats() -> Dict[str, Any]:
+    """Cumulative bytes in / out across all prepared images."""
+    with _STATS_LOCK:
+        stats: Dict[str, Any] = dict(_STATS)
+    stats["bytes_saved"] = stats["original_bytes"] - stats["encoded_bytes"]
+    return stats
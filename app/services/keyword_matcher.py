@@ -0,0 +1,214 @@
+"""
+Single‑pass keyword matcher for the offline findings heuristics.
+
+The keyword table lives in ``data/finding_keywords.json`` (override with
+``FINDING_KEYWORDS_PATH``) and maps labels to keywords, so new findings or
+synonyms need no code change. All keywords are compiled into one regex with
+word boundaries ("red" no longer matches "bored"), factored as a prefix
+trie so each word start tries a single branch instead of every keyword.
+
+The text is first folded in one ``bytes.translate`` call: ASCII letters are
+lower‑cased and every other byte that is not an ASCII word character
+(including the UTF‑8 bytes of non‑ASCII letters) becomes a space. The scan
+then only starts at spaces, found by the regex engine's literal prefix
+search, instead of trying every character; that is what makes it cheaper
+than the substring checks it replaced. Keywords are folded the same way, so
+the words of a phrase may be separated by any run of spaces, hyphens or
+punctuation.
+
+Overlapping keywords are handled at compile time: a keyword also carries the
+labels of every keyword it contains, so matching "plantar wart" sets both
+``wart`` and ``foot`` even though the scan consumes the phrase once.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+DEFAULT_KEYWORDS_PATH = Path(__file__).parent / "data" / "finding_keywords.json"
+
+
+_WORD_BYTES = b"abcdefghijklmnopqrstuvwxyz0123456789_"
+# Lower‑case ASCII letters, keep word bytes, everything else -> space.
+_FOLD = bytes(
+    c + 32 if 65 <= c <= 90 else c if c in _WORD_BYTES else 32
+    for c in range(256)
+)
+_SEP = " +"
+_WILD = r"\w*"
+_END = ""
+# Bound on memoised wildcard / separator variants ("itching", "plantar  wart").
+_MAX_RESOLVED = 10_000
+
+
+def _fold(text: str) -> bytes:
+    """``text`` as lower‑case ASCII words separated by spaces, with a leading space."""
+    return b" " + text.encode("utf-8", "replace").translate(_FOLD)
+
+
+def _keyword_atoms(keyword: str) -> Tuple[str, ...]:
+    """
+    Split a table entry into regex atoms: one per character, ``_SEP`` between
+    words and ``_WILD`` for a trailing ``*``.
+    """
+    keyword = keyword.strip()
+    prefix = keyword.endswith("*")
+    words = _fold(keyword.rstrip("*")).decode("ascii").split()
+    atoms: List[str] = []
+    for i, word in enumerate(words):
+        if i:
+            atoms.append(_SEP)
+        atoms.extend(re.escape(ch) for ch in word)
+    if prefix:
+        atoms.append(_WILD)
+    return tuple(atoms)
+
+
+def _literal(atoms: Tuple[str, ...]) -> bytes:
+    """The folded scan token of a keyword without wildcard: ``b" plantar wart"``."""
+    return (" " + "".join(" " if atom == _SEP else atom for atom in atoms)).encode("ascii")
+
+
+def _render_trie(node: Dict[str, Any], groups: Optional[List[Tuple[str, ...]]]) -> str:
+    """
+    Render a prefix trie as a regex; longer continuations are tried before a
+    keyword that ends here. With ``groups`` each keyword ends in an empty
+    capturing group (recorded in order) so ``match.lastindex`` identifies it.
+    """
+    branches = []
+    for atom in sorted((a for a in node if a != _END), key=lambda a: a in (_SEP, _WILD)):
+        branches.append(atom + _render_trie(node[atom], groups))
+    if _END in node:
+        if groups is not None:
+            groups.append(node[_END])
+            branches.append("()")
+        else:
+            branches.append("")
+    if len(branches) == 1:
+        return branches[0]
+    if groups is None and branches[-1] == "":
+        return "(?:" + "|".join(branches[:-1]) + ")?"
+    return "(?:" + "|".join(branches) + ")"
+
+
+class KeywordMatcher:
+    """
+    Compiled matcher over ``{label: [keyword, ...]}``.
+
+    ``labels_in(text)`` returns the set of labels whose keywords occur in
+    ``text`` as whole words.
+    """
+
+    def __init__(self, table: Dict[str, Iterable[str]]) -> None:
+        keywords: Dict[Tuple[str, ...], set] = {}
+        for label, entries in table.items():
+            for keyword in entries:
+                atoms = _keyword_atoms(keyword)
+                if atoms:
+                    keywords.setdefault(atoms, set()).add(label)
+        if not keywords:
+            raise ValueError("Keyword table is empty")
+        literals = {atoms: _literal(atoms) for atoms in keywords if atoms[-1] != _WILD}
+
+        # A literal keyword also carries the labels of every keyword it
+        # contains as whole words ("plantar wart" -> wart + foot).
+        singles = {
+            atoms: re.compile((" " + "".join(atoms) + r"\b").encode("ascii"))
+            for atoms in keywords
+        }
+        closed: Dict[Tuple[str, ...], FrozenSet[str]] = {}
+        for atoms, labels in keywords.items():
+            labels = set(labels)
+            literal = literals.get(atoms)
+            if literal is not None:
+                for other, regex in singles.items():
+                    if other != atoms and regex.search(literal):
+                        labels |= keywords[other]
+            closed[atoms] = frozenset(labels)
+
+        trie: Dict[str, Any] = {}
+        for atoms in keywords:
+            node = trie
+            for atom in atoms:
+                node = node.setdefault(atom, {})
+            node[_END] = atoms
+        group_atoms: List[Tuple[str, ...]] = []
+        identify = _render_trie(trie, group_atoms)
+
+        self.labels: FrozenSet[str] = frozenset().union(*keywords.values())
+        self._group_labels = [closed[atoms] for atoms in group_atoms]
+        # The scan has no groups so findall() collects matches in C; literal
+        # tokens resolve with one dict lookup, wildcard / separator variants
+        # once via the grouped regex and are then memoised.
+        self._scan = re.compile((" " + _render_trie(trie, None) + r"\b").encode("ascii"))
+        self._identify = re.compile((" " + identify + r"\b").encode("ascii"))
+        self._resolved: Dict[bytes, FrozenSet[str]] = {
+            literal: closed[atoms] for atoms, literal in literals.items()
+        }
+
+    def _resolve(self, token: bytes) -> FrozenSet[str]:
+        labels = self._resolved.get(token)
+        if labels is None:
+            match = self._identify.fullmatch(token)
+            labels = self._group_labels[match.lastindex - 1] if match else frozenset()
+            if len(self._resolved) < _MAX_RESOLVED:
+                self._resolved[token] = labels
+        return labels
+
+    def labels_in(self, text: Optional[str]) -> FrozenSet[str]:
+        """Labels of all keywords found in ``text``."""
+        if not text:
+            return frozenset()
+        found: set = set()
+        for token in set(self._scan.findall(_fold(text))):
+            found |= self._resolve(token)
+        return frozenset(found)
+
+
+class FindingsMatcher:
+    """The findings / cues table loaded from JSON, compiled into one matcher."""
+
+    def __init__(self, table: Dict[str, Dict[str, List[str]]]) -> None:
+        findings = table.get("findings") or {}
+        cues = table.get("cues") or {}
+        overlap = set(findings) & set(cues)
+        if overlap:
+            raise ValueError(f"Labels used as both finding and cue: {sorted(overlap)}")
+        self.finding_labels: Tuple[str, ...] = tuple(findings)
+        self.cue_labels: Tuple[str, ...] = tuple(cues)
+        self.matcher = KeywordMatcher({**findings, **cues})
+
+    @property
+    def labels(self) -> FrozenSet[str]:
+        """Every finding and cue label."""
+        return self.matcher.labels
+
+    def match(self, text: Optional[str]) -> Tuple[Dict[str, bool], FrozenSet[str]]:
+        """Return (``{finding: bool}`` for every finding label, all matched labels)."""
+        labels = self.matcher.labels_in(text)
+        findings = {label: label in labels for label in self.finding_labels}
+        return findings, labels
+
+
+_LOCK = threading.Lock()
+_MATCHERS: Dict[str, FindingsMatcher] = {}
+
+
+def get_findings_matcher(path: Optional[str] = None) -> FindingsMatcher:
+    """Load and compile the keyword table once per path (thread‑safe)."""
+    path = str(path or os.getenv("FINDING_KEYWORDS_PATH") or DEFAULT_KEYWORDS_PATH)
+    matcher = _MATCHERS.get(path)
+    if matcher is not None:
+        return matcher
+    with _LOCK:
+        matcher = _MATCHERS.get(path)
+        if matcher is None:
+            with open(path, "r", encoding="utf-8") as f:
+                matcher = FindingsMatcher(json.load(f))
+            _MATCHERS[path] = matcher
+    return matcher
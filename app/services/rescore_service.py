@@ -0,0 +1,154 @@
+"""
+Offline re‑scoring of stored visits.
+
+After changing the triage thresholds or the fallback knowledge base, run
+:func:`rescore_visits` (or ``python -m app.history_cli rescore``) to apply
+the new rules to history. Visits are streamed in id order, ``batch_size``
+at a time:
+
+- visits whose diagnosis came from the deterministic fallback
+  (``fusion_source = 'fallback'``) are re‑fused with :func:`fuse_batch`;
+  LLM diagnoses are kept as they were;
+- every visit gets its final confidence and triage action recomputed with
+  :func:`compute_action_batch`;
+- visits saved before the image / transcript confidences were stored
+  (NULL sub‑confidences) keep their stored fusion and final confidences;
+  only the current fallback rules and triage thresholds are re‑applied;
+- changed columns are written back, one transaction per batch.
+
+The stored fusion payload is left untouched as the audit record of what the
+patient was originally told. Keyword extraction runs in one process pool
+that lives for the whole run.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from app.services import history_service
+from app.services.confidence_service import compute_action_batch, get_triage_policy
+from app.services.fusion_service import fuse_batch
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+# Row layout: (id, *_COLUMNS).
+_COLUMNS = (
+    "image_summary", "transcript", "image_conf", "transcript_conf",
+    "fusion_confidence", "fusion_source", "diagnosis", "triage_action",
+    "final_confidence",
+)
+
+
+def _rescore_batch(rows: list, executor: Optional[Any], processes: int) -> Dict[str, list]:
+    """Compute new column values for one batch; returns the UPDATE parameter lists."""
+    # Visits saved before the sub-confidence columns existed have NULL there;
+    # their confidences cannot be recomputed, only the rules re-applied.
+    complete = [row[3] is not None and row[4] is not None for row in rows]
+
+    refuse = [i for i, row in enumerate(rows) if row[6] == "fallback"]
+    fused = fuse_batch(
+        image_summaries=[rows[i][1] or "" for i in refuse],
+        image_confs=[rows[i][3] for i in refuse],
+        transcripts=[rows[i][2] or "" for i in refuse],
+        transcript_confs=[rows[i][4] for i in refuse],
+        executor=executor,
+        processes=processes,
+    )
+
+    fusion_confs = [row[5] for row in rows]
+    diagnosis_updates = []
+    for i, result in zip(refuse, fused):
+        if complete[i]:
+            fusion_confs[i] = result["fusion_confidence"]
+        if result["preliminary_diagnosis"] != rows[i][7] or fusion_confs[i] != rows[i][5]:
+            diagnosis_updates.append(
+                (result["preliminary_diagnosis"], fusion_confs[i], rows[i][0])
+            )
+
+    # Full recomputation where all inputs are known ...
+    recompute = [i for i, row in enumerate(rows) if complete[i] and fusion_confs[i] is not None]
+    actions = compute_action_batch(
+        [fusion_confs[i] for i in recompute],
+        [rows[i][3] for i in recompute],
+        [rows[i][4] for i in recompute],
+    )
+    new_triage = {
+        i: (str(action), float(final_conf))
+        for i, final_conf, action in zip(
+            recompute, list(actions["final_confidence"]), list(actions["triage_action"])
+        )
+    }
+    # ... otherwise only the current thresholds, applied to the stored final confidence.
+    policy = get_triage_policy()
+    for i, row in enumerate(rows):
+        if i not in new_triage and row[9] is not None:
+            new_triage[i] = (policy.action_for(row[9]), row[9])
+
+    triage_updates = []
+    for i, (action, final_conf) in sorted(new_triage.items()):
+        if action != rows[i][8] or final_conf != rows[i][9]:
+            triage_updates.append((action, final_conf, rows[i][0]))
+    return {"diagnosis": diagnosis_updates, "triage": triage_updates, "refused": refuse}
+
+
+def rescore_visits(
+    after_id: int = 0,
+    batch_size: int = 5000,
+    processes: Optional[int] = None,
+    dry_run: bool = False,
+    progress: Optional[ProgressCallback] = None,
+) -> Dict[str, Any]:
+    """
+    Re‑apply the current fallback rules and triage thresholds to stored visits.
+
+    Resume an interrupted run with ``after_id=<report["last_id"]>``;
+    ``dry_run`` computes and counts changes without writing them.
+
+    Returns:
+        {
+          "rows": int, "refused": int,
+          "diagnosis_changed": int, "triage_changed": int,
+          "last_id": int, "seconds": float, "rows_per_second": float,
+        }
+    """
+    history_service.flush_visits()
+    processes = (os.cpu_count() or 1) if processes is None else processes
+    report: Dict[str, Any] = {
+        "rows": 0, "refused": 0, "diagnosis_changed": 0, "triage_changed": 0,
+        "last_id": after_id, "seconds": 0.0, "rows_per_second": 0.0,
+    }
+    started = time.perf_counter()
+
+    executor = ProcessPoolExecutor(max_workers=processes) if processes > 1 else None
+    try:
+        last_id = after_id
+        while True:
+            rows = history_service.read_visit_batch(_COLUMNS, last_id, batch_size)
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            updates = _rescore_batch(rows, executor, processes)
+            if not dry_run:
+                # Diagnosis is FTS-indexed: only touch rows that changed.
+                history_service.update_visits([
+                    (("diagnosis", "fusion_confidence"), updates["diagnosis"]),
+                    (("triage_action", "final_confidence"), updates["triage"]),
+                ])
+
+            elapsed = time.perf_counter() - started
+            report["rows"] += len(rows)
+            report["refused"] += len(updates["refused"])
+            report["diagnosis_changed"] += len(updates["diagnosis"])
+            report["triage_changed"] += len(updates["triage"])
+            report["last_id"] = last_id
+            report["seconds"] = round(elapsed, 3)
+            report["rows_per_second"] = round(report["rows"] / elapsed, 1) if elapsed else 0.0
+            if progress is not None:
+                progress(dict(report))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return report
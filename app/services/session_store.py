@@ -0,0 +1,325 @@
+"""
+Server‑side store for consultation sessions.
+
+The Gradio UI keeps only an opaque session ID in ``gr.State``; the
+assessment, chat history and chat context live here, so they are not
+serialised and shipped with every event.
+
+Two tiers, like :mod:`app.services.cache_service`:
+
+- an in‑memory LRU (``OrderedDict``) of live session dicts, ordered by
+  last access. Sessions idle for longer than the idle timeout, or pushed
+  out by the size limit, are evicted;
+- an optional SQLite spill. Evicted sessions are written there as JSON and
+  transparently reloaded on the next access, and :func:`flush` (run at
+  exit) writes out the live ones so sessions survive a restart.
+
+Keys listed in ``TRANSIENT_KEYS`` (derived objects such as the
+``ChatContext``) are not spilled; callers rebuild them on demand.
+
+:meth:`SessionStore.get` returns the live dict, so a caller that mutates a
+session over several steps (e.g. a streamed chat turn) holds
+:meth:`SessionStore.locked` for that session; overlapping events for the
+same session then run one after the other instead of interleaving.
+
+Configuration (environment):
+
+- ``SESSION_STORE_DB`` – SQLite path for the spill; empty (default) keeps
+  sessions in memory only
+- ``SESSION_MAX_ACTIVE`` – size of the in‑memory LRU (default 1000)
+- ``SESSION_IDLE_TIMEOUT`` – seconds before an idle session leaves memory
+  (default 1800)
+- ``SESSION_DISK_TTL`` – seconds before a spilled session is deleted
+  (default 7 days; ``0`` keeps them forever)
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.services.config import env_int, env_number
+
+TRANSIENT_KEYS = frozenset({"chat_context"})
+
+
+class SessionStore:
+    """
+    In‑memory LRU of session dicts with idle eviction and an optional
+    SQLite spill.
+
+    Parameters
+    ----------
+    max_active:
+        Maximum number of sessions held in memory.
+    idle_timeout:
+        Seconds without access after which a session leaves memory;
+        ``0`` disables idle eviction.
+    disk_ttl:
+        Seconds after its last access before a spilled session is deleted;
+        ``0`` keeps spilled sessions forever.
+    db_path:
+        SQLite file for spilled sessions; empty string keeps sessions in
+        memory only (evicted sessions are then gone).
+    """
+
+    def __init__(
+        self,
+        max_active: int = 1000,
+        idle_timeout: float = 1800.0,
+        disk_ttl: float = 7 * 24 * 3600,
+        db_path: str = "",
+    ) -> None:
+        self.max_active = max(1, int(max_active))
+        self.idle_timeout = max(0.0, float(idle_timeout))
+        self.disk_ttl = max(0.0, float(disk_ttl))
+        self.db_path = db_path
+
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # session_id -> [lock, holders + waiters]; dropped when unused.
+        self._session_locks: Dict[str, List[Any]] = {}
+        self._local = threading.local()
+        self._schema_ready = False
+        self._counters: Dict[str, int] = {
+            "created": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evicted": 0,
+            "spilled": 0,
+        }
+
+    # -- SQLite spill ---------------------------------------------------------
+
+    def _conn(self) -> Optional[sqlite3.Connection]:
+        if not self.db_path:
+            return None
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        if not self._schema_ready:
+            with conn:
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS sessions (
+                        session_id TEXT PRIMARY KEY,
+                        data TEXT NOT NULL,
+                        last_access REAL NOT NULL
+                    )
+                    """
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_sessions_last_access "
+                    "ON sessions (last_access)"
+                )
+            self._schema_ready = True
+        return conn
+
+    def _spill(self, sessions: List[Tuple[str, float, Dict[str, Any]]]) -> None:
+        """Write evicted (or flushed) sessions to disk; no‑op without a DB."""
+        if not sessions:
+            return
+        try:
+            conn = self._conn()
+            if conn is None:
+                return
+            rows = []
+            for session_id, last_access, data in sessions:
+                payload = {k: v for k, v in data.items() if k not in TRANSIENT_KEYS}
+                try:
+                    rows.append((session_id, json.dumps(payload), last_access))
+                except (TypeError, ValueError) as e:
+                    print(f"Warning: session {session_id} is not serialisable, dropped: {e}")
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO sessions (session_id, data, last_access) "
+                    "VALUES (?, ?, ?)",
+                    rows,
+                )
+                if self.disk_ttl:
+                    conn.execute(
+                        "DELETE FROM sessions WHERE last_access < ?",
+                        (time.time() - self.disk_ttl,),
+                    )
+        except sqlite3.Error as e:
+            print(f"Warning: session spill failed: {e}")
+            return
+        with self._lock:
+            self._counters["spilled"] += len(rows)
+
+    def _load(self, session_id: str, now: float) -> Optional[Dict[str, Any]]:
+        try:
+            conn = self._conn()
+            if conn is None:
+                return None
+            row = conn.execute(
+                "SELECT data, last_access FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Warning: session load failed: {e}")
+            return None
+        if row is None:
+            return None
+        data_json, last_access = row
+        if self.disk_ttl and now - last_access > self.disk_ttl:
+            return None
+        return json.loads(data_json)
+
+    # -- Memory tier ----------------------------------------------------------
+
+    def _evict_locked(self, now: float) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """Pop idle and over‑limit sessions (caller holds the lock)."""
+        victims = []
+        # Oldest access first, so idle sessions are always at the front.
+        while self._memory:
+            session_id, (last_access, data) = next(iter(self._memory.items()))
+            idle = self.idle_timeout and now - last_access > self.idle_timeout
+            if not idle and len(self._memory) <= self.max_active:
+                break
+            self._memory.popitem(last=False)
+            victims.append((session_id, last_access, data))
+        self._counters["evicted"] += len(victims)
+        return victims
+
+    def _put(self, session_id: str, data: Dict[str, Any], now: float) -> None:
+        with self._lock:
+            self._memory[session_id] = (now, data)
+            self._memory.move_to_end(session_id)
+            victims = self._evict_locked(now)
+        self._spill(victims)
+
+    # -- Public API -----------------------------------------------------------
+
+    def create(self, data: Optional[Dict[str, Any]] = None) -> str:
+        """Store ``data`` under a new random session ID and return the ID."""
+        session_id = uuid.uuid4().hex
+        with self._lock:
+            self._counters["created"] += 1
+        self._put(session_id, dict(data or {}), time.time())
+        return session_id
+
+    def get(self, session_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        The live session dict (mutations are kept), or ``None`` if the ID is
+        unknown or expired. Reloads spilled sessions from disk.
+        """
+        if not session_id:
+            return None
+        now = time.time()
+        with self._lock:
+            victims = self._evict_locked(now)
+            entry = self._memory.get(session_id)
+            if entry is not None:
+                self._memory[session_id] = (now, entry[1])
+                self._memory.move_to_end(session_id)
+                self._counters["memory_hits"] += 1
+        self._spill(victims)
+        if entry is not None:
+            return entry[1]
+
+        data = self._load(session_id, now)
+        with self._lock:
+            self._counters["disk_hits" if data is not None else "misses"] += 1
+        if data is not None:
+            self._put(session_id, data, now)
+        return data
+
+    @contextmanager
+    def locked(self, session_id: Optional[str]) -> Iterator[None]:
+        """
+        Hold the per‑session lock while reading and mutating the session.
+
+        A plain ``threading.Lock`` (not re‑entrant), so it may be released
+        from another worker thread, as happens when a Gradio generator is
+        resumed elsewhere. No‑op for an empty ID.
+        """
+        if not session_id:
+            yield
+            return
+        with self._lock:
+            entry = self._session_locks.get(session_id)
+            if entry is None:
+                entry = self._session_locks[session_id] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._session_locks[session_id]
+
+    def save(self, session_id: str, data: Dict[str, Any]) -> None:
+        """Store (or replace) the session and mark it as just used."""
+        self._put(session_id, data, time.time())
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._memory.pop(session_id, None)
+        try:
+            conn = self._conn()
+            if conn is not None:
+                with conn:
+                    conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        except sqlite3.Error as e:
+            print(f"Warning: session delete failed: {e}")
+
+    def evict_idle(self) -> int:
+        """Evict idle sessions now (normally done lazily on access)."""
+        with self._lock:
+            victims = self._evict_locked(time.time())
+        self._spill(victims)
+        return len(victims)
+
+    def flush(self) -> int:
+        """Write every in‑memory session to the SQLite spill (keeps them in memory)."""
+        if not self.db_path:
+            return 0
+        with self._lock:
+            sessions = [(sid, ts, data) for sid, (ts, data) in self._memory.items()]
+        self._spill(sessions)
+        return len(sessions)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._counters)
+            stats["active"] = len(self._memory)
+        return stats
+
+
+_STORE: Optional[SessionStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    """The process‑wide session store, configured from the environment."""
+    global _STORE
+    store = _STORE
+    if store is not None:
+        return store
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = SessionStore(
+                max_active=env_int("SESSION_MAX_ACTIVE", 1000),
+                idle_timeout=env_number("SESSION_IDLE_TIMEOUT", 1800.0),
+                disk_ttl=env_number("SESSION_DISK_TTL", 7 * 24 * 3600),
+                db_path=os.getenv("SESSION_STORE_DB", ""),
+            )
+            if _STORE.db_path:
+                atexit.register(_STORE.flush)
+        return _STORE
@@ -0,0 +1,153 @@
+"""
+Content‑addressed on‑disk cache for synthesised speech.
+
+Much of what the doctor says repeats across patients (fallback diagnoses,
+safety notes, triage suggestions), so audio is stored once per
+(normalised text, backend, voice, model, output format) and replayed
+without another TTS request. Each entry is one audio file named by the
+SHA‑256 key; reads refresh the file's mtime and, once the directory grows
+past its size limit, the least recently used files are deleted.
+
+Configuration (environment):
+
+- ``TTS_CACHE_DIR`` – cache directory (default ``tts_cache``); set to an
+  empty string to disable caching
+- ``TTS_CACHE_MAX_BYTES`` – size limit (default 256 MiB)
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import unicodedata
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.services.cache_service import content_key
+from app.services.config import env_int
+
+
+def normalize_tts_text(text: str) -> str:
+    """Canonical form used for keys: NFC, single spaces, trimmed."""
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+class AudioCache:
+    """
+    Size‑bounded LRU of audio files in one directory.
+
+    Parameters
+    ----------
+    directory:
+        Where audio files live; empty string disables the cache.
+    max_bytes:
+        Total size limit; ``0`` means unbounded.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024) -> None:
+        self.directory = Path(directory) if directory else None
+        self.max_bytes = max(0, int(max_bytes))
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+        self._counters: Dict[str, int] = {"hits": 0, "misses": 0, "sets": 0, "evictions": 0}
+
+    @staticmethod
+    def key(text: str, backend: str, voice: str, model: str, output_format: str) -> str:
+        return content_key(normalize_tts_text(text), backend, voice, model, output_format)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.audio"
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Cached audio for ``key`` or ``None``; a hit marks it recently used."""
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            audio = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            audio = None
+        with self._lock:
+            self._counters["hits" if audio is not None else "misses"] += 1
+        return audio
+
+    def set(self, key: str, audio: bytes) -> None:
+        """Store ``audio`` (atomically) and evict old entries if over the limit."""
+        if self.directory is None or not audio:
+            return
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self._path(key)
+            tmp = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+            tmp.write_bytes(audio)
+            try:
+                # Re‑synthesising a key replaces its file; count only the difference.
+                replaced = path.stat().st_size
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"Warning: TTS cache write failed: {e}")
+            return
+        with self._lock:
+            self._counters["sets"] += 1
+            if self._total_bytes is not None:
+                self._total_bytes += len(audio) - replaced
+            over = self.max_bytes and (self._total_bytes is None or self._total_bytes > self.max_bytes)
+        if over:
+            self._evict()
+
+    def _evict(self) -> None:
+        """Rescan the directory and delete least recently used files until under the limit."""
+        entries = []
+        for path in self.directory.glob("*.audio"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        if total > self.max_bytes:
+            # Leave some headroom so the next few writes do not rescan.
+            target = self.max_bytes * 0.9
+            for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+                if total <= target:
+                    break
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+                total -= size
+                evicted += 1
+        with self._lock:
+            self._total_bytes = total
+            self._counters["evictions"] += evicted
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._counters)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        return stats
+
+
+_CACHE: Optional[AudioCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_tts_cache() -> AudioCache:
+    """The process‑wide audio cache, configured from the environment."""
+    global _CACHE
+    cache = _CACHE
+    if cache is not None:
+        return cache
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = AudioCache(
+                os.getenv("TTS_CACHE_DIR", "tts_cache"),
+                max_bytes=env_int("TTS_CACHE_MAX_BYTES", 256 * 1024 * 1024),
+            )
+        return _CACHE
@@ -0,0 +1,85 @@
+"""
+Benchmark: full re‑render vs. bounded chat context over a long consultation.
+
+The legacy variant is the previous ``chat_callback`` prompt: the whole
+assessment plus every earlier exchange, re‑concatenated each turn. The
+bounded variant is :class:`ChatContext`. Reports prompt size (estimated
+tokens) and build time at a few turn numbers.
+
+    python benchmarks/bench_chat_context.py [--turns 100] [--repeat 200]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import timeit
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.prompts.doctor_chat_prompt import CHAT_INSTRUCTIONS, build_chat_preamble  # noqa: E402
+from app.services.chat_context import ChatContext, estimate_tokens  # noqa: E402
+
+ASSESSMENT: Dict[str, Any] = {
+    "diagnosis": "Plantar wart (verruca plantaris)",
+    "treatment": "Apply 17% salicylic acid daily after soaking; file the surface weekly.",
+    "medicine": ["Salicylic Acid (17%)", "Duct tape occlusion"],
+    "safety": "Seek care if it bleeds, spreads quickly or you have diabetes.",
+    "reasoning": "Black dots and interrupted skin lines on the sole.",
+    "image_summary": "Round 6 mm lesion on the heel with a rough, thickened surface. " * 20,
+    "transcript": "It hurts when I walk and it has been there for about two months.",
+}
+QUESTION = "Is it normal that the skin around it turned white after using the acid for a week?"
+REPLY = (
+    "Yes, some whitening of the treated skin is expected with salicylic acid. "
+    "Keep filing the softened skin gently and stop for a few days if it becomes sore. "
+    "If the area turns red, hot or starts to ooze, please see a clinician."
+)
+
+
+def legacy_prompt(history: List[List[str]], message: str) -> str:
+    """The pre‑ChatContext prompt, kept for comparison."""
+    conversation = ""
+    if len(history) > 1:
+        conversation = "\n\nPREVIOUS CONVERSATION:\n"
+        for user_msg, doctor_msg in history[:-1]:
+            conversation += f"Patient: {user_msg}\nDoctor: {doctor_msg}\n\n"
+    return (
+        build_chat_preamble(ASSESSMENT)
+        + conversation
+        + f"\nPATIENT'S CURRENT QUESTION:\n{message}\n\n"
+        + CHAT_INSTRUCTIONS
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    checkpoints = sorted({1, 10, args.turns // 2, args.turns})
+    history: List[List[str]] = [["", "Hello! How can I help you today?"]]
+    context = ChatContext(ASSESSMENT)
+    print(f"{'turn':>5} | {'legacy tok':>10} {'µs':>8} | {'bounded tok':>11} {'µs':>8}")
+    for turn in range(1, args.turns + 1):
+        if turn in checkpoints:
+            legacy_s = timeit.timeit(lambda: legacy_prompt(history, QUESTION), number=args.repeat)
+            bounded_s = timeit.timeit(lambda: context.build_prompt(QUESTION), number=args.repeat)
+            print(
+                f"{turn:>5} | {estimate_tokens(legacy_prompt(history, QUESTION)):>10} "
+                f"{legacy_s / args.repeat * 1e6:>8.1f} | "
+                f"{estimate_tokens(context.build_prompt(QUESTION)):>11} "
+                f"{bounded_s / args.repeat * 1e6:>8.1f}"
+            )
+        context.build_prompt(QUESTION)
+        history.append([QUESTION, REPLY])
+        context.add_turn(QUESTION, REPLY)
+    print(context.stats())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Benchmark and parity check: ``fuse_batch`` vs. row‑by‑row ``fuse``, and
+``compute_action_batch`` vs. row‑by‑row ``compute_action``.
+
+Builds random rows (confidences on both scales, rounding ties, missing
+values; summaries hitting the different fallback rules), checks that every
+element of ``fuse_batch`` equals the offline ``fuse`` result and every
+element of ``compute_action_batch`` equals ``compute_action`` for the same
+inputs, then times both. Exits non‑zero on any mismatch.
+
+    python benchmarks/bench_fuse_batch.py [--rows 3000] [--seed 0]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Any, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.confidence_service import compute_action, compute_action_batch  # noqa: E402
+from app.services.fusion_service import fuse, fuse_batch  # noqa: E402
+
+SUMMARIES = [
+    "A fluid-filled blister on the heel after friction from new shoes.",
+    "Plantar wart with tiny black dots on the sole of the foot.",
+    "Thickened skin on the toe, likely a callus or corn.",
+    "Several inflamed pimples on the forehead, consistent with acne.",
+    "An itchy red rash on the forearm.",
+    "No obvious abnormality visible.",
+]
+TRANSCRIPTS = ["", "It hurts when I walk.", "It has been there for months.", "I have a fever."]
+# Values that used to round differently under NumPy's float64 rounding.
+TIES: List[Any] = [75, 0.3, 0.675, 0.335, 0.005, 42.5, 0.125, 0.5, 100, 0]
+
+
+def _conf(rng: random.Random) -> Optional[Any]:
+    roll = rng.random()
+    if roll < 0.1:
+        return None
+    if roll < 0.15:
+        return "n/a"
+    if roll < 0.35:
+        return rng.choice(TIES)
+    if roll < 0.6:
+        return round(rng.uniform(0, 100), rng.choice([0, 1, 2]))
+    return round(rng.random(), rng.choice([2, 3]))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    summaries = [rng.choice(SUMMARIES) for _ in range(args.rows)]
+    transcripts = [rng.choice(TRANSCRIPTS) for _ in range(args.rows)]
+    image_confs = [_conf(rng) for _ in range(args.rows)]
+    transcript_confs = [_conf(rng) for _ in range(args.rows)]
+
+    started = time.perf_counter()
+    scalar = [
+        fuse(s, c, t, tc, llm_client=None)
+        for s, c, t, tc in zip(summaries, image_confs, transcripts, transcript_confs)
+    ]
+    scalar_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batch = fuse_batch(summaries, image_confs, transcripts, transcript_confs, processes=1)
+    batch_s = time.perf_counter() - started
+
+    mismatches = [
+        i for i, (a, b) in enumerate(zip(scalar, batch))
+        if {k: v for k, v in a.items() if k in b} != b
+    ]
+    for i in mismatches[:10]:
+        print(
+            f"  row {i}: image_conf={image_confs[i]!r} transcript_conf={transcript_confs[i]!r} "
+            f"fuse={scalar[i]['fusion_confidence']} fuse_batch={batch[i]['fusion_confidence']}"
+        )
+    print(f"{args.rows} rows: fuse {scalar_s * 1e3:.1f} ms, fuse_batch {batch_s * 1e3:.1f} ms")
+    print(f"{len(mismatches)}/{args.rows} rows differ")
+
+    # Triage on top of the fused confidences, as rescore_service does.
+    fusion_confs = [row["fusion_confidence"] for row in scalar]
+    conflicts = [rng.random() < 0.2 for _ in range(args.rows)]
+    started = time.perf_counter()
+    scalar_actions = [
+        compute_action(f, i, t, None, c)
+        for f, i, t, c in zip(fusion_confs, image_confs, transcript_confs, conflicts)
+    ]
+    scalar_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batch_actions = compute_action_batch(fusion_confs, image_confs, transcript_confs, conflicts)
+    batch_s = time.perf_counter() - started
+
+    action_mismatches = [
+        i for i, action in enumerate(scalar_actions)
+        if action["final_confidence"] != float(batch_actions["final_confidence"][i])
+        or action["triage_action"] != str(batch_actions["triage_action"][i])
+    ]
+    for i in action_mismatches[:10]:
+        print(
+            f"  row {i}: fusion={fusion_confs[i]!r} image_conf={image_confs[i]!r} "
+            f"transcript_conf={transcript_confs[i]!r} compute_action={scalar_actions[i]} "
+            f"batch={float(batch_actions['final_confidence'][i])}, "
+            f"{batch_actions['triage_action'][i]}"
+        )
+    print(
+        f"{args.rows} rows: compute_action {scalar_s * 1e3:.1f} ms, "
+        f"compute_action_batch {batch_s * 1e3:.1f} ms"
+    )
+    print(f"{len(action_mismatches)}/{args.rows} triage rows differ")
+    return 1 if mismatches or action_mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
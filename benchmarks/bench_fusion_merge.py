@@ -0,0 +1,87 @@
+"""
+Benchmark: eager vs. lazy fallback on the successful LLM path of ``fuse``.
+
+The eager variant is the previous ``_merge_llm_result``: build the whole
+fallback plan, then take the keys the LLM omitted. The lazy variant is the
+current one, which only builds missing fields and takes the cheap path for
+``simple_findings`` / ``fusion_confidence``.
+
+    python benchmarks/bench_fusion_merge.py [--repeat 5000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import timeit
+from typing import Any, Dict, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.fusion_service import _fallback_plan, _merge_llm_result  # noqa: E402
+
+
+def eager_merge(
+    parsed: Dict[str, Any],
+    raw_output: Any,
+    image_summary: str,
+    transcript: str,
+    history_summary: Optional[str],
+    img_conf: float,
+    txt_conf: float,
+) -> Dict[str, Any]:
+    """The pre‑lazy implementation, kept for comparison."""
+    fallback = _fallback_plan(image_summary, transcript, history_summary, img_conf, txt_conf)
+
+    def _get(key: str) -> Any:
+        value = parsed.get(key)
+        return value if value not in (None, "") else fallback[key]
+
+    return {
+        "preliminary_diagnosis": _get("preliminary_diagnosis"),
+        "reasoning": _get("reasoning"),
+        "recommended_treatment": _get("recommended_treatment"),
+        "medicine_constituents": _get("medicine_constituents"),
+        "safety_notes": _get("safety_notes"),
+        "fusion_confidence": fallback["fusion_confidence"],
+        "llm_raw_output": raw_output,
+        "simple_findings": fallback["simple_findings"],
+    }
+
+
+IMAGE_SUMMARY = (
+    "1. IMAGE TYPE & LOCATION: photograph of the sole of the right foot near the heel. "
+    "2. SPECIFIC VISUAL FINDINGS: a round lesion about 6 mm across with a rough, "
+    "thickened surface and several tiny black dots, rim of callused skin, no fluid. "
+    "3. DIFFERENTIAL CONSIDERATIONS: plantar wart (verruca), callus, corn. "
+) * 4
+TRANSCRIPT = "It hurts when I walk and it has been there for about two months."
+
+COMPLETE = {
+    "preliminary_diagnosis": "Plantar wart",
+    "reasoning": "Black dots and interrupted skin lines.",
+    "recommended_treatment": "Salicylic acid daily.",
+    "medicine_constituents": ["Salicylic Acid (17%)"],
+    "safety_notes": "Seek care if it bleeds.",
+}
+PARTIAL = {"preliminary_diagnosis": "Plantar wart", "reasoning": "Black dots."}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5000)
+    args = parser.parse_args()
+
+    args_common = ("raw", IMAGE_SUMMARY, TRANSCRIPT, "No prior history.", 0.8, 0.7)
+    _merge_llm_result(COMPLETE, *args_common)  # load matcher + knowledge base
+    print(f"summary {len(IMAGE_SUMMARY)} chars, {args.repeat} rounds")
+    for label, parsed in (("complete LLM response", COMPLETE), ("partial LLM response", PARTIAL)):
+        for name, fn in (("eager", eager_merge), ("lazy", _merge_llm_result)):
+            seconds = timeit.timeit(lambda: fn(parsed, *args_common), number=args.repeat)
+            print(f"{label:>22} / {name:<5}: {seconds / args.repeat * 1e6:8.2f} µs/merge")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
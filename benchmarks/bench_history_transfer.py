@@ -0,0 +1,103 @@
+"""
+Round‑trip check and benchmark: export visits, import them into a fresh DB.
+
+Copies the history DB to a temp directory, archives every raw LLM output
+(``archive_raw_outputs``) so the archive path is exercised, exports to
+JSONL.gz (and Parquet when ``pyarrow`` is installed) and imports each file
+into an empty DB, once keeping ids and once assigning new ones. Every
+visit column, the decoded fusion result, the ``raw_archived`` flag and the
+archived raw output must survive; exits non‑zero on any difference.
+
+    python benchmarks/bench_history_transfer.py [--db patient_history.db] [--batch-size 7]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import history_service, history_transfer  # noqa: E402
+
+COLUMNS = (
+    "patient_id, timestamp, visited_at, transcript, image_summary, diagnosis, "
+    "triage_action, final_confidence, fusion_confidence, image_conf, "
+    "transcript_conf, fusion_source, raw_archived"
+)
+
+
+def snapshot(db_path: Path) -> List[Tuple[Any, ...]]:
+    """Every visit in id order, with decoded payloads and its archive entry."""
+    history_service.DB_PATH = db_path
+    rows = history_service._get_conn().execute(
+        f"""
+        SELECT {COLUMNS}, v.fusion_result_json, v.fusion_result_z,
+               a.archived_at, a.llm_raw_output_z
+        FROM visits v LEFT JOIN visits_archive a ON a.visit_id = v.id
+        ORDER BY v.id
+        """
+    ).fetchall()
+    return [
+        (
+            *row[:-4],
+            history_service._decode_fusion_result(row[-4], row[-3]),
+            row[-2],
+            history_service._decode_archived_raw(row[-1]),
+        )
+        for row in rows
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", default=os.getenv("PATIENT_HISTORY_DB", "patient_history.db"))
+    # Small default so the archived rows land in several chunks.
+    parser.add_argument("--batch-size", type=int, default=7)
+    args = parser.parse_args()
+    if not os.path.exists(args.db):
+        print(f"{args.db} not found")
+        return 1
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "source.db"
+        shutil.copyfile(args.db, source)
+        history_service.DB_PATH = source
+        archived = history_service.archive_raw_outputs(older_than_days=0)["rows_archived"]
+        expected = snapshot(source)
+        print(f"{len(expected)} visits, {archived} raw outputs archived")
+
+        formats = ["jsonl"] + (["parquet"] if history_transfer.pa is not None else [])
+        for fmt in formats:
+            export_path = Path(tmp) / ("visits.jsonl.gz" if fmt == "jsonl" else "visits.parquet")
+            history_service.DB_PATH = source
+            exported = history_transfer.export_visits(export_path, batch_size=args.batch_size)
+            print(f"{fmt:>8} export: {exported['rows']} rows, {exported['rows_per_second']} rows/s")
+            for keep_ids in (True, False):
+                target = Path(tmp) / f"target-{fmt}-{keep_ids}.db"
+                history_service.DB_PATH = target
+                imported = history_transfer.import_visits(
+                    export_path, batch_size=args.batch_size, keep_ids=keep_ids
+                )
+                actual = snapshot(target)
+                differing = sum(a != e for a, e in zip(actual, expected))
+                differing += abs(len(actual) - len(expected))
+                restored = sum(row[-1] is not None for row in actual)
+                print(
+                    f"{fmt:>8} import (keep_ids={keep_ids}): {imported['rows']} rows, "
+                    f"{imported['rows_per_second']} rows/s, {restored} archived outputs, "
+                    f"{differing} visits differ"
+                )
+                failures += differing
+    history_service.close_connections()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+Benchmark: compiled keyword matcher vs. the original substring scans.
+
+Runs both extractors over long vision‑style summaries (taken from
+``patient_history.db`` when present, otherwise synthetic) and reports the
+time per call plus how many texts the two disagree on (the new matcher is
+word‑bounded, so "red" in "covered" no longer counts).
+
+    python benchmarks/bench_keyword_matcher.py [--repeat 2000] [--db patient_history.db]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sqlite3
+import sys
+import timeit
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.fusion_service import _extract_simple_findings  # noqa: E402
+from app.services.keyword_matcher import get_findings_matcher  # noqa: E402
+
+
+def legacy_extract_simple_findings(text: str) -> Dict[str, bool]:
+    """The pre‑matcher implementation, kept verbatim for comparison."""
+    text_lower = (text or "").lower()
+    return {
+        "acne": any(k in text_lower for k in ["acne", "pimple", "pimples", "zit"]),
+        "rash": "rash" in text_lower,
+        "redness": "red" in text_lower or "inflamed" in text_lower,
+        "itch": "itch" in text_lower or "itchy" in text_lower,
+        "pain": "pain" in text_lower or "tender" in text_lower,
+        "fever": "fever" in text_lower,
+        "trauma": any(k in text_lower for k in ["injury", "trauma", "hit", "fall"]),
+        "chronic": any(k in text_lower for k in ["months", "years", "chronic"]),
+        "blister": any(k in text_lower for k in ["blister", "fluid-filled", "friction"]),
+        "wart": any(k in text_lower for k in ["wart", "verruca", "plantar wart"]),
+        "callus": any(k in text_lower for k in ["callus", "thickened skin", "corn"]),
+        "foot": any(k in text_lower for k in ["foot", "plantar", "sole", "heel", "toe"]),
+    }
+
+
+def legacy_fallback_keywords(text: str) -> Dict[str, bool]:
+    """Keyword work of the old ``_fallback_plan``: extraction plus its extra scans."""
+    findings = legacy_extract_simple_findings(text)
+    findings["_fluid"] = "blister" in text.lower() or "fluid" in text.lower()
+    findings["_wart"] = (
+        "wart" in text.lower() or "verruca" in text.lower() or "black dots" in text.lower()
+    )
+    findings["_callus"] = "callus" in text.lower() or "thickened" in text.lower()
+    findings["_acne"] = "acne" in text.lower()
+    findings["_blister_note"] = "blister" in text.lower()
+    findings["_wart_note"] = "wart" in text.lower()
+    return findings
+
+
+_SYNTHETIC = (
+    "1. ANATOMICAL LOCATION: The sole of the right foot near the heel. "
+    "2. SPECIFIC VISUAL FINDINGS: a circular lesion roughly 6 mm across with a "
+    "rough, thickened surface and several tiny black dots, surrounded by a thin "
+    "rim of callused skin. The covered area shows no fluid or blistering and the "
+    "white border is well defined. 3. COLOR AND TEXTURE: skin‑coloured to greyish "
+    "with a cauliflower‑like texture. 4. SIZE AND DISTRIBUTION: single lesion. "
+    "5. DIFFERENTIAL CONSIDERATIONS: plantar wart (verruca), callus, corn. "
+)
+
+
+def load_texts(db_path: str) -> List[str]:
+    texts: List[str] = []
+    if db_path and os.path.exists(db_path):
+        conn = sqlite3.connect(db_path)
+        try:
+            rows = conn.execute(
+                "SELECT image_summary, transcript FROM visits WHERE image_summary IS NOT NULL"
+            ).fetchall()
+        except sqlite3.Error:
+            rows = []
+        finally:
+            conn.close()
+        texts = [" ".join(filter(None, row)) for row in rows if row[0]]
+    if not texts:
+        texts = [_SYNTHETIC * 4]
+    return texts
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--db", default=os.getenv("PATIENT_HISTORY_DB", "patient_history.db"))
+    args = parser.parse_args()
+
+    texts = load_texts(args.db)
+    avg_len = sum(map(len, texts)) / len(texts)
+    print(f"{len(texts)} texts, average {avg_len:.0f} chars, {args.repeat} rounds")
+
+    matcher = get_findings_matcher()  # compile outside the timing
+    for name, fn in (
+        ("legacy findings", legacy_extract_simple_findings),
+        ("matcher findings", _extract_simple_findings),
+        ("legacy fallback keywords", legacy_fallback_keywords),
+        ("matcher findings + cues", matcher.match),
+    ):
+        seconds = timeit.timeit(lambda: [fn(t) for t in texts], number=args.repeat)
+        per_call = seconds / (args.repeat * len(texts)) * 1e6
+        print(f"{name:>24}: {per_call:8.2f} µs/call")
+
+    differing = 0
+    for text in texts:
+        old, new = legacy_extract_simple_findings(text), _extract_simple_findings(text)
+        changed = sorted(k for k in old if old[k] != new.get(k))
+        if changed:
+            differing += 1
+            print(f"  differs on {changed}: {text[:70]!r}…")
+    print(f"{differing}/{len(texts)} texts classified differently")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
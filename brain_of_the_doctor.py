@@ -12,18 +12,27 @@ but the recommended entry point for the app is now
 
 import base64
 import os
+import time
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
 
 try:
     # Optional – the app can run without Groq installed.
-    from groq import Groq  # type: ignore
+    from groq import AsyncGroq, Groq  # type: ignore
 except Exception:  # pragma: no cover - optional dependency
+    AsyncGroq = None
     Groq = None
 
-from app.services.fusion_service import fuse
+from app.services.client_registry import get_async_groq_client, get_groq_client
+from app.services.fusion_service import fuse, fuse_async
+from app.services.image_service import prepare_image, sniff_mime_type
 from app.services.confidence_service import compute_action
-from app.services.history_service import get_history_summary, save_visit
+from app.services.history_service import (
+    get_history_summary,
+    get_history_summary_async,
+    save_visit,
+    save_visit_async,
+)
 
 
 GROQ_API_KEY = os.environ.get("GROQ_API_KEY")
@@ -54,8 +63,14 @@ class GroqLLMClient:
         if not self.api_key:
             raise ValueError("GROQ_API_KEY must be set")
         
-        self.client = Groq(api_key=self.api_key)
+        # Resolved lazily from the shared keep-alive pool, so a wrapper keeps
+        # working after configure_pool() / close_clients() replace the client.
         self.model = model
+        self.temperature = 0.3  # Lower temperature for more consistent, accurate responses
+
+    @property
+    def client(self) -> Any:
+        return get_groq_client(self.api_key)
     
     def generate(self, prompt: str) -> str:
         """
@@ -71,67 +86,192 @@ class GroqLLMClient:
             # Try with JSON mode first (if supported by model)
             try:
                 chat_completion = self.client.chat.completions.create(
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": "You are a medical expert. Always respond with valid JSON only, no markdown, no code blocks, just pure JSON."
-                        },
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ],
+                    messages=_json_messages(prompt, JSON_SYSTEM_PROMPT),
                     model=self.model,
-                    temperature=0.3,  # Lower temperature for more consistent, accurate responses
+                    temperature=self.temperature,
                     response_format={"type": "json_object"}  # Force JSON output
                 )
             except Exception:
                 # Fallback if JSON mode not supported
                 chat_completion = self.client.chat.completions.create(
-    messages=[
-                        {
-                            "role": "system",
-                            "content": "You are a medical expert. CRITICAL: Respond ONLY with valid JSON. No markdown, no code blocks, no explanations before or after. Just pure JSON starting with { and ending with }."
-                        },
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ],
+                    messages=_json_messages(prompt, STRICT_JSON_SYSTEM_PROMPT),
                     model=self.model,
-                    temperature=0.3,
+                    temperature=self.temperature,
                 )
             
-            response = chat_completion.choices[0].message.content
-            
-            # Clean up response - remove markdown code blocks if present
-            response = response.strip()
-            if response.startswith("```json"):
-                response = response[7:]  # Remove ```json
-            if response.startswith("```"):
-                response = response[3:]   # Remove ```
-            if response.endswith("```"):
-                response = response[:-3]  # Remove trailing ```
-            response = response.strip()
-            
-            return response
+            return _clean_json_response(chat_completion.choices[0].message.content)
+        except Exception as e:
+            raise Exception(f"Groq LLM generation failed: {str(e)}")
+
+    def generate_stream(self, prompt: str, system_prompt: Optional[str] = None) -> Iterator[str]:
+        """
+        Stream a plain‑text reply (no JSON mode) as it is generated.
+
+        Yields the text deltas in order; joining them gives the full reply.
+        Used by the chat so the patient sees the first words as soon as the
+        model produces them.
+        """
+        try:
+            stream = self.client.chat.completions.create(
+                messages=_json_messages(prompt, system_prompt or CHAT_SYSTEM_PROMPT),
+                model=self.model,
+                temperature=self.temperature,
+                stream=True,
+            )
+            for chunk in stream:
+                delta = _chunk_text(chunk)
+                if delta:
+                    yield delta
+        except Exception as e:
+            raise Exception(f"Groq LLM streaming failed: {str(e)}")
+
+
+class AsyncGroqLLMClient:
+    """
+    Async twin of ``GroqLLMClient`` built on ``groq.AsyncGroq``.
+
+    ``generate`` is a coroutine, so ``fuse_async`` awaits it directly and many
+    consultations can share one event loop instead of pinning worker threads.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, model: str = "meta-llama/llama-4-maverick-17b-128e-instruct"):
+        if AsyncGroq is None:
+            raise ValueError("Groq library is not installed")
+
+        self.api_key = api_key or GROQ_API_KEY
+        if not self.api_key:
+            raise ValueError("GROQ_API_KEY must be set")
+
+        # Resolved lazily: the pooled async client is bound to the running loop.
+        self.model = model
+        self.temperature = 0.3
+
+    @property
+    def client(self) -> Any:
+        return get_async_groq_client(self.api_key)
+
+    async def generate(self, prompt: str) -> str:
+        """Generate response from prompt. Returns JSON string."""
+        try:
+            try:
+                chat_completion = await self.client.chat.completions.create(
+                    messages=_json_messages(prompt, JSON_SYSTEM_PROMPT),
+                    model=self.model,
+                    temperature=self.temperature,
+                    response_format={"type": "json_object"},
+                )
+            except Exception:
+                chat_completion = await self.client.chat.completions.create(
+                    messages=_json_messages(prompt, STRICT_JSON_SYSTEM_PROMPT),
+                    model=self.model,
+                    temperature=self.temperature,
+                )
+
+            return _clean_json_response(chat_completion.choices[0].message.content)
         except Exception as e:
             raise Exception(f"Groq LLM generation failed: {str(e)}")
 
+    async def generate_stream(self, prompt: str, system_prompt: Optional[str] = None) -> AsyncIterator[str]:
+        """Async twin of ``GroqLLMClient.generate_stream``."""
+        try:
+            stream = await self.client.chat.completions.create(
+                messages=_json_messages(prompt, system_prompt or CHAT_SYSTEM_PROMPT),
+                model=self.model,
+                temperature=self.temperature,
+                stream=True,
+            )
+            async for chunk in stream:
+                delta = _chunk_text(chunk)
+                if delta:
+                    yield delta
+        except Exception as e:
+            raise Exception(f"Groq LLM streaming failed: {str(e)}")
+
+
+class FakeStreamingLLMClient:
+    """
+    Offline stand‑in for the Groq clients that replays a canned reply.
+
+    ``generate_stream`` yields it word by word (with an optional per‑chunk
+    ``delay`` in seconds) so the streaming chat can be exercised without an
+    API key or network access. Set ``FAKE_LLM_RESPONSE`` to have the Gradio
+    app use it.
+    """
+
+    def __init__(self, response: str, delay: float = 0.0):
+        self.response = response
+        self.delay = delay
+
+    def generate(self, prompt: str) -> str:
+        return self.response
+
+    def generate_stream(self, prompt: str, system_prompt: Optional[str] = None) -> Iterator[str]:
+        for i, word in enumerate(self.response.split(" ")):
+            if self.delay:
+                time.sleep(self.delay)
+            yield word if i == 0 else " " + word
+
+
+JSON_SYSTEM_PROMPT = "You are a medical expert. Always respond with valid JSON only, no markdown, no code blocks, just pure JSON."
+STRICT_JSON_SYSTEM_PROMPT = "You are a medical expert. CRITICAL: Respond ONLY with valid JSON. No markdown, no code blocks, no explanations before or after. Just pure JSON starting with { and ending with }."
+CHAT_SYSTEM_PROMPT = "You are a caring, professional medical doctor talking with a patient. Reply in plain conversational text only: no JSON, no code blocks."
+
+
+def _json_messages(prompt: str, system_prompt: str) -> list:
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def _chunk_text(chunk: Any) -> str:
+    """Text delta of one streamed completion chunk (empty for role/stop chunks)."""
+    try:
+        return chunk.choices[0].delta.content or ""
+    except (AttributeError, IndexError):
+        return ""
+
+
+def _clean_json_response(response: str) -> str:
+    """Remove markdown code fences some models wrap around JSON."""
+    response = response.strip()
+    if response.startswith("```json"):
+        response = response[7:]  # Remove ```json
+    if response.startswith("```"):
+        response = response[3:]   # Remove ```
+    if response.endswith("```"):
+        response = response[:-3]  # Remove trailing ```
+    return response.strip()
+
 
 def encode_image(image_path: str) -> str:
-    """Convert an image file to base64 string."""
-    with open(image_path, "rb") as image_file:
-        return base64.b64encode(image_file.read()).decode("utf-8")
+    """
+    Convert an image file to base64 string.
+
+    The image is pre-processed first (EXIF orientation, downscale,
+    re-encode to a size budget); see ``app.services.image_service``.
+    """
+    return prepare_image(image_path)["base64"]
+
+
+def _mime_type_of(encoded_image: str) -> str:
+    """Sniff the real image type from the first base64 characters."""
+    try:
+        return sniff_mime_type(base64.b64decode(encoded_image[:24]))
+    except Exception:
+        return "image/jpeg"
 
 
 # --- Legacy single‑shot image + text analysis ---------------------------------
 
 QUERY_DEFAULT = "Is there something wrong with my face?"
+OFFLINE_VISION_MESSAGE = "Image analysis model is not configured; using offline fallback description only."
 MODEL_DEFAULT = "meta-llama/llama-4-maverick-17b-128e-instruct"  # Maverick for superior medical accuracy
 
 
-def analyze_image_with_query(query: str, model: str, encoded_image: str) -> str:
+def analyze_image_with_query(
+    query: str, model: str, encoded_image: str, mime_type: Optional[str] = None
+) -> str:
     """
     Backwards‑compatible Groq multimodal call.
 
@@ -139,27 +279,51 @@ def analyze_image_with_query(query: str, model: str, encoded_image: str) -> str:
     that imports and simple runs do not fail when offline.
     """
     if Groq is None:
-        return "Image analysis model is not configured; using offline fallback description only."
+        return OFFLINE_VISION_MESSAGE
 
     api_key = GROQ_API_KEY
     if not api_key or api_key == "your_groq_api_key_here" or api_key == "":
         raise ValueError("GROQ_API_KEY must be set in environment or .env file")
     
-    client = Groq(api_key=api_key)
-    messages = [
+    client = get_groq_client(api_key)
+    chat_completion = client.chat.completions.create(
+        messages=_vision_messages(query, encoded_image, mime_type), model=model
+    )
+    return chat_completion.choices[0].message.content
+
+
+async def analyze_image_with_query_async(
+    query: str, model: str, encoded_image: str, mime_type: Optional[str] = None
+) -> str:
+    """Async variant of :func:`analyze_image_with_query`."""
+    if AsyncGroq is None:
+        return OFFLINE_VISION_MESSAGE
+
+    api_key = GROQ_API_KEY
+    if not api_key or api_key == "your_groq_api_key_here" or api_key == "":
+        raise ValueError("GROQ_API_KEY must be set in environment or .env file")
+
+    client = get_async_groq_client(api_key)
+    chat_completion = await client.chat.completions.create(
+        messages=_vision_messages(query, encoded_image, mime_type), model=model
+    )
+    return chat_completion.choices[0].message.content
+
+
+def _vision_messages(query: str, encoded_image: str, mime_type: Optional[str]) -> list:
+    mime_type = mime_type or _mime_type_of(encoded_image)
+    return [
         {
             "role": "user",
             "content": [
                 {"type": "text", "text": query},
                 {
                     "type": "image_url",
-                    "image_url": {"url": f"data:image/jpeg;base64,{encoded_image}"},
+                    "image_url": {"url": f"data:{mime_type};base64,{encoded_image}"},
                 },
             ],
         }
     ]
-    chat_completion = client.chat.completions.create(messages=messages, model=model)
-    return chat_completion.choices[0].message.content
 
 
 # --- New fused multimodal assessment -----------------------------------------
@@ -171,16 +335,20 @@ def get_multimodal_assessment(
     transcript_conf: float,
     patient_id: Optional[str] = None,
     llm_client: Optional[Any] = None,
+    history_summary: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
     High‑level helper used by the Gradio app and local API.
 
-    - Pulls a brief history summary from SQLite
+    - Pulls a brief history summary from SQLite unless the caller already
+      fetched it, e.g. concurrently with transcription (``None`` means it
+      did not; a timed‑out lookup passes a fallback string instead)
     - Calls the fusion service (LLM optional)
     - Computes a simple triage / follow‑up action
     - Persists the visit for future history conditioning
     """
-    history_summary = get_history_summary(patient_id)
+    if history_summary is None:
+        history_summary = get_history_summary(patient_id)
 
     fusion_result = fuse(
         image_summary=image_summary,
@@ -206,6 +374,9 @@ def get_multimodal_assessment(
         image_summary=image_summary,
         fusion_result=fusion_result,
         timestamp=datetime.utcnow().isoformat(timespec="seconds"),
+        action_result=action_result,
+        image_conf=image_conf,
+        transcript_conf=transcript_conf,
     )
 
     return {
@@ -214,3 +385,55 @@ def get_multimodal_assessment(
         "history_summary": history_summary,
     }
 
+
+async def get_multimodal_assessment_async(
+    image_summary: str,
+    image_conf: float,
+    transcript: str,
+    transcript_conf: float,
+    patient_id: Optional[str] = None,
+    llm_client: Optional[Any] = None,
+    history_summary: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Async counterpart of :func:`get_multimodal_assessment`.
+
+    History reads/writes run off the event loop and ``llm_client`` may be
+    an ``AsyncGroqLLMClient``; the returned dict is identical.
+    """
+    if history_summary is None:
+        history_summary = await get_history_summary_async(patient_id)
+
+    fusion_result = await fuse_async(
+        image_summary=image_summary,
+        image_conf=image_conf,
+        transcript=transcript,
+        transcript_conf=transcript_conf,
+        history_summary=history_summary,
+        llm_client=llm_client,
+    )
+
+    action_result = compute_action(
+        fusion_conf=fusion_result.get("fusion_confidence", 0.5),
+        image_conf=image_conf,
+        transcript_conf=transcript_conf,
+        fused_findings=fusion_result.get("simple_findings"),
+        conflict_flag=False,
+    )
+
+    await save_visit_async(
+        patient_id=patient_id,
+        transcript=transcript,
+        image_summary=image_summary,
+        fusion_result=fusion_result,
+        timestamp=datetime.utcnow().isoformat(timespec="seconds"),
+        action_result=action_result,
+        image_conf=image_conf,
+        transcript_conf=transcript_conf,
+    )
+
+    return {
+        "fusion_result": fusion_result,
+        "action_result": action_result,
+        "history_summary": history_summary,
+    }
@@ -3,17 +3,33 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+import asyncio
 import os
+import threading
+import time
 
 import gradio as gr
 
 from app import api_local
-from brain_of_the_doctor import GroqLLMClient
-from voice_of_the_doctor import text_to_speech_with_elevenlabs
+from app.services.chat_context import ChatContext
+from app.services.config import env_number
+from app.services.confidence_service import ACTION_MONITOR, ACTION_REVIEW, ACTION_ROUTINE
+from app.services.fallback_kb import get_fallback_kb
+from app.services.session_store import get_session_store
+from brain_of_the_doctor import AsyncGroqLLMClient, FakeStreamingLLMClient, GroqLLMClient
+from voice_of_the_doctor import prewarm_tts_cache, text_to_speech_stream_async
+
+# Minimum seconds between chat UI updates while a reply streams in; tokens
+# arriving faster than this are coalesced into one update.
+CHAT_STREAM_INTERVAL = env_number("CHAT_STREAM_INTERVAL", 0.05)
 
 
 def _get_llm_client():
     """Create LLM client if API key is available, otherwise return None."""
+    fake_response = os.environ.get("FAKE_LLM_RESPONSE")
+    if fake_response:
+        # Local testing of the streaming chat without a Groq key.
+        return FakeStreamingLLMClient(fake_response, delay=0.05)
     try:
         api_key = os.environ.get("GROQ_API_KEY")
         if api_key and api_key != "your_groq_api_key_here":
@@ -23,28 +39,82 @@ def _get_llm_client():
     return None
 
 
-def _format_doctor_text(fusion_result, action_result):
-    """Compose a concise, patient‑facing text answer."""
+def _get_async_llm_client():
+    """Async LLM client for awaited callbacks, or None in fallback mode."""
+    try:
+        api_key = os.environ.get("GROQ_API_KEY")
+        if api_key and api_key != "your_groq_api_key_here":
+            return AsyncGroqLLMClient(api_key=api_key)
+    except Exception as e:
+        print(f"Could not create LLM client: {e}. Using fallback mode.")
+    return None
+
+
+def _doctor_speech_segments(fusion_result, action_result):
+    """
+    The patient‑facing answer as separate segments (diagnosis and plan,
+    safety note, triage suggestion). They are spoken, and cached, one by one,
+    so recurring segments are reused across patients.
+    """
     if not fusion_result:
-        return "I could not generate an assessment from the information provided."
+        return ["I could not generate an assessment from the information provided."]
 
     diag = fusion_result.get("preliminary_diagnosis", "")
     plan = fusion_result.get("recommended_treatment", "")
     safety = fusion_result.get("safety_notes", "")
     triage = action_result.get("triage_action", "monitor_closely_and_seek_care_if_worse")
 
-    return (
-        f"{diag} {plan} "
-        f"Please also keep in mind: {safety} "
-        f"(Overall suggestion: {triage.replace('_', ' ')}.)"
-    )
+    return [
+        f"{diag} {plan}",
+        f"Please also keep in mind: {safety}",
+        f"(Overall suggestion: {triage.replace('_', ' ')}.)",
+    ]
+
+
+def _format_doctor_text(fusion_result, action_result):
+    """Compose a concise, patient‑facing text answer."""
+    return " ".join(_doctor_speech_segments(fusion_result, action_result))
+
+
+def _canned_speech():
+    """Every answer the offline fallback can give, for TTS cache prewarming."""
+    kb = get_fallback_kb()
+    actions = (ACTION_ROUTINE, ACTION_MONITOR, ACTION_REVIEW)
+    return [
+        _doctor_speech_segments(
+            {
+                "preliminary_diagnosis": condition.preliminary_diagnosis,
+                "recommended_treatment": condition.recommended_treatment,
+                "safety_notes": note.text,
+            },
+            {"triage_action": action},
+        )
+        for condition in kb.conditions
+        for note in kb.safety_notes
+        for action in actions
+    ]
+
+
+def _prewarm_tts():
+    try:
+        print(f"TTS cache prewarmed: {prewarm_tts_cache(_canned_speech())}")
+    except Exception as e:
+        print(f"TTS cache prewarm failed: {e}")
 
 
-def submit_callback(audio_filepath, image_filepath, patient_id, session_state):
+async def submit_callback(audio_filepath, image_filepath, patient_id, session_id):
+    """
+    Run the assessment, then stream the spoken answer.
+
+    An async generator: the first update fills in every text output, the
+    following ones only push MP3 chunks to the streaming ``voice_out``.
+    """
     # Try to use LLM if available, otherwise use fallback
-    llm_client = _get_llm_client()
+    llm_client = _get_async_llm_client()
     
-    result = api_local.submit_record(
+    # Awaiting the async pipeline keeps Gradio worker threads free while
+    # the Groq / SQLite calls are in flight.
+    result = await api_local.submit_record_async(
         audio_filepath=audio_filepath,
         image_filepath=image_filepath,
         patient_id=patient_id or None,
@@ -90,17 +160,15 @@ def submit_callback(audio_filepath, image_filepath, patient_id, session_state):
     new_state["chat_history"] = [
         ["", initial_greeting]
     ]
+    new_state["chat_context"] = ChatContext(new_state["initial_assessment"])
 
-    # Prepare voice output.
-    audio_output_path = None
-    try:
-        audio_output_path = text_to_speech_with_elevenlabs(
-            input_text=doctor_text, output_filepath="final.mp3"
-        )
-    except Exception:
-        audio_output_path = None
+    # The consultation lives server-side; the browser only keeps its ID.
+    # Waiting for the session lock (held by a chat reply still streaming)
+    # happens in a worker thread so the event loop stays free.
+    session_id = await asyncio.to_thread(_store_consultation, session_id, new_state)
 
-    return (
+    # Show the text results right away; the voice follows as it is synthesised.
+    yield (
         transcript,
         doctor_text,
         treatment,
@@ -109,92 +177,111 @@ def submit_callback(audio_filepath, image_filepath, patient_id, session_state):
         action_result.get("final_confidence", 0.0),
         action_result.get("triage_action", ""),
         new_state["chat_history"],  # Return chat history for chatbot
-        audio_output_path,
-        new_state,
+        None,
+        session_id,
     )
 
+    # Stream voice output sentence by sentence to the streaming audio player.
+    try:
+        speech = _doctor_speech_segments(fusion_result, action_result)
+        async for audio_chunk in text_to_speech_stream_async(speech):
+            yield {voice_out: audio_chunk}
+    except Exception as e:
+        print(f"Streaming TTS failed: {e}")
+
+
+def _store_consultation(session_id, new_state):
+    """
+    Save a new consultation under ``session_id`` (or a new ID) and return
+    the ID. Takes the session lock, so a chat turn still streaming for the
+    old consultation finishes and saves first instead of overwriting this.
+    """
+    store = get_session_store()
+    with store.locked(session_id):
+        if session_id:
+            store.save(session_id, new_state)
+            return session_id
+        return store.create(new_state)
+
+
+def chat_callback(message, session_id):
+    """
+    Handle real-time chat with the doctor.
+
+    A generator: the doctor's reply is streamed into the chatbot as the LLM
+    produces it, so the patient sees the first words right away instead of
+    waiting for the whole completion. The conversation is read from and
+    kept in the server-side session store; the session is locked for the
+    whole turn, so a double submit or a second tab waits for this reply
+    instead of interleaving with it.
+    """
+    store = get_session_store()
+    with store.locked(session_id):
+        yield from _chat_turn(store, message, session_id)
+
+
+def _chat_turn(store, message, session_id):
+    """One chat turn; the caller holds the session lock."""
+    session_state = store.get(session_id)
+    chat_history = session_state.get("chat_history", []) if session_state else []
 
-def chat_callback(message, chat_history, session_state):
-    """Handle real-time chat with the doctor."""
     if not message or not message.strip():
-        return chat_history, session_state
+        yield chat_history
+        return
     
     if not session_state or not session_state.get("initial_assessment"):
-        # No initial assessment yet, ask user to submit first
-        chat_history.append([message, "Please first submit your medical image and/or audio description for analysis."])
-        return chat_history, session_state
+        # No initial assessment yet (or the session expired), ask user to submit first
+        if session_id and session_state is None:
+            reply = "Your consultation session has expired. Please submit your medical image and/or audio description again."
+        else:
+            reply = "Please first submit your medical image and/or audio description for analysis."
+        yield chat_history + [[message, reply]]
+        return
     
     # Get LLM client for chatbot responses
     llm_client = _get_llm_client()
     
-    # Build context from initial assessment and conversation history
+    # Bounded prompt: cached assessment preamble, rolling summary of older
+    # turns and the last few turns verbatim (built once per consultation).
+    chat_context = session_state.get("chat_context")
+    if chat_context is None:
+        chat_context = ChatContext.from_history(session_state["initial_assessment"], chat_history)
+        session_state["chat_context"] = chat_context
     initial = session_state["initial_assessment"]
-    
-    # Build conversation history string
-    conversation_context = ""
-    if len(chat_history) > 1:  # More than just the initial greeting
-        conversation_context = "\n\nPREVIOUS CONVERSATION:\n"
-        for i, (user_msg, doctor_msg) in enumerate(chat_history[:-1], 1):  # Exclude current message
-            conversation_context += f"Patient: {user_msg}\nDoctor: {doctor_msg}\n\n"
-    
-    context = f"""You are a professional, experienced medical doctor providing real-time assistance to a patient in a consultation.
-
-INITIAL ASSESSMENT CONTEXT:
-- Diagnosis: {initial.get('diagnosis', 'Not specified')}
-- Treatment Plan: {initial.get('treatment', 'Not specified')}
-- Medicine Constituents: {', '.join(initial.get('medicine', []))}
-- Safety Notes: {initial.get('safety', 'Not specified')}
-- Clinical Reasoning: {initial.get('reasoning', 'Not specified')}
-- Image Findings: {initial.get('image_summary', 'No image provided')}
-- Patient's Initial Description: {initial.get('transcript', 'No description provided')}
-{conversation_context}
-PATIENT'S CURRENT QUESTION:
-{message}
-
-INSTRUCTIONS:
-1. Answer the patient's question based on the initial assessment context and conversation history above
-2. Provide clear, professional medical guidance that is specific to their condition
-3. Be empathetic, warm, and reassuring - speak as a caring doctor would
-4. Reference the initial diagnosis and treatment plan when relevant
-5. If asked about medications, explain how to use them properly, dosages, and what to expect
-6. If asked about symptoms, relate them to the initial assessment and explain what they mean
-7. If the question requires urgent medical attention, clearly state that and recommend immediate care
-8. Keep responses concise but comprehensive (typically 2-5 sentences)
-9. Use natural, conversational language - avoid overly technical jargon unless necessary
-10. If you don't have enough information, ask clarifying questions or recommend in-person evaluation
-11. Maintain continuity with previous conversation if relevant
-
-Respond naturally as a doctor would in a real consultation, addressing the patient's concern directly:"""
-
-    # Generate doctor's response
-    doctor_response = ""
+    context = chat_context.build_prompt(message)
+
+    # Stream the doctor's response into a new chat row
+    chat_history.append([message, ""])
+    yield chat_history
+
     if llm_client:
+        last_update = time.monotonic()
         try:
-            doctor_response = llm_client.generate(context)
-            # Clean up response if it's wrapped in JSON
-            if doctor_response.startswith('{'):
-                import json
-                try:
-                    parsed = json.loads(doctor_response)
-                    doctor_response = parsed.get("response", parsed.get("answer", doctor_response))
-                except:
-                    pass
+            for delta in llm_client.generate_stream(context):
+                chat_history[-1][1] += delta
+                now = time.monotonic()
+                if now - last_update >= CHAT_STREAM_INTERVAL:
+                    last_update = now
+                    yield chat_history
         except Exception as e:
             print(f"Error generating chat response: {e}")
-            doctor_response = "I apologize, but I'm having trouble processing your question right now. Please try rephrasing it or consult with a healthcare provider in person if this is urgent."
+            apology = "I apologize, but I'm having trouble processing your question right now. Please try rephrasing it or consult with a healthcare provider in person if this is urgent."
+            partial = chat_history[-1][1].strip()
+            chat_history[-1][1] = f"{partial}\n\n{apology}" if partial else apology
     else:
         # Fallback response without LLM
-        doctor_response = f"Based on your initial assessment showing {initial.get('diagnosis', 'your condition')}, I'd recommend following the treatment plan provided. For specific questions about your condition, please consult with a healthcare provider in person for the most accurate guidance."
+        chat_history[-1][1] = f"Based on your initial assessment showing {initial.get('diagnosis', 'your condition')}, I'd recommend following the treatment plan provided. For specific questions about your condition, please consult with a healthcare provider in person for the most accurate guidance."
     
     # Update chat history
-    chat_history.append([message, doctor_response])
+    chat_context.add_turn(message, chat_history[-1][1])
     session_state["chat_history"] = chat_history
-    
-    return chat_history, session_state
+    store.save(session_id, session_state)
+    yield chat_history
 
 
 with gr.Blocks(title="AI Doctor with Vision and Voice") as iface:
-    state = gr.State({})
+    # Only the server-side session ID travels with each event.
+    state = gr.State(None)
 
     gr.Markdown("## 🏥 AI Doctor with Vision, Voice, and Real-Time Chat")
 
@@ -227,7 +314,12 @@ with gr.Blocks(title="AI Doctor with Vision and Voice") as iface:
                 interactive=False,
             )
             triage_out = gr.Textbox(label="Triage Suggestion", interactive=False)
-            voice_out = gr.Audio(label="🔊 Doctor's Voice Response")
+            voice_out = gr.Audio(
+                label="🔊 Doctor's Voice Response",
+                streaming=True,
+                autoplay=True,
+                format="mp3",
+            )
         
         with gr.Column(scale=1):
             gr.Markdown("### 💬 Chat with Your Doctor")
@@ -264,8 +356,8 @@ with gr.Blocks(title="AI Doctor with Vision and Voice") as iface:
     # Chat button - real-time conversation
     chat_btn.click(
         fn=chat_callback,
-        inputs=[chat_input, chatbot, state],
-        outputs=[chatbot, state],
+        inputs=[chat_input, state],
+        outputs=[chatbot],
     ).then(
         lambda: "",  # Clear input after sending
         outputs=[chat_input],
@@ -274,14 +366,19 @@ with gr.Blocks(title="AI Doctor with Vision and Voice") as iface:
     # Allow Enter key to send message
     chat_input.submit(
         fn=chat_callback,
-        inputs=[chat_input, chatbot, state],
-        outputs=[chatbot, state],
+        inputs=[chat_input, state],
+        outputs=[chatbot],
     ).then(
         lambda: "",  # Clear input after sending
         outputs=[chat_input],
 )
 
-iface.launch(debug=True)
+# Optionally synthesise the fallback answers into the TTS cache in the background.
+if __name__ == "__main__":
+    if os.environ.get("TTS_PREWARM", "0") == "1":
+        threading.Thread(target=_prewarm_tts, name="tts-prewarm", daemon=True).start()
+
+    iface.launch(debug=True)
 
 #http://127.0.0.1:7860
 
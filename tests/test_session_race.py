@@ -0,0 +1,97 @@
+"""
+A resubmit while a chat reply is still streaming must not be overwritten
+by that reply: the chat turn and the consultation save share the session
+lock, so the new consultation is saved after the turn finishes.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("gradio")
+
+import gradio_app  # noqa: E402
+from brain_of_the_doctor import FakeStreamingLLMClient  # noqa: E402
+
+
+def _fake_result(diagnosis):
+    return {
+        "transcript": f"transcript for {diagnosis}",
+        "fusion_result": {
+            "preliminary_diagnosis": diagnosis,
+            "recommended_treatment": "rest",
+            "medicine_constituents": [],
+            "safety_notes": "",
+            "reasoning": "",
+        },
+        "action_result": {"final_confidence": 0.7, "triage_action": "monitor"},
+        "session_state": {"image_summary": ""},
+    }
+
+
+async def _no_speech(_speech):
+    return
+    yield
+
+
+def _submit(session_id):
+    async def run():
+        outputs = []
+        async for update in gradio_app.submit_callback(None, None, "", session_id):
+            outputs.append(update)
+        return outputs
+
+    return asyncio.run(run())
+
+
+def test_resubmit_during_streaming_chat_keeps_new_consultation(monkeypatch):
+    monkeypatch.setattr(gradio_app, "text_to_speech_stream_async", _no_speech)
+    monkeypatch.setattr(
+        gradio_app,
+        "_get_llm_client",
+        lambda: FakeStreamingLLMClient("a slow streamed reply from the doctor", delay=0.05),
+    )
+    monkeypatch.setattr(gradio_app, "CHAT_STREAM_INTERVAL", 0.0)
+
+    async def first_record(**_kwargs):
+        return _fake_result("old diagnosis")
+
+    monkeypatch.setattr(gradio_app.api_local, "submit_record_async", first_record)
+    session_id = _submit(None)[0][-1]
+
+    streaming = threading.Event()
+    histories = []
+
+    def chat():
+        for history in gradio_app.chat_callback("Is it serious?", session_id):
+            histories.append([list(row) for row in history])
+            if history[-1][1]:
+                streaming.set()
+
+    chat_thread = threading.Thread(target=chat)
+    chat_thread.start()
+    assert streaming.wait(5), "chat reply never started streaming"
+
+    async def second_record(**_kwargs):
+        return _fake_result("new diagnosis")
+
+    monkeypatch.setattr(gradio_app.api_local, "submit_record_async", second_record)
+    assert _submit(session_id)[0][-1] == session_id
+    chat_thread.join(5)
+    assert not chat_thread.is_alive()
+
+    # The chat turn completed against the old consultation...
+    assert histories[-1][-1] == ["Is it serious?", "a slow streamed reply from the doctor"]
+    # ...and the resubmit, saved after it, was not overwritten.
+    state = gradio_app.get_session_store().get(session_id)
+    assert state["initial_assessment"]["diagnosis"] == "new diagnosis"
+    assert len(state["chat_history"]) == 1
+    assert "new diagnosis" in state["chat_history"][0][1]
+    assert state["chat_context"].build_prompt("next") == gradio_app.ChatContext(
+        state["initial_assessment"]
+    ).build_prompt("next")
@@ -1,13 +1,40 @@
 """
 Text-to-speech functionality for the medical AI agent.
 Supports ElevenLabs (premium) and gTTS (free fallback).
+
+Besides whole-file synthesis, ``text_to_speech_stream`` (and its async
+twin) split the text into sentences, synthesise the chunks in parallel and
+yield MP3 chunks in order as soon as each is ready, so playback can start
+after the first sentence instead of after the whole response. If ElevenLabs
+fails partway through, the rest of that utterance is spoken with gTTS, so
+the stream switches voice (and sample rate) at most once.
 """
 
+import asyncio
+import io
 import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from gtts import gTTS
-from elevenlabs.client import ElevenLabs
+from elevenlabs.client import AsyncElevenLabs, ElevenLabs
+
+from app.services.config import env_int
+from app.services.tts_cache import AudioCache, get_tts_cache
 
 ELEVENLABS_API_KEY = os.environ.get("ELEVENLABS_API_KEY")
+ELEVENLABS_VOICE_ID = "UzYWd2rD2PPFPjXRG3Ul"  # Aria voice ID
+ELEVENLABS_OUTPUT_FORMAT = "mp3_22050_32"
+ELEVENLABS_MODEL_ID = "eleven_turbo_v2"
+GTTS_LANGUAGE = "en"
+
+
+# Streaming TTS: parallel synthesis requests and the longest text chunk
+# (both at least 1: zero workers would stall the stream).
+TTS_STREAM_WORKERS = env_int("TTS_STREAM_WORKERS", 4, minimum=1)
+TTS_CHUNK_CHARS = env_int("TTS_CHUNK_CHARS", 240, minimum=1)
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
 
 
 def text_to_speech_with_gtts(input_text, output_filepath):
@@ -15,13 +42,7 @@ def text_to_speech_with_gtts(input_text, output_filepath):
     Generate speech using gTTS (Google Text-to-Speech).
     Free, no API key required.
     """
-    language = "en"
-    audioobj = gTTS(
-        text=input_text,
-        lang=language,
-        slow=False
-    )
-    audioobj.save(output_filepath)
+    _write_chunks(output_filepath, [_gtts_audio(input_text)])
     return output_filepath
 
 
@@ -31,34 +52,261 @@ def text_to_speech_with_elevenlabs(input_text, output_filepath):
     Returns the output filepath for Gradio to use.
     """
     # Try ElevenLabs first if API key is available
-    if ELEVENLABS_API_KEY and ELEVENLABS_API_KEY != "your_elevenlabs_api_key_here":
+    if _use_elevenlabs():
         try:
             client = ElevenLabs(api_key=ELEVENLABS_API_KEY)
-            
-            # Use the new text_to_speech.convert() method
-            audio = client.text_to_speech.convert(
-                voice_id="UzYWd2rD2PPFPjXRG3Ul",  # Aria voice ID
-                output_format="mp3_22050_32",
-                text=input_text,
-                model_id="eleven_turbo_v2"
-            )
-            
-            # Save the audio using chunks
-            with open(output_filepath, "wb") as f:
-                for chunk in audio:
-                    f.write(chunk)
-            
+            _write_chunks(output_filepath, [_elevenlabs_audio(client, input_text)])
             return output_filepath
         except Exception as e:
             print(f"ElevenLabs TTS failed: {e}. Falling back to gTTS...")
     
     # Fallback to gTTS (free, no API key needed)
     try:
-        language = "en"
-        audioobj = gTTS(text=input_text, lang=language, slow=False)
-        # Save as MP3 (gTTS supports MP3)
-        audioobj.save(output_filepath)
-        return output_filepath
+        return text_to_speech_with_gtts(input_text, output_filepath)
+    except Exception as e:
+        print(f"gTTS also failed: {e}")
+        return None
+
+
+async def text_to_speech_with_elevenlabs_async(input_text, output_filepath):
+    """
+    Async variant of text_to_speech_with_elevenlabs.
+    Streams ElevenLabs audio without blocking the event loop; gTTS (which has
+    no async API) runs in a worker thread.
+    """
+    if _use_elevenlabs():
+        try:
+            client = AsyncElevenLabs(api_key=ELEVENLABS_API_KEY)
+            audio = await _elevenlabs_audio_async(client, input_text)
+            await asyncio.to_thread(_write_chunks, output_filepath, [audio])
+            return output_filepath
+        except Exception as e:
+            print(f"ElevenLabs TTS failed: {e}. Falling back to gTTS...")
+
+    try:
+        return await asyncio.to_thread(text_to_speech_with_gtts, input_text, output_filepath)
     except Exception as e:
         print(f"gTTS also failed: {e}")
         return None
+
+
+def _write_chunks(output_filepath, chunks):
+    with open(output_filepath, "wb") as f:
+        for chunk in chunks:
+            f.write(chunk)
+
+
+def _use_elevenlabs():
+    return bool(ELEVENLABS_API_KEY) and ELEVENLABS_API_KEY != "your_elevenlabs_api_key_here"
+
+
+def split_sentences(input_text, max_chars=None):
+    """
+    Split text into TTS chunks along sentence boundaries.
+
+    The first chunk is always a single sentence so the first audio is
+    quick to synthesise; later sentences are merged up to ``max_chars``
+    (default ``TTS_CHUNK_CHARS``) to keep the number of requests low.
+    Sentences longer than ``max_chars`` are cut at word boundaries.
+    """
+    max_chars = max_chars or TTS_CHUNK_CHARS
+    text = " ".join((input_text or "").split())
+    pieces = []
+    for sentence in _SENTENCE_END.split(text):
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            pieces.append(sentence[:cut])
+            sentence = sentence[cut:].strip()
+        if sentence:
+            pieces.append(sentence)
+
+    chunks = []
+    for piece in pieces:
+        if len(chunks) > 1 and len(chunks[-1]) + 1 + len(piece) <= max_chars:
+            chunks[-1] += " " + piece
+        else:
+            chunks.append(piece)
+    return chunks
+
+
+def _elevenlabs_key(text):
+    return AudioCache.key(
+        text, "elevenlabs", ELEVENLABS_VOICE_ID, ELEVENLABS_MODEL_ID, ELEVENLABS_OUTPUT_FORMAT
+    )
+
+
+def _elevenlabs_request(text):
+    return dict(
+        voice_id=ELEVENLABS_VOICE_ID,
+        output_format=ELEVENLABS_OUTPUT_FORMAT,
+        text=text,
+        model_id=ELEVENLABS_MODEL_ID,
+    )
+
+
+def _elevenlabs_audio(client, text):
+    """ElevenLabs MP3 bytes for ``text``, from the audio cache when possible."""
+    cache = get_tts_cache()
+    key = _elevenlabs_key(text)
+    audio = cache.get(key)
+    if audio is None:
+        audio = b"".join(client.text_to_speech.convert(**_elevenlabs_request(text)))
+        cache.set(key, audio)
+    return audio
+
+
+async def _elevenlabs_audio_async(client, text):
+    cache = get_tts_cache()
+    key = _elevenlabs_key(text)
+    audio = await asyncio.to_thread(cache.get, key)
+    if audio is None:
+        stream = client.text_to_speech.convert(**_elevenlabs_request(text))
+        audio = b"".join([chunk async for chunk in stream])
+        await asyncio.to_thread(cache.set, key, audio)
+    return audio
+
+
+def _gtts_key(text):
+    return AudioCache.key(text, "gtts", GTTS_LANGUAGE, "gtts", "mp3")
+
+
+def _gtts_audio(text):
+    """gTTS MP3 bytes for ``text``, from the audio cache when possible."""
+    cache = get_tts_cache()
+    key = _gtts_key(text)
+    audio = cache.get(key)
+    if audio is None:
+        buffer = io.BytesIO()
+        gTTS(text=text, lang=GTTS_LANGUAGE, slow=False).write_to_fp(buffer)
+        audio = buffer.getvalue()
+        cache.set(key, audio)
+    return audio
+
+
+def _gtts_chunk(text):
+    try:
+        return _gtts_audio(text)
+    except Exception as e:
+        print(f"gTTS also failed: {e}")
+        return b""
+
+
+def _synthesize_chunk(client, text, fallback=None):
+    """
+    ``(backend, mp3_bytes)`` for one chunk: ElevenLabs if configured, else /
+    on failure gTTS. ``fallback`` is an Event shared by one utterance: a
+    failure sets it and later chunks go straight to gTTS.
+    """
+    if client is not None and not (fallback and fallback.is_set()):
+        try:
+            return "elevenlabs", _elevenlabs_audio(client, text)
+        except Exception as e:
+            print(f"ElevenLabs TTS failed for a chunk: {e}. Falling back to gTTS...")
+            if fallback is not None:
+                fallback.set()
+    return "gtts", _gtts_chunk(text)
+
+
+async def _synthesize_chunk_async(client, text, fallback=None):
+    if client is not None and not (fallback and fallback.is_set()):
+        try:
+            return "elevenlabs", await _elevenlabs_audio_async(client, text)
+        except Exception as e:
+            print(f"ElevenLabs TTS failed for a chunk: {e}. Falling back to gTTS...")
+            if fallback is not None:
+                fallback.set()
+    return "gtts", await asyncio.to_thread(_gtts_chunk, text)
+
+
+def _tts_chunks(input_text):
+    """
+    Chunks for a text or a list of segments. Segments are chunked
+    separately, so a recurring segment (a safety note, the triage
+    suggestion) always yields the same, cacheable chunks.
+    """
+    if isinstance(input_text, (list, tuple)):
+        return [chunk for segment in input_text for chunk in split_sentences(segment)]
+    return split_sentences(input_text)
+
+
+def text_to_speech_stream(input_text, max_workers=None):
+    """
+    Yield MP3 chunks for ``input_text``, sentence by sentence, in order.
+
+    ``input_text`` is a string or a list of segments. All chunks are
+    submitted to a thread pool up front (``TTS_STREAM_WORKERS`` at a time),
+    so later sentences are synthesised while earlier ones play; cached
+    chunks come straight from disk. Once any chunk falls back to gTTS,
+    every chunk not yet yielded is gTTS too, so the voice changes at most
+    once. Suitable for a ``gr.Audio(streaming=True)`` output.
+    """
+    chunks = _tts_chunks(input_text)
+    if not chunks:
+        return
+    client = ElevenLabs(api_key=ELEVENLABS_API_KEY) if _use_elevenlabs() else None
+    fallback = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=max_workers or TTS_STREAM_WORKERS)
+    try:
+        futures = [pool.submit(_synthesize_chunk, client, chunk, fallback) for chunk in chunks]
+        for chunk, future in zip(chunks, futures):
+            backend, audio = future.result()
+            if backend == "elevenlabs" and fallback.is_set():
+                # Synthesised before another chunk failed: redo it in gTTS's voice.
+                audio = _gtts_chunk(chunk)
+            if audio:
+                yield audio
+    finally:
+        # Stop pending work if the listener goes away mid-stream.
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def text_to_speech_stream_async(input_text, max_workers=None):
+    """Async twin of ``text_to_speech_stream`` (an async generator)."""
+    chunks = _tts_chunks(input_text)
+    if not chunks:
+        return
+    client = AsyncElevenLabs(api_key=ELEVENLABS_API_KEY) if _use_elevenlabs() else None
+    semaphore = asyncio.Semaphore(max_workers or TTS_STREAM_WORKERS)
+    fallback = threading.Event()
+
+    async def _one(text):
+        async with semaphore:
+            return await _synthesize_chunk_async(client, text, fallback)
+
+    tasks = [asyncio.ensure_future(_one(chunk)) for chunk in chunks]
+    try:
+        for chunk, task in zip(chunks, tasks):
+            backend, audio = await task
+            if backend == "elevenlabs" and fallback.is_set():
+                audio = await asyncio.to_thread(_gtts_chunk, chunk)
+            if audio:
+                yield audio
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def prewarm_tts_cache(texts, max_workers=None):
+    """
+    Synthesise every chunk of ``texts`` (strings or segment lists) into the
+    audio cache ahead of time, with the backend the app would use.
+
+    Returns ``{"chunks": int, "already_cached": int, "synthesised": int,
+    "failed": int}``.
+    """
+    chunks = list(dict.fromkeys(chunk for text in texts for chunk in _tts_chunks(text)))
+    client = ElevenLabs(api_key=ELEVENLABS_API_KEY) if _use_elevenlabs() else None
+    cache = get_tts_cache()
+    key = _elevenlabs_key if client is not None else _gtts_key
+    missing = [chunk for chunk in chunks if cache.get(key(chunk)) is None]
+    with ThreadPoolExecutor(max_workers=max_workers or TTS_STREAM_WORKERS) as pool:
+        audios = [audio for _, audio in pool.map(lambda chunk: _synthesize_chunk(client, chunk), missing)]
+    synthesised = sum(1 for audio in audios if audio)
+    return {
+        "chunks": len(chunks),
+        "already_cached": len(chunks) - len(missing),
+        "synthesised": synthesised,
+        "failed": len(missing) - synthesised,
+    }
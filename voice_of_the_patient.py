@@ -63,20 +63,75 @@ transcription=client.audio.transcriptions.create(
 print(transcription.text)
 '''
 
+import asyncio
 import os
-from groq import Groq
+
+from app.services.cache_service import content_key, get_cache, hash_file
+from app.services.client_registry import get_async_groq_client, get_groq_client
+from app.services.config import env_int, env_number
 
 GROQ_API_KEY=os.environ.get("GROQ_API_KEY")
 stt_model="whisper-large-v3-turbo"
 
-def transcribe_with_groq(stt_model, audio_filepath, GROQ_API_KEY):
-    client=Groq(api_key=GROQ_API_KEY)
+
+# Re-analysing the same recording (e.g. after changing only the image or
+# patient ID) is served from here: no upload, no STT latency.
+_TRANSCRIPT_CACHE=get_cache(
+    "transcript",
+    ttl_seconds=env_number("TRANSCRIPT_CACHE_TTL", 30 * 24 * 3600),
+    max_memory_items=env_int("TRANSCRIPT_CACHE_MEMORY_ITEMS", 256),
+    max_disk_entries=env_int("TRANSCRIPT_CACHE_MAX_ENTRIES", 20000),
+)
+
+
+def _transcript_cache_key(stt_model, audio_filepath, language):
+    return content_key(hash_file(audio_filepath), stt_model, language)
+
+
+def get_transcript_cache_stats():
+    """Hit/miss counters of the transcript cache."""
+    return _TRANSCRIPT_CACHE.stats()
+
+
+def transcribe_with_groq(stt_model, audio_filepath, GROQ_API_KEY, language="en"):
+    cache_key=_transcript_cache_key(stt_model, audio_filepath, language)
+    cached=_TRANSCRIPT_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    client=get_groq_client(GROQ_API_KEY)
     
-    audio_file=open(audio_filepath, "rb")
-    transcription=client.audio.transcriptions.create(
+    with open(audio_filepath, "rb") as audio_file:
+        transcription=client.audio.transcriptions.create(
+            model=stt_model,
+            file=audio_file,
+            language=language
+        )
+
+    _TRANSCRIPT_CACHE.set(cache_key, transcription.text)
+    return transcription.text
+
+
+async def transcribe_with_groq_async(stt_model, audio_filepath, GROQ_API_KEY, language="en"):
+    """Async variant of transcribe_with_groq; the file is read off the event loop."""
+    cache_key=await asyncio.to_thread(_transcript_cache_key, stt_model, audio_filepath, language)
+    cached=await asyncio.to_thread(_TRANSCRIPT_CACHE.get, cache_key)
+    if cached is not None:
+        return cached
+
+    client=get_async_groq_client(GROQ_API_KEY)
+
+    audio_bytes=await asyncio.to_thread(_read_audio, audio_filepath)
+    transcription=await client.audio.transcriptions.create(
         model=stt_model,
-        file=audio_file,
-        language="en"
+        file=(os.path.basename(audio_filepath), audio_bytes),
+        language=language
     )
 
+    await asyncio.to_thread(_TRANSCRIPT_CACHE.set, cache_key, transcription.text)
     return transcription.text
+
+
+def _read_audio(audio_filepath):
+    with open(audio_filepath, "rb") as audio_file:
+        return audio_file.read()